@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+"""Admission control for LLM calls.
+
+Each traffic class has a concurrency limit and a bounded wait queue:
+
+- ``interactive`` (default): chat and on-demand suggestions; a short queue
+  and a short wait, so overload is shed quickly with 429 + Retry-After
+- ``batch``: batch runs and background jobs; a long queue that waits, so
+  backlogs slow down instead of failing
+
+Requests pick their class through a ContextVar (``admission_class``), which
+follows work into ``asyncio.to_thread`` / threadpool calls. Only requests
+that actually reach the provider take a slot; cache hits and coalesced
+waiters do not. Because at most ``limit + queue`` threads can be tied up
+per class, cheap endpoints keep their share of the threadpool during a
+spike.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+_current_class: ContextVar[str] = ContextVar("llm_admission_class", default=INTERACTIVE)
+
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "astratickets_llm_admission_active", "LLM calls holding an admission slot.", ["class"]
+)
+ADMISSION_QUEUED = REGISTRY.gauge(
+    "astratickets_llm_admission_queued", "LLM calls waiting for an admission slot.", ["class"]
+)
+ADMISSION_REJECTED = REGISTRY.counter(
+    "astratickets_llm_admission_rejected_total",
+    "LLM calls shed because the queue was full or the wait timed out.",
+    ["class", "reason"],
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when an LLM call is shed; mapped to 429 + Retry-After by the app."""
+
+    def __init__(self, traffic_class: str, reason: str, retry_after: int) -> None:
+        super().__init__(f"LLM capacity exhausted for {traffic_class} requests ({reason}); retry later.")
+        self.traffic_class = traffic_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextmanager
+def admission_class(name: str) -> Iterator[None]:
+    """Run the enclosed LLM calls in traffic class ``name``."""
+    token = _current_class.set(name)
+    try:
+        yield
+    finally:
+        _current_class.reset(token)
+
+
+@dataclass
+class _ClassState:
+    limit: int
+    max_queue: int
+    queue_timeout: Optional[float]
+    active: int = 0
+    queued: int = 0
+    # EWMA of how long a slot is held, for Retry-After estimates
+    hold_seconds: float = 1.0
+
+
+class AdmissionController:
+    def __init__(self, classes: Dict[str, _ClassState]) -> None:
+        self._classes = classes
+        self._cond = threading.Condition()
+        for name, state in classes.items():
+            ADMISSION_ACTIVE.set_function(lambda s=state: s.active, **{"class": name})
+            ADMISSION_QUEUED.set_function(lambda s=state: s.queued, **{"class": name})
+
+    def _retry_after(self, state: _ClassState) -> int:
+        # Time for the queue ahead of us to drain through ``limit`` slots
+        waves = (state.queued + 1) / max(state.limit, 1)
+        return max(1, math.ceil(state.hold_seconds * waves))
+
+    def _reject(self, name: str, state: _ClassState, reason: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.inc(**{"class": name, "reason": reason})
+        return AdmissionRejected(name, reason, self._retry_after(state))
+
+    @contextmanager
+    def slot(self, traffic_class: Optional[str] = None) -> Iterator[None]:
+        name = traffic_class or _current_class.get()
+        state = self._classes.get(name) or self._classes[INTERACTIVE]
+        with self._cond:
+            if state.active >= state.limit:
+                if state.queued >= state.max_queue:
+                    raise self._reject(name, state, "queue_full")
+                state.queued += 1
+                try:
+                    admitted = self._cond.wait_for(
+                        lambda: state.active < state.limit, timeout=state.queue_timeout
+                    )
+                finally:
+                    state.queued -= 1
+                if not admitted:
+                    raise self._reject(name, state, "queue_timeout")
+            state.active += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            with self._cond:
+                state.active -= 1
+                state.hold_seconds = 0.2 * held + 0.8 * state.hold_seconds
+                self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._cond:
+            return {
+                name: {
+                    "active": s.active,
+                    "queued": s.queued,
+                    "limit": s.limit,
+                    "max_queue": s.max_queue,
+                }
+                for name, s in self._classes.items()
+            }
+
+
+_CONTROLLER: Optional[AdmissionController] = None
+_CONTROLLER_LOCK = threading.Lock()
+
+
+def get_admission_controller() -> AdmissionController:
+    global _CONTROLLER
+    with _CONTROLLER_LOCK:
+        if _CONTROLLER is None:
+            settings = get_settings()
+            _CONTROLLER = AdmissionController(
+                {
+                    INTERACTIVE: _ClassState(
+                        limit=settings.llm_interactive_concurrency,
+                        max_queue=settings.llm_interactive_queue_size,
+                        queue_timeout=settings.llm_interactive_queue_timeout_seconds,
+                    ),
+                    BATCH: _ClassState(
+                        limit=settings.llm_batch_concurrency,
+                        max_queue=settings.llm_batch_queue_size,
+                        queue_timeout=settings.llm_batch_queue_timeout_seconds,
+                    ),
+                }
+            )
+        return _CONTROLLER
+
+
+def reset_admission_controller() -> None:
+    """Drop the controller so the next call rebuilds it from settings."""
+    global _CONTROLLER
+    with _CONTROLLER_LOCK:
+        _CONTROLLER = None
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+"""Batch AI suggestions for ticket backlogs.
+
+A batch selects tickets by filter and runs the suggestion pipeline
+(classification, KB retrieval, LLM draft) for many tickets at once:
+
+- up to ``concurrency`` tickets are in flight at the same time
+- LLM requests are paced by a requests-per-minute token bucket
+- every result is written to ``ticket_suggestions`` and progress counters
+  plus per-stage timings are kept on the ``suggestion_batches`` row
+- cancellation stops new tickets from starting; in-flight ones finish
+
+Batches started from the API run as ``ai.batch`` jobs, so a batch
+interrupted by a restart is re-claimed once its lease expires and resumes
+with the tickets it has not finished; ``scripts/batch_suggest.py`` runs one
+in the foreground.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.orm import Session
+
+from app.ai.admission import BATCH, admission_class
+from app.ai.llm import LLMConfigOverride
+from app.ai.precompute import suggestion_version
+from app.ai.service import generate_ticket_suggestion
+from app.core.config import get_settings
+from app.db.models import Job, SuggestionBatch, Ticket, TicketSuggestion, utcnow
+from app.db.session import session_scope
+from app.jobs.queue import enqueue
+
+
+class TokenBucket:
+    """Async token bucket: ``rate_per_minute`` tokens refilled continuously."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None) -> None:
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self._rate = rate_per_minute / 60.0
+        self._capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 60.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate)
+
+
+@dataclass
+class BatchFilters:
+    status: Optional[str] = "open"
+    priority: Optional[str] = None
+    ticket_ids: Optional[List[int]] = None
+    created_after: Optional[datetime] = None
+    limit: Optional[int] = None
+    # Skip tickets that already have a stored suggestion
+    only_missing: bool = False
+
+
+@dataclass
+class BatchOptions:
+    collection: str = "kb_main"
+    n_results: int = 3
+    concurrency: Optional[int] = None
+    requests_per_minute: Optional[int] = None
+
+
+def select_ticket_ids(session: Session, filters: BatchFilters) -> List[int]:
+    conditions = []
+    if filters.status:
+        conditions.append(Ticket.status == filters.status)
+    if filters.priority:
+        conditions.append(Ticket.priority == filters.priority)
+    if filters.ticket_ids:
+        conditions.append(Ticket.id.in_(filters.ticket_ids))
+    if filters.created_after:
+        conditions.append(Ticket.created_at >= filters.created_after)
+    if filters.only_missing:
+        has_suggestion = select(TicketSuggestion.ticket_id).where(
+            TicketSuggestion.ticket_id == Ticket.id
+        )
+        conditions.append(~has_suggestion.exists())
+    stmt = select(Ticket.id).order_by(Ticket.created_at)
+    if conditions:
+        stmt = stmt.where(and_(*conditions))
+    if filters.limit:
+        stmt = stmt.limit(filters.limit)
+    return list(session.scalars(stmt))
+
+
+def create_batch(session: Session, filters: BatchFilters, options: BatchOptions) -> tuple[int, List[int]]:
+    """Persist a pending batch row for the selected tickets."""
+    ticket_ids = select_ticket_ids(session, filters)
+    filters_json = asdict(filters)
+    if filters.created_after is not None:
+        filters_json["created_after"] = filters.created_after.isoformat()
+    batch = SuggestionBatch(
+        status="pending",
+        filters=filters_json,
+        options=asdict(options),
+        total=len(ticket_ids),
+    )
+    session.add(batch)
+    session.commit()
+    return batch.id, ticket_ids
+
+
+# Statuses a runner may still move the batch out of
+ACTIVE_STATUSES = ("pending", "running", "cancelling")
+
+
+@dataclass
+class _Progress:
+    completed: int = 0
+    failed: int = 0
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+
+
+class BatchSuggestionRunner:
+    """Runs one batch; ``run`` is a coroutine, ``cancel`` is thread-safe."""
+
+    def __init__(
+        self,
+        batch_id: int,
+        ticket_ids: List[int],
+        options: BatchOptions,
+        llm_override: Optional[LLMConfigOverride] = None,
+    ) -> None:
+        settings = get_settings()
+        self.batch_id = batch_id
+        self.ticket_ids = ticket_ids
+        self.options = options
+        self.llm_override = llm_override
+        self.concurrency = max(1, options.concurrency or settings.ai_batch_concurrency)
+        self.requests_per_minute = (
+            options.requests_per_minute or settings.ai_batch_requests_per_minute
+        )
+        self._cancel = threading.Event()
+        self._progress = _Progress()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    async def run(self, mark_failed: bool = True) -> None:
+        """Process the batch; ``mark_failed=False`` leaves a crashed batch resumable."""
+        if not await asyncio.to_thread(self._start):
+            return
+        bucket = TokenBucket(self.requests_per_minute)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def worker(ticket_id: int) -> None:
+            async with semaphore:
+                if self._cancel.is_set():
+                    return
+                await bucket.acquire()
+                if self._cancel.is_set():
+                    return
+                await asyncio.to_thread(self._process_ticket, ticket_id)
+
+        try:
+            await asyncio.gather(*(worker(tid) for tid in self.ticket_ids))
+        except Exception as exc:  # pragma: no cover - defensive
+            if mark_failed:
+                await asyncio.to_thread(self.set_status, "failed", str(exc))
+            raise
+        final = "cancelled" if self._cancel.is_set() else "completed"
+        await asyncio.to_thread(self.set_status, final)
+
+    def _process_ticket(self, ticket_id: int) -> None:
+        with session_scope() as session:
+            ticket = session.get(Ticket, ticket_id)
+            if ticket is None:
+                return
+            row = TicketSuggestion(
+                ticket_id=ticket_id,
+                batch_id=self.batch_id,
+                version=suggestion_version(
+                    ticket,
+                    collection=self.options.collection,
+                    n_results=self.options.n_results,
+                    override=self.llm_override,
+                ),
+            )
+            started = time.perf_counter()
+            try:
+                with admission_class(BATCH):
+                    suggestion = generate_ticket_suggestion(
+                        ticket=ticket,
+                        collection=self.options.collection,
+                        n_results=self.options.n_results,
+                        llm_override=self.llm_override,
+                    )
+            except Exception as exc:
+                row.error = str(exc)
+                row.timings = {"total": time.perf_counter() - started}
+            else:
+                row.category = suggestion.category
+                row.confidence = suggestion.confidence
+                row.suggested_priority = suggestion.suggested_priority
+                row.suggested_tags = suggestion.suggested_tags
+                row.ai_reply = suggestion.ai_reply
+                row.kb_snippets = suggestion.kb_snippets
+                row.timings = {**suggestion.timings, "total": time.perf_counter() - started}
+            session.add(row)
+            self._record(session, row)
+
+    def _record(self, session: Session, row: TicketSuggestion) -> None:
+        # Commit under the lock so progress snapshots land in order.
+        with self._lock:
+            progress = self._progress
+            if row.error:
+                progress.failed += 1
+            else:
+                progress.completed += 1
+            for stage, seconds in (row.timings or {}).items():
+                progress.stage_seconds[stage] = progress.stage_seconds.get(stage, 0.0) + seconds
+            values = dict(
+                completed=progress.completed,
+                failed=progress.failed,
+                stage_seconds={k: round(v, 4) for k, v in progress.stage_seconds.items()},
+            )
+            session.execute(
+                update(SuggestionBatch).where(SuggestionBatch.id == self.batch_id).values(**values)
+            )
+            # Allow cancellation from another process (e.g. API cancelling a CLI run).
+            status = session.scalar(
+                select(SuggestionBatch.status).where(SuggestionBatch.id == self.batch_id)
+            )
+            session.commit()
+        if status == "cancelling":
+            self._cancel.set()
+
+    def _start(self) -> bool:
+        """Mark the batch running; returns False if it already finished.
+
+        The UPDATE is conditional so a cancel written before the runner
+        starts is kept. A batch that is already running is a job retried
+        after a crash: tickets finished by the earlier attempt are skipped
+        and its counters carried over.
+        """
+        with session_scope() as session:
+            started = session.execute(
+                update(SuggestionBatch)
+                .where(
+                    SuggestionBatch.id == self.batch_id,
+                    SuggestionBatch.status.in_(("pending", "running")),
+                )
+                .values(status="running")
+            ).rowcount
+            session.commit()
+            batch = session.get(SuggestionBatch, self.batch_id)
+            if batch is None or batch.status not in ACTIVE_STATUSES:
+                return False
+            if not started:  # cancelling
+                self._cancel.set()
+                return True
+            done = set(
+                session.scalars(
+                    select(TicketSuggestion.ticket_id).where(TicketSuggestion.batch_id == self.batch_id)
+                )
+            )
+            if done:
+                self.ticket_ids = [tid for tid in self.ticket_ids if tid not in done]
+                self._progress = _Progress(
+                    completed=batch.completed,
+                    failed=batch.failed,
+                    stage_seconds=dict(batch.stage_seconds or {}),
+                )
+        return True
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        values: Dict[str, object] = {"status": status}
+        if status in {"completed", "cancelled", "failed"}:
+            values["finished_at"] = utcnow()
+        if error:
+            values["error"] = error
+        with session_scope() as session:
+            session.execute(
+                update(SuggestionBatch)
+                .where(SuggestionBatch.id == self.batch_id, SuggestionBatch.status.in_(ACTIVE_STATUSES))
+                .values(**values)
+            )
+            session.commit()
+
+
+_RUNNERS: Dict[int, BatchSuggestionRunner] = {}
+_RUNNERS_LOCK = threading.Lock()
+
+
+def enqueue_batch(
+    session: Session, batch_id: int, ticket_ids: List[int], llm_override: Optional[LLMConfigOverride] = None
+) -> Job:
+    """Queue the batch as an ``ai.batch`` job and link the job to the batch row."""
+    override = llm_override or LLMConfigOverride()
+    job = enqueue(
+        session,
+        "ai.batch",
+        {
+            "batch_id": batch_id,
+            "ticket_ids": ticket_ids,
+            "provider": override.provider,
+            "base_url": override.base_url,
+            "model": override.model,
+        },
+    )
+    session.execute(update(SuggestionBatch).where(SuggestionBatch.id == batch_id).values(job_id=job.id))
+    session.commit()
+    return job
+
+
+def run_batch_job(payload: Dict[str, object]) -> Dict[str, object]:
+    """Body of the ``ai.batch`` job: run (or resume) the batch in this thread."""
+    batch_id = int(payload["batch_id"])  # type: ignore[arg-type]
+    with session_scope() as session:
+        batch = session.get(SuggestionBatch, batch_id)
+        if batch is None:
+            raise LookupError(f"Batch {batch_id} not found")
+        options = BatchOptions(**(batch.options or {}))
+    override = LLMConfigOverride(
+        provider=payload.get("provider"),  # type: ignore[arg-type]
+        base_url=payload.get("base_url"),  # type: ignore[arg-type]
+        model=payload.get("model"),  # type: ignore[arg-type]
+    )
+    runner = BatchSuggestionRunner(batch_id, list(payload["ticket_ids"]), options, override)  # type: ignore[call-overload]
+    with _RUNNERS_LOCK:
+        _RUNNERS[batch_id] = runner
+    try:
+        # A failed attempt leaves the batch running for the job's retry;
+        # fail_orphaned_batches settles it once the job gives up.
+        asyncio.run(runner.run(mark_failed=False))
+    finally:
+        with _RUNNERS_LOCK:
+            _RUNNERS.pop(batch_id, None)
+    return {"batch_id": batch_id}
+
+
+def fail_orphaned_batches(session: Session, batch_id: Optional[int] = None) -> int:
+    """Fail unfinished batches whose job has failed for good (e.g. crashed on its last attempt)."""
+    stmt = update(SuggestionBatch).where(
+        SuggestionBatch.status.in_(ACTIVE_STATUSES),
+        SuggestionBatch.job_id.in_(select(Job.id).where(Job.status == "failed")),
+    )
+    if batch_id is not None:
+        stmt = stmt.where(SuggestionBatch.id == batch_id)
+    res = session.execute(
+        stmt.values(status="failed", finished_at=utcnow(), error="Batch job failed; see its job for details")
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return res.rowcount or 0
+
+
+def cancel_batch(session: Session, batch_id: int) -> Optional[SuggestionBatch]:
+    """Request cancellation; returns the batch row or None if it does not exist."""
+    batch = session.get(SuggestionBatch, batch_id)
+    if batch is None:
+        return None
+    with _RUNNERS_LOCK:
+        runner = _RUNNERS.get(batch_id)
+    if runner is not None:
+        runner.cancel()
+    # Runners in other processes see the status after their next ticket
+    session.execute(
+        update(SuggestionBatch)
+        .where(SuggestionBatch.id == batch_id, SuggestionBatch.status.in_(("pending", "running")))
+        .values(status="cancelling")
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    session.refresh(batch)
+    return batch
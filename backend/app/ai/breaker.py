@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+"""Circuit breaker for the backend's LLM provider.
+
+States:
+
+- ``closed``: calls go through; outcomes are kept for a rolling window.
+  When at least ``min_calls`` finished in the window and the share of
+  failures (errors, or calls slower than ``slow_call_seconds``) reaches
+  ``failure_ratio``, the breaker opens.
+- ``open``: calls fail immediately with ``CircuitOpenError`` for
+  ``open_seconds`` instead of waiting for the provider to time out.
+- ``half_open``: after the open period up to ``half_open_max_calls`` probe
+  calls are let through; a successful probe closes the breaker, a failed
+  one opens it again.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+from app.core.metrics import REGISTRY
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "astratickets_llm_circuit_state",
+    "LLM circuit breaker state (0 = closed, 1 = half-open, 2 = open).",
+)
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    "astratickets_llm_circuit_transitions_total",
+    "LLM circuit breaker state changes by the state entered.",
+    ["state"],
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """The LLM circuit is open; the call was not attempted."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("LLM provider is unavailable (circuit open); retry later.")
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_ratio: float = 0.5,
+        min_calls: int = 5,
+        window_seconds: float = 30.0,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        # (finished_at, failed) per call in the rolling window
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = self._clock()
+        self._outcomes.clear()
+        CIRCUIT_TRANSITIONS.inc(state=state)
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def before_call(self) -> None:
+        """Reserve the right to call the provider or raise ``CircuitOpenError``."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                raise CircuitOpenError(self.open_seconds - (self._clock() - self._opened_at))
+            if self._state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(1)
+                self._probes += 1
+
+    def release(self) -> None:
+        """Give back a reservation whose call never reached the provider."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+    def record(self, seconds: float, error: bool) -> None:
+        """Report a call that ``before_call`` let through."""
+        failed = error or (self.slow_call_seconds is not None and seconds >= self.slow_call_seconds)
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._transition(OPEN if failed else CLOSED)
+                return
+            if self._state == OPEN:
+                # A call admitted before the breaker opened; it changes nothing.
+                return
+            now = self._clock()
+            self._outcomes.append((now, failed))
+            while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+                self._outcomes.popleft()
+            total = len(self._outcomes)
+            failures = sum(1 for _, f in self._outcomes if f)
+            if total >= self.min_calls and failures / total >= self.failure_ratio:
+                self._transition(OPEN)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._transition(CLOSED)
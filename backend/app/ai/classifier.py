@@ -11,6 +11,8 @@ Fallback path:
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
+from app.core.metrics import instrument
+
 
 try:  # Optional dependency – we degrade gracefully if missing
     from sklearn.feature_extraction.text import TfidfVectorizer  # type: ignore
@@ -87,6 +89,7 @@ class TicketClassifier:
             X = self._vectorizer.fit_transform(_TRAIN_TEXTS)
             self._model.fit(X, _TRAIN_LABELS)
 
+    @instrument("classify")
     def predict(self, text: str) -> TicketClassificationResult:
         """Classify the given text into a coarse-grained category."""
         if not text.strip():
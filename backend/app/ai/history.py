@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+"""Token-budgeted chat history window with a rolling summary.
+
+The prompt for a chat turn contains at most ``max_turns`` recent turns
+verbatim, further limited by a token budget. Turns that fall out of that
+window are folded, once, into ``ChatSession.summary`` so the model keeps the
+gist of long conversations while the prompt size stays constant.
+
+Summaries are extractive (first sentence of each folded message) to avoid a
+second LLM round trip per turn.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.ai.tokens import estimate_tokens
+from app.core.config import get_settings
+from app.db.models import ChatMessage, ChatSession
+
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s+")
+_SUMMARY_LINE_CHARS = 160
+
+
+@dataclass
+class HistoryWindow:
+    """Conversation context to send along with the current query."""
+
+    summary: Optional[str] = None
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _summary_line(role: str, content: str) -> str:
+    prefix = "User" if role == "user" else "Assistant"
+    first = _SENTENCE_END_RE.split(content.strip(), maxsplit=1)[0]
+    first = " ".join(first.split())
+    if len(first) > _SUMMARY_LINE_CHARS:
+        first = first[: _SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return f"{prefix}: {first}"
+
+
+def fold_into_summary(
+    summary: Optional[str],
+    messages: Sequence[Tuple[str, str]],
+    token_budget: int,
+) -> Optional[str]:
+    """Append ``messages`` to ``summary`` and trim the oldest lines to the budget."""
+    lines = summary.splitlines() if summary else []
+    lines.extend(_summary_line(role, content) for role, content in messages if content.strip())
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > token_budget:
+        lines.pop(0)
+    return "\n".join(lines) or None
+
+
+def load_history_window(
+    session: Session,
+    chat_session: ChatSession,
+    before_id: Optional[int] = None,
+    max_turns: Optional[int] = None,
+    token_budget: Optional[int] = None,
+    summary_token_budget: Optional[int] = None,
+) -> HistoryWindow:
+    """Return the recent turns of ``chat_session`` plus its rolling summary.
+
+    Only the newest ``2 * max_turns`` messages are loaded (served by the
+    ``(session_id, created_at)`` index). Messages between the current summary
+    watermark and the oldest kept message are folded into the summary and
+    the session row is updated; the caller is responsible for committing.
+    """
+    settings = get_settings()
+    max_turns = settings.chat_history_max_turns if max_turns is None else max_turns
+    token_budget = settings.chat_history_token_budget if token_budget is None else token_budget
+    if summary_token_budget is None:
+        summary_token_budget = settings.chat_summary_token_budget
+
+    stmt = select(ChatMessage).where(ChatMessage.session_id == chat_session.id)
+    if before_id is not None:
+        stmt = stmt.where(ChatMessage.id < before_id)
+    recent = session.scalars(
+        stmt.order_by(ChatMessage.created_at.desc()).limit(max(0, max_turns) * 2)
+    ).all()
+
+    kept: List[ChatMessage] = []
+    used = 0
+    for msg in recent:  # newest first
+        cost = estimate_tokens(msg.content)
+        if kept and used + cost > token_budget:
+            break
+        kept.append(msg)
+        used += cost
+    kept.reverse()
+
+    # Everything older than the oldest kept message (and newer than the
+    # watermark) has left the window and is folded exactly once.
+    boundary = kept[0].id if kept else before_id
+    watermark = chat_session.summary_until_id or 0
+    if boundary is None or boundary - 1 > watermark:
+        fold_stmt = select(ChatMessage).where(
+            ChatMessage.session_id == chat_session.id,
+            ChatMessage.id > watermark,
+        )
+        if boundary is not None:
+            fold_stmt = fold_stmt.where(ChatMessage.id < boundary)
+        dropped = session.scalars(fold_stmt.order_by(ChatMessage.id)).all()
+        if dropped:
+            chat_session.summary = fold_into_summary(
+                chat_session.summary,
+                [(m.role, m.content) for m in dropped],
+                summary_token_budget,
+            )
+        if boundary is not None:
+            chat_session.summary_until_id = boundary - 1
+        elif dropped:
+            chat_session.summary_until_id = dropped[-1].id
+
+    return HistoryWindow(
+        summary=chat_session.summary,
+        turns=[(m.role, m.content) for m in kept],
+    )
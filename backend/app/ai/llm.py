@@ -8,12 +8,18 @@ Design goals:
 - Allow per-request overrides from the frontend for teaching demos.
 """
 
+import hashlib
+import time
 from dataclasses import dataclass
 from typing import List, Optional, Sequence, Tuple
 
-import httpx
-
+from app.ai.admission import AdmissionRejected, get_admission_controller
+from app.ai.breaker import CIRCUIT_STATE, STATE_VALUES, CircuitBreaker, CircuitOpenError
+from app.ai.prompt import BuiltPrompt, PromptBuilder
+from app.ai.provider_pool import Endpoint, ProviderPool, get_provider_pool
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import get_settings
+from app.core.metrics import REGISTRY, instrument, register_cache
 from app.db.models import Ticket
 
 
@@ -31,102 +37,67 @@ class LLMConfigOverride:
     api_key: str | None = None
 
 
+def _resolve_model(override: Optional[LLMConfigOverride] = None) -> str:
+    settings = get_settings()
+    model = override.model if override and override.model else settings.llm_model
+    return model or "gpt-3.5-turbo"
+
+
 def _build_prompt(
     ticket: Ticket,
     category: str,
     kb_snippets: List[str],
     history: List[Tuple[str, str]] = None,
-) -> str:
+    model: Optional[str] = None,
+) -> BuiltPrompt:
     """Construct a concise English prompt for the assistant."""
-    lines: List[str] = [
-        "You are a helpful support agent.",
-        "Draft a concise, polite reply to the user issue.",
-        "",
-        f"Ticket title: {ticket.title}",
-        f"Ticket content: {ticket.content}",
-        f"Predicted category: {category}",
-    ]
-
-    if history:
-        lines.append("")
-        lines.append("Conversation History:")
-        for sender, content in history:
-            lines.append(f"{sender}: {content}")
-
-    if kb_snippets:
-        lines.append("")
-        lines.append("Relevant knowledge base snippets:")
-        for idx, snippet in enumerate(kb_snippets, start=1):
-            lines.append(f"{idx}. {snippet}")
-    lines.append("")
-    lines.append("Reply in the same language as the ticket content.")
-    return "\n".join(lines)
+    return PromptBuilder(model=model).build_ticket(
+        ticket.title, ticket.content, category, kb_snippets, history or []
+    )
 
 
 def _build_chat_prompt(
     query: str,
     kb_snippets: List[str],
     history: Sequence[Tuple[str, str]],
-) -> str:
+    summary: Optional[str] = None,
+    model: Optional[str] = None,
+) -> BuiltPrompt:
     """Construct a prompt for a short RAG-augmented conversation."""
-    lines: List[str] = [
-        "You are an expert customer support assistant.",
-        "Your task is to answer the user's question based on the provided context.",
-        "---",
-        "INSTRUCTIONS:",
-        "1. First, analyze the [User Question] and the [Knowledge Base Snippets].",
-        "2. Determine if the snippets are relevant to the user's question.",
-        "3. IF the snippets are relevant:",
-        "   - Your answer MUST be based exclusively on the information in the snippets.",
-        "   - For each piece of information you use, you MUST cite the source using the format `[Source X]`, where X is the snippet number.",
-        "   - If the snippets do not contain enough information, state what you can answer and clarify that other information is not available in the knowledge base.",
-        "4. IF the snippets are NOT relevant:",
-        "   - State that the knowledge base does not contain relevant information.",
-        "   - Then, provide a helpful answer based on your own general knowledge.",
-        "   - DO NOT cite any sources in this case.",
-        "5. Always reply in the same language as the [User Question].",
-        "---",
-        "EXAMPLE:",
-        "[User Question]: How do I reset my password if the link expired?",
-        "[Knowledge Base Snippets]:",
-        "Snippet 1: To reset your password, go to the login page and click 'Forgot Password'.",
-        "Snippet 2: Password reset links are valid for 24 hours. If a link expires, you must request a new one by repeating the 'Forgot Password' process.",
-        "",
-        "[Your Answer]:",
-        "If your password reset link has expired, you need to request a new one [Source 2]. To do this, please go to the login page and click the 'Forgot Password' link again [Source 1].",
-        "---",
-    ]
+    return PromptBuilder(model=model).build_chat(query, kb_snippets, history, summary=summary)
 
-    if history:
-        lines.append("CONVERSATION HISTORY:")
-        for role, content in history:
-            prefix = "User" if role == "user" else "Assistant"
-            lines.append(f"- {prefix}: {content}")
-        lines.append("---")
 
-    if kb_snippets:
-        lines.append("KNOWLEDGE BASE SNIPPETS:")
-        for idx, snippet in enumerate(kb_snippets, start=1):
-            lines.append(f"Snippet {idx}: {snippet}")
-        lines.append("---")
-
-    lines.append(f"USER QUESTION:")
-    lines.append(query)
-
-    return "\n".join(lines)
+def _resolve_endpoint(override: Optional[LLMConfigOverride] = None) -> Tuple[str, str, str, Optional[str]]:
+    """Return (provider, base_url, model, api_key) after applying ``override``."""
+    settings = get_settings()
+    provider = (override.provider if override and override.provider else settings.llm_provider) or ""
+    if override and override.api_key:
+        api_key = override.api_key
+    else:
+        api_key = settings.openai_api_key or settings.deepseek_api_key or settings.qwen_api_key
+    base_url = override.base_url if override and override.base_url else settings.llm_base_url
+    return provider.lower(), base_url or "https://api.openai.com", _resolve_model(override), api_key
 
 
+@instrument("llm_call")
 def _call_openai_compatible_api(
     prompt: str,
     override: Optional[LLMConfigOverride] = None,
+    system_prompt: str = "You are a helpful support agent.",
 ) -> str:
     """Call an OpenAI-compatible chat completion endpoint.
 
+    ``system_prompt`` is sent first and kept static so providers can cache it.
     If configuration is missing or the request fails, a descriptive exception is raised.
     """
-    settings = get_settings()
-    provider = (override.provider if override and override.provider else settings.llm_provider) or ""
-    provider = provider.lower()
+    provider, base_url, model, api_key = _resolve_endpoint(override)
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": prompt},
+    ]
+    if get_settings().llm_endpoints and not _overrides_endpoint(override):
+        # LLM_ENDPOINTS carries its own URLs and keys for every endpoint.
+        return get_provider_pool().complete(messages, model)
 
     if not provider:
         raise ValueError(
@@ -140,55 +111,150 @@ def _call_openai_compatible_api(
     if provider not in {"openai", "deepseek", "qwen"}:
         raise ValueError(f"Unsupported LLM provider '{provider}'.")
 
-    api_key = None
-    if override and override.api_key:
-        api_key = override.api_key
-    else:
-        api_key = (
-            settings.openai_api_key
-            or settings.deepseek_api_key
-            or settings.qwen_api_key
-        )
     if not api_key:
         raise ValueError(
             f"API key not configured for LLM provider '{provider}'. "
             "Set the appropriate *_API_KEY in backend/.env or pass api_key in the override."
         )
 
-    base_url = override.base_url if override and override.base_url else settings.llm_base_url
-    if not base_url:
-        base_url = "https://api.openai.com"
-    model = override.model if override and override.model else settings.llm_model
-    if not model:
-        model = "gpt-3.5-turbo"
+    if _overrides_endpoint(override):
+        # Per-request endpoint override (frontend demos): a one-off pool, kept out of the shared stats
+        pool = ProviderPool([Endpoint(name="override", base_url=base_url, api_key=api_key)], hedge=False)
+    else:
+        pool = get_provider_pool()
+    return pool.complete(messages, model)
+
+
+def _overrides_endpoint(override: Optional[LLMConfigOverride]) -> bool:
+    return bool(override and (override.base_url or override.api_key))
+
+
+LLM_CALLS = REGISTRY.counter(
+    "astratickets_llm_requests_total",
+    "LLM completions by how they were served: upstream, coalesced (shared an in-flight call), cached, "
+    "or fallback (KB snippets while the circuit breaker is open).",
+    ["outcome"],
+)
+
+_inflight: SingleFlight[tuple, str] = SingleFlight()
+_results: TTLCache[tuple, str] = TTLCache(
+    maxsize=get_settings().llm_cache_max_entries, ttl=get_settings().llm_cache_ttl_seconds
+)
+register_cache("llm_result", _results)
+
+
+def _build_breaker() -> Optional[CircuitBreaker]:
+    settings = get_settings()
+    if not settings.llm_breaker_enabled:
+        return None
+    return CircuitBreaker(
+        failure_ratio=settings.llm_breaker_failure_ratio,
+        min_calls=settings.llm_breaker_min_calls,
+        window_seconds=settings.llm_breaker_window_seconds,
+        slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+        open_seconds=settings.llm_breaker_open_seconds,
+    )
+
+
+# Guards the backend-configured provider; per-request endpoint overrides bypass it
+_breaker = _build_breaker()
+if _breaker is not None:
+    CIRCUIT_STATE.set_function(lambda: STATE_VALUES[_breaker.state])
+
+
+def circuit_state() -> str:
+    return _breaker.state if _breaker is not None else "disabled"
 
+
+def _request_key(prompt: str, override: Optional[LLMConfigOverride], system_prompt: str) -> tuple:
+    provider, base_url, model, api_key = _resolve_endpoint(override)
+    key_hash = hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+    prompt_hash = hashlib.sha256(f"{system_prompt}\0{prompt}".encode()).hexdigest()
+    return (provider, base_url, model, key_hash, prompt_hash)
+
+
+def complete(
+    prompt: str,
+    override: Optional[LLMConfigOverride] = None,
+    system_prompt: str = "You are a helpful support agent.",
+) -> str:
+    """``_call_openai_compatible_api`` with request coalescing and a short result cache.
+
+    Identical requests (same provider, endpoint, model, API key and prompt)
+    that arrive while one is in flight share its upstream call, and a result
+    is reused for ``LLM_CACHE_TTL_SECONDS`` afterwards. Failures are shared
+    with concurrent waiters but never cached. Only the call that goes upstream
+    takes an admission slot (see ``app.ai.admission``); it raises
+    ``AdmissionRejected`` when the caller's traffic class is saturated, and
+    ``CircuitOpenError`` without calling out while the provider's circuit
+    breaker is open.
+    """
+    settings = get_settings()
+    key = _request_key(prompt, override, system_prompt)
+    cached = _results.get(key)
+    if cached is not None:
+        LLM_CALLS.inc(outcome="cached")
+        return cached
+
+    def upstream() -> str:
+        with get_admission_controller().slot():
+            return _call_openai_compatible_api(prompt, override=override, system_prompt=system_prompt)
+
+    def call() -> str:
+        breaker = None if _overrides_endpoint(override) else _breaker
+        if breaker is None:
+            return upstream()
+        breaker.before_call()
+        started = time.monotonic()
+        try:
+            answer = upstream()
+        except (AdmissionRejected, ValueError):
+            # Shed locally or misconfigured: says nothing about the provider's health
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(time.monotonic() - started, error=True)
+            raise
+        breaker.record(time.monotonic() - started, error=False)
+        return answer
+
+    if not settings.llm_coalesce_requests:
+        LLM_CALLS.inc(outcome="upstream")
+        return call()
+
+    def store(answer: str) -> None:
+        if settings.llm_cache_ttl_seconds > 0:
+            _results.set(key, answer)
+
+    answer, shared = _inflight.do(key, call, on_done=store)
+    LLM_CALLS.inc(outcome="coalesced" if shared else "upstream")
+    return answer
+
+
+def fallback_answer(kb_snippets: Sequence[str], max_snippets: int = 3, max_chars: int = 400) -> str:
+    """Degraded answer made of the top KB snippets, used while the LLM circuit is open."""
+    lines = [
+        "Our AI assistant is temporarily unavailable. "
+        "These knowledge base articles may help in the meantime:",
+    ]
+    for snippet in kb_snippets[:max_snippets]:
+        text = " ".join(snippet.split())
+        if len(text) > max_chars:
+            text = text[: max_chars - 3].rstrip() + "..."
+        lines.append(f"- {text}")
+    return "\n".join(lines)
+
+
+def _complete_or_fallback(
+    prompt: BuiltPrompt, kb_snippets: Sequence[str], override: Optional[LLMConfigOverride]
+) -> str:
     try:
-        with httpx.Client(base_url=base_url, timeout=10.0) as client:
-            response = client.post(
-                "/v1/chat/completions",
-                json={
-                    "model": model,
-                    "messages": [
-                        {"role": "system", "content": "You are a helpful support agent."},
-                        {"role": "user", "content": prompt},
-                    ],
-                    "temperature": 0.3,
-                },
-                headers={"Authorization": f"Bearer {api_key}"},
-            )
-        response.raise_for_status()
-    except Exception as exc:  # pragma: no cover - network / provider specific
-        raise RuntimeError(f"LLM request failed: {exc}") from exc
-
-    data = response.json()
-    choices = data.get("choices") or []
-    if not choices:
-        raise RuntimeError("LLM returned no choices in response.")
-    message = choices[0].get("message") or {}
-    content = message.get("content")
-    if not isinstance(content, str) or not content.strip():
-        raise RuntimeError("LLM returned empty content.")
-    return content.strip()
+        return complete(prompt.user, override=override, system_prompt=prompt.system)
+    except CircuitOpenError:
+        if not (get_settings().llm_breaker_fallback and kb_snippets):
+            raise
+        LLM_CALLS.inc(outcome="fallback")
+        return fallback_answer(kb_snippets)
 
 
 def generate_reply(
@@ -200,10 +266,11 @@ def generate_reply(
 ) -> str:
     """Generate a draft reply using the configured LLM.
 
-    If the LLM call fails or is misconfigured, an exception is raised.
+    If the LLM call fails or is misconfigured, an exception is raised. While
+    the circuit breaker is open the reply is built from ``kb_snippets``.
     """
-    prompt = _build_prompt(ticket, category, kb_snippets, history)
-    return _call_openai_compatible_api(prompt, override=override)
+    prompt = _build_prompt(ticket, category, kb_snippets, history, model=_resolve_model(override))
+    return _complete_or_fallback(prompt, kb_snippets, override)
 
 
 
@@ -212,10 +279,15 @@ def generate_chat_answer(
     kb_snippets: List[str],
     history: Sequence[Tuple[str, str]],
     override: Optional[LLMConfigOverride] = None,
+    summary: Optional[str] = None,
 ) -> str:
     """Generate an answer for a free-form query using RAG and optional history.
 
-    If the LLM call fails or is misconfigured, an exception is raised.
+    ``summary`` is the rolling summary of turns older than ``history``.
+    If the LLM call fails or is misconfigured, an exception is raised. While
+    the circuit breaker is open the answer is built from ``kb_snippets``.
     """
-    prompt = _build_chat_prompt(query, kb_snippets, history)
-    return _call_openai_compatible_api(prompt, override=override)
+    prompt = _build_chat_prompt(
+        query, kb_snippets, history, summary=summary, model=_resolve_model(override)
+    )
+    return _complete_or_fallback(prompt, kb_snippets, override)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+"""Precomputed ticket suggestions.
+
+With ``AI_PRECOMPUTE_SUGGESTIONS`` on, creating a ticket, posting a ticket
+message or editing a ticket's title/content queues an ``ai.suggest`` job.
+Every stored suggestion carries a version: a hash of what it was generated
+from (title, content, the ids of the ticket's messages) and how (KB
+collection(s), n_results, LLM provider/base URL/model).
+``/api/ai/tickets/{id}/suggest`` serves the newest stored suggestion whose
+version matches the current ticket and request. A new message changes the
+version, so older suggestions stop matching and are never served stale.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.ai.llm import LLMConfigOverride
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+from app.db.models import Job, Ticket, TicketSuggestion, utcnow
+from app.jobs.queue import enqueue
+
+
+PRECOMPUTED_LOOKUPS = REGISTRY.counter(
+    "astratickets_ai_precomputed_lookups_total",
+    "Interactive suggestion requests by whether a fresh precomputed suggestion was served.",
+    ["outcome"],
+)
+
+
+def suggestion_version(
+    ticket: Ticket,
+    collection: str = "kb_main",
+    n_results: int = 3,
+    collections: Optional[Sequence[str]] = None,
+    override: Optional[LLMConfigOverride] = None,
+) -> str:
+    """Hash of a ticket's suggestion inputs; changes whenever a new message arrives."""
+    override = override or LLMConfigOverride()
+    parts = {
+        "title": ticket.title,
+        "content": ticket.content,
+        # Messages are append-only, so their ids identify the history
+        "messages": sorted(m.id for m in ticket.messages),
+        "collection": None if collections else collection,
+        "collections": list(collections) if collections else None,
+        "n_results": n_results,
+        "llm": [override.provider, override.base_url, override.model],
+    }
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def find_fresh_suggestion(session: Session, ticket_id: int, version: str) -> Optional[TicketSuggestion]:
+    """Newest successful suggestion for ``version`` younger than the configured max age."""
+    cutoff = utcnow() - timedelta(seconds=get_settings().ai_precompute_max_age_seconds)
+    stmt = (
+        select(TicketSuggestion)
+        .where(
+            TicketSuggestion.ticket_id == ticket_id,
+            TicketSuggestion.version == version,
+            TicketSuggestion.error.is_(None),
+            TicketSuggestion.created_at >= cutoff,
+        )
+        .order_by(TicketSuggestion.id.desc())
+        .limit(1)
+    )
+    return session.execute(stmt).scalars().first()
+
+
+def enqueue_precompute(session: Session, ticket_id: int) -> Optional[Job]:
+    """Queue a background suggestion for ``ticket_id`` if precomputation is enabled.
+
+    The short delay lets a burst of messages settle; jobs that find a fresh
+    suggestion for the ticket's current version when they run do nothing.
+    """
+    settings = get_settings()
+    if not settings.ai_precompute_suggestions:
+        return None
+    return enqueue(
+        session,
+        "ai.suggest",
+        {"ticket_id": ticket_id, "precompute": True},
+        delay_seconds=settings.ai_precompute_delay_seconds,
+    )
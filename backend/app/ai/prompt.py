@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+"""Token-budgeted prompt assembly for the LLM helpers.
+
+Static instructions live in system prompts that are byte-identical on every
+call, so providers with prefix caching can reuse them. The per-request user
+message is filled in priority order until the model's budget is spent:
+
+1. the question (or ticket) itself
+2. KB snippets in retrieval order
+3. conversation history, newest first, then the rolling summary
+
+Anything that does not fit is truncated at a sentence boundary or dropped.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from app.ai.tokens import Tokenizer, context_window, get_tokenizer
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY, instrument
+
+
+logger = logging.getLogger(__name__)
+
+CHAT_SYSTEM_PROMPT = "\n".join(
+    [
+        "You are an expert customer support assistant.",
+        "Your task is to answer the user's question based on the provided context.",
+        "---",
+        "INSTRUCTIONS:",
+        "1. First, analyze the [User Question] and the [Knowledge Base Snippets].",
+        "2. Determine if the snippets are relevant to the user's question.",
+        "3. IF the snippets are relevant:",
+        "   - Your answer MUST be based exclusively on the information in the snippets.",
+        "   - For each piece of information you use, you MUST cite the source using the format `[Source X]`, where X is the snippet number.",
+        "   - If the snippets do not contain enough information, state what you can answer and clarify that other information is not available in the knowledge base.",
+        "4. IF the snippets are NOT relevant:",
+        "   - State that the knowledge base does not contain relevant information.",
+        "   - Then, provide a helpful answer based on your own general knowledge.",
+        "   - DO NOT cite any sources in this case.",
+        "5. Always reply in the same language as the [User Question].",
+        "---",
+        "EXAMPLE:",
+        "[User Question]: How do I reset my password if the link expired?",
+        "[Knowledge Base Snippets]:",
+        "Snippet 1: To reset your password, go to the login page and click 'Forgot Password'.",
+        "Snippet 2: Password reset links are valid for 24 hours. If a link expires, you must request a new one by repeating the 'Forgot Password' process.",
+        "",
+        "[Your Answer]:",
+        "If your password reset link has expired, you need to request a new one [Source 2]. To do this, please go to the login page and click the 'Forgot Password' link again [Source 1].",
+    ]
+)
+
+TICKET_SYSTEM_PROMPT = "\n".join(
+    [
+        "You are a helpful support agent.",
+        "Draft a concise, polite reply to the user issue.",
+        "Use the knowledge base snippets when they are relevant.",
+        "Reply in the same language as the ticket content.",
+    ]
+)
+
+# Tokens kept free for the model's answer when deriving a budget from the context window.
+_ANSWER_RESERVE_TOKENS = 1024
+_SENTENCE_RE = re.compile(r"[^.!?。！？\n]+(?:[.!?。！？]+|\n|$)")
+_ELLIPSIS = "…"
+
+
+@dataclass
+class PromptStats:
+    """Final token accounting for one assembled prompt."""
+
+    model: str | None
+    budget: int
+    system_tokens: int
+    question_tokens: int
+    snippet_tokens: int
+    history_tokens: int
+    user_tokens: int
+    snippets_used: int
+    snippets_dropped: int
+    history_turns_used: int
+    history_turns_dropped: int
+
+    @property
+    def total_tokens(self) -> int:
+        return self.system_tokens + self.user_tokens
+
+
+@dataclass
+class BuiltPrompt:
+    system: str
+    user: str
+    stats: PromptStats
+
+
+PROMPT_TOKENS = REGISTRY.histogram(
+    "astratickets_prompt_tokens",
+    "Tokens per assembled prompt, by section.",
+    ["section"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+PROMPT_ITEMS_DROPPED = REGISTRY.counter(
+    "astratickets_prompt_items_dropped_total",
+    "KB snippets and history turns left out of prompts to fit the budget.",
+    ["kind"],
+)
+
+
+def _record_stats(stats: PromptStats) -> None:
+    for section, tokens in (
+        ("system", stats.system_tokens),
+        ("question", stats.question_tokens),
+        ("snippets", stats.snippet_tokens),
+        ("history", stats.history_tokens),
+        ("total", stats.total_tokens),
+    ):
+        PROMPT_TOKENS.observe(tokens, section=section)
+    if stats.snippets_dropped:
+        PROMPT_ITEMS_DROPPED.inc(stats.snippets_dropped, kind="snippet")
+    if stats.history_turns_dropped:
+        PROMPT_ITEMS_DROPPED.inc(stats.history_turns_dropped, kind="history_turn")
+
+
+def prompt_budget(model: Optional[str]) -> int:
+    """Token budget for the user message of ``model``."""
+    configured = get_settings().llm_prompt_token_budget
+    derived = max(256, context_window(model) - _ANSWER_RESERVE_TOKENS)
+    return min(configured, derived) if configured else derived
+
+
+def truncate_to_tokens(text: str, max_tokens: int, tokenizer: Tokenizer) -> str:
+    """Cut ``text`` to ``max_tokens``, preferring sentence boundaries."""
+    if max_tokens <= 0:
+        return ""
+    if tokenizer.count(text) <= max_tokens:
+        return text
+
+    kept = ""
+    for match in _SENTENCE_RE.finditer(text):
+        candidate = kept + match.group(0)
+        if tokenizer.count(candidate.rstrip() + _ELLIPSIS) > max_tokens:
+            break
+        kept = candidate
+    if kept.strip():
+        return kept.rstrip() + _ELLIPSIS
+
+    # A single sentence longer than the budget: cut by characters.
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if tokenizer.count(text[:mid] + _ELLIPSIS) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + _ELLIPSIS if lo else ""
+
+
+class PromptBuilder:
+    """Fills a per-model token budget in priority order."""
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        budget: Optional[int] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> None:
+        self.model = model
+        self.tokenizer = tokenizer or get_tokenizer(model)
+        self.budget = budget if budget is not None else prompt_budget(model)
+
+    def _count(self, text: str) -> int:
+        return self.tokenizer.count(text)
+
+    def _fill_snippets(
+        self, snippets: Sequence[str], remaining: int, fmt: str
+    ) -> Tuple[List[str], int]:
+        lines: List[str] = []
+        used = 0
+        for idx, snippet in enumerate(snippets, start=1):
+            prefix = fmt.format(idx=idx)
+            room = remaining - used - self._count(prefix) - 1
+            if room <= 0:
+                break
+            text = truncate_to_tokens(snippet, room, self.tokenizer)
+            if not text:
+                break
+            line = prefix + text
+            lines.append(line)
+            used += self._count(line) + 1
+        return lines, used
+
+    def _fill_history(
+        self, history: Sequence[Tuple[str, str]], remaining: int, label
+    ) -> Tuple[List[str], int]:
+        lines: List[str] = []
+        used = 0
+        for role, content in reversed(history):
+            line = f"{label(role)}: {content}"
+            cost = self._count(line) + 1
+            if used + cost > remaining:
+                break
+            lines.append(line)
+            used += cost
+        lines.reverse()
+        return lines, used
+
+    def _finish(
+        self,
+        system: str,
+        sections: List[str],
+        question_tokens: int,
+        snippet_tokens: int,
+        history_tokens: int,
+        snippets_used: int,
+        snippets_total: int,
+        turns_used: int,
+        turns_total: int,
+    ) -> BuiltPrompt:
+        user = "\n".join(sections)
+        stats = PromptStats(
+            model=self.model,
+            budget=self.budget,
+            system_tokens=self._count(system),
+            question_tokens=question_tokens,
+            snippet_tokens=snippet_tokens,
+            history_tokens=history_tokens,
+            user_tokens=self._count(user),
+            snippets_used=snippets_used,
+            snippets_dropped=snippets_total - snippets_used,
+            history_turns_used=turns_used,
+            history_turns_dropped=turns_total - turns_used,
+        )
+        _record_stats(stats)
+        logger.debug("prompt built: %s", stats)
+        return BuiltPrompt(system=system, user=user, stats=stats)
+
+    @instrument("prompt_build")
+    def build_chat(
+        self,
+        query: str,
+        kb_snippets: Sequence[str],
+        history: Sequence[Tuple[str, str]],
+        summary: Optional[str] = None,
+    ) -> BuiltPrompt:
+        question = truncate_to_tokens(query, self.budget, self.tokenizer)
+        question_block = f"USER QUESTION:\n{question}"
+        question_tokens = self._count(question_block)
+        remaining = self.budget - question_tokens
+
+        snippet_lines, snippet_tokens = self._fill_snippets(
+            kb_snippets, remaining - 8, "Snippet {idx}: "
+        )
+        remaining -= snippet_tokens + (8 if snippet_lines else 0)
+
+        history_lines, history_tokens = self._fill_history(
+            history, remaining - 8, lambda role: "- User" if role == "user" else "- Assistant"
+        )
+        remaining -= history_tokens + (8 if history_lines else 0)
+
+        summary_text = ""
+        if summary and remaining > 16:
+            summary_text = truncate_to_tokens(summary, remaining - 16, self.tokenizer)
+            history_tokens += self._count(summary_text)
+
+        sections: List[str] = []
+        if summary_text:
+            sections += ["EARLIER CONVERSATION SUMMARY:", summary_text, "---"]
+        if history_lines:
+            sections += ["CONVERSATION HISTORY:", *history_lines, "---"]
+        if snippet_lines:
+            sections += ["KNOWLEDGE BASE SNIPPETS:", *snippet_lines, "---"]
+        sections.append(question_block)
+        return self._finish(
+            CHAT_SYSTEM_PROMPT,
+            sections,
+            question_tokens,
+            snippet_tokens,
+            history_tokens,
+            len(snippet_lines),
+            len(kb_snippets),
+            len(history_lines),
+            len(history),
+        )
+
+    @instrument("prompt_build")
+    def build_ticket(
+        self,
+        title: str,
+        content: str,
+        category: str,
+        kb_snippets: Sequence[str],
+        history: Sequence[Tuple[str, str]] = (),
+    ) -> BuiltPrompt:
+        header = [
+            f"Ticket title: {title}",
+            f"Ticket content: {content}",
+            f"Predicted category: {category}",
+        ]
+        question_tokens = self._count("\n".join(header))
+        if question_tokens > self.budget:
+            header[1] = "Ticket content: " + truncate_to_tokens(
+                content, self.budget - self._count(header[0] + header[2]) - 8, self.tokenizer
+            )
+            question_tokens = self._count("\n".join(header))
+        remaining = self.budget - question_tokens
+
+        snippet_lines, snippet_tokens = self._fill_snippets(
+            kb_snippets, remaining - 10, "{idx}. "
+        )
+        remaining -= snippet_tokens + (10 if snippet_lines else 0)
+
+        history_lines, history_tokens = self._fill_history(
+            history, remaining - 8, lambda sender: sender
+        )
+
+        sections = list(header)
+        if history_lines:
+            sections += ["", "Conversation History:", *history_lines]
+        if snippet_lines:
+            sections += ["", "Relevant knowledge base snippets:", *snippet_lines]
+        return self._finish(
+            TICKET_SYSTEM_PROMPT,
+            sections,
+            question_tokens,
+            snippet_tokens,
+            history_tokens,
+            len(snippet_lines),
+            len(kb_snippets),
+            len(history_lines),
+            len(history),
+        )
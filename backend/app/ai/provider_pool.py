@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+"""Pool of OpenAI-compatible endpoints with latency-aware routing.
+
+Configured with ``LLM_ENDPOINTS`` (JSON list)::
+
+    [{"name": "primary", "base_url": "https://api.deepseek.com", "api_key": "sk-...", "weight": 3},
+     {"name": "backup", "base_url": "https://api.openai.com", "api_key": "sk-...", "model": "gpt-4o-mini"}]
+
+Without it the pool holds a single endpoint built from ``LLM_BASE_URL`` and
+the provider API key, so behaviour matches the original one-endpoint client.
+
+Per request:
+
+- endpoints are ranked by EWMA latency divided by weight; endpoints cooling
+  down after a 429/5xx go last
+- if the first endpoint has not answered after its observed p95 latency, a
+  hedged request goes to the next one; the first answer wins and the other
+  request is cancelled
+- 5xx, 429, timeouts and connection errors fail over to the next endpoint;
+  other 4xx responses are raised immediately
+
+Requests run on one event loop thread shared by every pool in the process,
+through a long-lived ``httpx.AsyncClient``, so connections (and TLS
+sessions) are reused across calls; ``shutdown()`` closes it.
+
+``snapshot()`` returns per-endpoint health for ``GET /api/ai/providers``.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Deque, Dict, List, Optional, Sequence, TypeVar
+
+import httpx
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+
+
+ENDPOINT_REQUESTS = REGISTRY.counter(
+    "astratickets_llm_endpoint_requests_total",
+    "Upstream LLM attempts per endpoint and outcome (ok, error, rate_limited, timeout, cancelled).",
+    ["endpoint", "outcome"],
+)
+HEDGED_REQUESTS = REGISTRY.counter(
+    "astratickets_llm_hedged_requests_total",
+    "Hedged second requests sent after the p95 delay, by whether the hedge won.",
+    ["result"],
+)
+
+T = TypeVar("T")
+
+_EWMA_ALPHA = 0.2
+_WINDOW = 200
+_MIN_SAMPLES_FOR_P95 = 20
+
+
+class EndpointError(RuntimeError):
+    """Upstream failure; ``retryable`` failures fail over to the next endpoint."""
+
+    def __init__(self, endpoint: str, message: str, retryable: bool, retry_after: Optional[float] = None):
+        super().__init__(f"{endpoint}: {message}")
+        self.endpoint = endpoint
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+@dataclass
+class Endpoint:
+    name: str
+    base_url: str
+    api_key: str
+    model: Optional[str] = None
+    weight: float = 1.0
+
+
+@dataclass
+class EndpointStats:
+    ewma_latency: Optional[float] = None
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=_WINDOW))
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    rate_limited: int = 0
+    consecutive_failures: int = 0
+    in_flight: int = 0
+    hedges_won: int = 0
+    cooldown_until: float = 0.0
+    last_error: Optional[str] = None
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < _MIN_SAMPLES_FOR_P95:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+def parse_completion(data: Dict[str, Any]) -> str:
+    choices = data.get("choices") or []
+    if not choices:
+        raise RuntimeError("LLM returned no choices in response.")
+    message = choices[0].get("message") or {}
+    content = message.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise RuntimeError("LLM returned empty content.")
+    return content.strip()
+
+
+class _LoopThread:
+    """An event loop on a daemon thread; blocking callers submit coroutines to it."""
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-http-loop", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def run(self, coro: Awaitable[T]) -> T:
+        loop = self._get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("Blocking LLM call made from the LLM HTTP loop itself")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()  # type: ignore[arg-type]
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and thread is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+
+_LOOP = _LoopThread()
+_shared_client: Optional[httpx.AsyncClient] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _get_shared_client() -> httpx.AsyncClient:
+    global _shared_client
+    with _CLIENT_LOCK:
+        if _shared_client is None:
+            _shared_client = httpx.AsyncClient()
+        return _shared_client
+
+
+class ProviderPool:
+    """Routes chat completions across endpoints; safe to share between threads."""
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        timeout: Optional[float] = None,
+        hedge: Optional[bool] = None,
+        hedge_delay: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        if not endpoints:
+            raise ValueError("ProviderPool needs at least one endpoint")
+        settings = get_settings()
+        self.endpoints = list(endpoints)
+        self.timeout = timeout if timeout is not None else settings.llm_request_timeout_seconds
+        self.hedge = hedge if hedge is not None else settings.llm_hedge_requests
+        # Used until an endpoint has enough samples for its own p95
+        self.default_hedge_delay = (
+            hedge_delay if hedge_delay is not None else settings.llm_hedge_delay_ms / 1000.0
+        )
+        self.transport = transport
+        # Only pools with a custom transport (tests) own a client; the rest share one
+        self._own_client: Optional[httpx.AsyncClient] = None
+        self._stats: Dict[str, EndpointStats] = {e.name: EndpointStats() for e in self.endpoints}
+        self._lock = threading.Lock()
+
+    # -- ranking -----------------------------------------------------------
+
+    def ranked(self) -> List[Endpoint]:
+        now = time.monotonic()
+
+        def score(endpoint: Endpoint) -> tuple:
+            stats = self._stats[endpoint.name]
+            cooling = stats.cooldown_until > now
+            # Unmeasured endpoints score 0 so each gets tried early.
+            latency = stats.ewma_latency or 0.0
+            return (cooling, latency / max(endpoint.weight, 1e-6), random.random())
+
+        with self._lock:
+            return sorted(self.endpoints, key=score)
+
+    def hedge_delay(self, endpoint: Endpoint) -> float:
+        settings = get_settings()
+        with self._lock:
+            p95 = self._stats[endpoint.name].p95()
+        delay = p95 if p95 is not None else self.default_hedge_delay
+        return max(delay, settings.llm_hedge_min_delay_ms / 1000.0)
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def _started(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            stats = self._stats[endpoint.name]
+            stats.requests += 1
+            stats.in_flight += 1
+
+    def _finished(self, endpoint: Endpoint, outcome: str, latency: Optional[float] = None,
+                  error: Optional[EndpointError] = None) -> None:
+        ENDPOINT_REQUESTS.inc(endpoint=endpoint.name, outcome=outcome)
+        with self._lock:
+            stats = self._stats[endpoint.name]
+            stats.in_flight -= 1
+            if outcome == "ok" and latency is not None:
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                stats.latencies.append(latency)
+                stats.ewma_latency = (
+                    latency
+                    if stats.ewma_latency is None
+                    else _EWMA_ALPHA * latency + (1 - _EWMA_ALPHA) * stats.ewma_latency
+                )
+            elif outcome == "cancelled":
+                # A cancelled loser took longer than ``latency`` by an unknown amount.
+                # Count it as twice that, so an endpoint that keeps losing races
+                # stops ranking first (it would otherwise stay "unmeasured").
+                if latency is not None:
+                    censored = 2 * latency
+                    stats.ewma_latency = (
+                        censored
+                        if stats.ewma_latency is None
+                        else _EWMA_ALPHA * censored + (1 - _EWMA_ALPHA) * stats.ewma_latency
+                    )
+            else:
+                stats.failures += 1
+                stats.consecutive_failures += 1
+                stats.last_error = str(error) if error else outcome
+                if outcome == "rate_limited":
+                    stats.rate_limited += 1
+                if error is not None and error.retryable:
+                    backoff = error.retry_after or min(30.0, 0.5 * 2 ** stats.consecutive_failures)
+                    stats.cooldown_until = time.monotonic() + backoff
+
+    # -- requests ----------------------------------------------------------
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.transport is None:
+            return _get_shared_client()
+        with self._lock:
+            if self._own_client is None:
+                self._own_client = httpx.AsyncClient(transport=self.transport)
+            return self._own_client
+
+    def close(self) -> None:
+        """Close this pool's own client, if it has one."""
+        with self._lock:
+            client, self._own_client = self._own_client, None
+        if client is not None:
+            _LOOP.run(client.aclose())
+
+    async def _attempt(self, client: httpx.AsyncClient, endpoint: Endpoint, payload: Dict[str, Any],
+                       default_model: str) -> str:
+        body = {**payload, "model": endpoint.model or default_model}
+        self._started(endpoint)
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                f"{endpoint.base_url.rstrip('/')}/v1/chat/completions",
+                json=body,
+                headers={"Authorization": f"Bearer {endpoint.api_key}"},
+                timeout=self.timeout,
+            )
+        except asyncio.CancelledError:
+            self._finished(endpoint, "cancelled", latency=time.perf_counter() - started)
+            raise
+        except httpx.TimeoutException as exc:
+            error = EndpointError(endpoint.name, f"timeout: {exc!r}", retryable=True)
+            self._finished(endpoint, "timeout", error=error)
+            raise error from exc
+        except httpx.HTTPError as exc:
+            error = EndpointError(endpoint.name, f"request failed: {exc!r}", retryable=True)
+            self._finished(endpoint, "error", error=error)
+            raise error from exc
+
+        status = response.status_code
+        if status == 429 or status >= 500:
+            retry_after = None
+            try:
+                retry_after = float(response.headers.get("retry-after", ""))
+            except ValueError:
+                pass
+            error = EndpointError(endpoint.name, f"HTTP {status}", retryable=True, retry_after=retry_after)
+            self._finished(endpoint, "rate_limited" if status == 429 else "error", error=error)
+            raise error
+        if status >= 400:
+            error = EndpointError(endpoint.name, f"HTTP {status}: {response.text[:200]}", retryable=False)
+            self._finished(endpoint, "error", error=error)
+            raise error
+        try:
+            content = parse_completion(response.json())
+        except Exception as exc:
+            error = EndpointError(endpoint.name, str(exc), retryable=True)
+            self._finished(endpoint, "error", error=error)
+            raise error from exc
+        self._finished(endpoint, "ok", latency=time.perf_counter() - started)
+        return content
+
+    async def _race(self, payload: Dict[str, Any], default_model: str) -> str:
+        candidates = self.ranked()
+        errors: List[str] = []
+        client = self._client()
+        tasks: Dict[asyncio.Task, Endpoint] = {}
+
+        def launch() -> None:
+            endpoint = candidates.pop(0)
+            tasks[asyncio.create_task(self._attempt(client, endpoint, payload, default_model))] = endpoint
+
+        launch()
+        hedged: Optional[asyncio.Task] = None
+        try:
+            while tasks:
+                timeout = None
+                if self.hedge and hedged is None and candidates and len(tasks) == 1:
+                    timeout = self.hedge_delay(tasks[next(iter(tasks))])
+                done, _pending = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch()
+                    hedged = list(tasks)[-1]
+                    continue
+                for task in done:
+                    endpoint = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except EndpointError as exc:
+                        errors.append(str(exc))
+                        if not exc.retryable:
+                            raise RuntimeError(f"LLM request failed: {exc}") from exc
+                        if candidates and not tasks:
+                            launch()  # fail over
+                        continue
+                    if hedged is not None:
+                        won = task is hedged
+                        HEDGED_REQUESTS.inc(result="won" if won else "lost")
+                        if won:
+                            with self._lock:
+                                self._stats[endpoint.name].hedges_won += 1
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        raise RuntimeError("LLM request failed on all endpoints: " + "; ".join(errors))
+
+    def complete(self, messages: List[Dict[str, str]], model: str, temperature: float = 0.3) -> str:
+        """Blocking chat completion; runs the race on the shared HTTP loop thread."""
+        payload = {"messages": messages, "temperature": temperature}
+        return _LOOP.run(self._race(payload, model))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        rows = []
+        with self._lock:
+            for endpoint in self.endpoints:
+                stats = self._stats[endpoint.name]
+                p95 = stats.p95()
+                rows.append(
+                    {
+                        "name": endpoint.name,
+                        "base_url": endpoint.base_url,
+                        "model": endpoint.model,
+                        "weight": endpoint.weight,
+                        "healthy": stats.cooldown_until <= now,
+                        "cooldown_remaining_s": round(max(0.0, stats.cooldown_until - now), 2),
+                        "ewma_latency_ms": round(stats.ewma_latency * 1000, 1) if stats.ewma_latency else None,
+                        "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                        "requests": stats.requests,
+                        "successes": stats.successes,
+                        "failures": stats.failures,
+                        "rate_limited": stats.rate_limited,
+                        "hedges_won": stats.hedges_won,
+                        "in_flight": stats.in_flight,
+                        "last_error": stats.last_error,
+                    }
+                )
+        return rows
+
+
+_POOL: Optional[ProviderPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def endpoints_from_settings() -> List[Endpoint]:
+    settings = get_settings()
+    if settings.llm_endpoints:
+        endpoints = []
+        for idx, raw in enumerate(settings.llm_endpoints):
+            if not raw.get("base_url") or not raw.get("api_key"):
+                raise ValueError(f"LLM_ENDPOINTS[{idx}] needs base_url and api_key")
+            endpoints.append(
+                Endpoint(
+                    name=str(raw.get("name") or f"endpoint-{idx}"),
+                    base_url=raw["base_url"],
+                    api_key=raw["api_key"],
+                    model=raw.get("model"),
+                    weight=float(raw.get("weight", 1.0)),
+                )
+            )
+        return endpoints
+    api_key = settings.openai_api_key or settings.deepseek_api_key or settings.qwen_api_key
+    if not api_key:
+        return []
+    return [Endpoint(name="default", base_url=settings.llm_base_url or "https://api.openai.com", api_key=api_key)]
+
+
+def get_provider_pool() -> Optional[ProviderPool]:
+    """Process-wide pool built from settings, or None when nothing is configured."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            endpoints = endpoints_from_settings()
+            if endpoints:
+                _POOL = ProviderPool(endpoints)
+        return _POOL
+
+
+def reset_provider_pool() -> None:
+    """Drop the cached pool so the next call rebuilds it from settings."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.close()
+
+
+def shutdown() -> None:
+    """Close pooled upstream connections and stop the loop thread (app shutdown)."""
+    global _shared_client
+    with _CLIENT_LOCK:
+        client, _shared_client = _shared_client, None
+    if client is not None:
+        _LOOP.run(client.aclose())
+    _LOOP.stop()
@@ -2,13 +2,28 @@ from __future__ import annotations
 
 """High-level AI helpers for tickets (Lesson 5)."""
 
-from dataclasses import dataclass
-from typing import List, Optional
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 
 from app.ai.classifier import TicketClassificationResult, get_ticket_classifier
 from app.ai.llm import LLMConfigOverride, generate_reply
+from app.core.config import get_settings
 from app.db.models import Ticket, TicketPriority
-from app.rag.store import similarity_search
+from app.rag.store import similarity_search, similarity_search_many
+
+
+logger = logging.getLogger(__name__)
+
+# Runs the independent suggestion stages (classification, retrieval) next to
+# the caller, which builds the history from its own DB session meanwhile
+_stage_pool: ThreadPoolExecutor | None = None
+_stage_pool_lock = threading.Lock()
 
 
 @dataclass
@@ -20,6 +35,17 @@ class TicketAISuggestion:
     suggested_tags: List[str]
     ai_reply: str
     kb_snippets: List[str]
+    # Seconds spent per pipeline stage (classify, retrieve, history, llm)
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
 
 
 def _map_category_to_priority_and_tags(category: str) -> tuple[str, list[str]]:
@@ -33,50 +59,105 @@ def _map_category_to_priority_and_tags(category: str) -> tuple[str, list[str]]:
     return mapping.get(category, (TicketPriority.low.value, ["general"]))
 
 
+def _conversation_history(ticket: Ticket) -> List[tuple[str, str]]:
+    """(speaker, text) pairs from the ticket's messages, oldest first."""
+    history: List[tuple[str, str]] = []
+    for msg in sorted(ticket.messages, key=lambda m: m.created_at):
+        sender_label = "Agent" if msg.sender_type == "agent" else "User"
+        history.append((sender_label, msg.content))
+    return history
+
+
+def _retrieve_snippets(
+    text: str, collection: str, n_results: int, collections: Optional[Sequence[str]]
+) -> List[str]:
+    try:
+        if collections:
+            _ids, docs, _metas, _dists = similarity_search_many(text, collections, n_results=n_results)
+        else:
+            _ids, docs, _metas, _dists = similarity_search(text, n_results=n_results, collection=collection)
+    except Exception:
+        # A broken vector store degrades the draft (no KB context) instead of failing it
+        logger.warning("KB retrieval failed; drafting without snippets", exc_info=True)
+        return []
+    return [d for d in docs if d]
+
+
+def _get_stage_pool() -> ThreadPoolExecutor:
+    global _stage_pool
+    with _stage_pool_lock:
+        if _stage_pool is None:
+            _stage_pool = ThreadPoolExecutor(
+                max_workers=get_settings().ai_suggest_stage_workers, thread_name_prefix="ai-stage"
+            )
+        return _stage_pool
+
+
+def _run_stages(
+    timings: Dict[str, float],
+    pooled: Dict[str, Callable[[], Any]],
+    inline: Dict[str, Callable[[], Any]],
+) -> Dict[str, Any]:
+    """Run independent stages concurrently and return their results by name.
+
+    ``pooled`` stages go to the stage pool; ``inline`` ones run in the calling
+    thread meanwhile (stages that touch the ORM session must, since sessions
+    are not thread-safe). The first exception raised by any stage propagates.
+    """
+
+    def run(stage: str, fn: Callable[[], Any]) -> Any:
+        with _timed(timings, stage):
+            return fn()
+
+    pool = _get_stage_pool()
+    # copy_context keeps per-request stage timings (Server-Timing) and the
+    # admission class attached to worker threads
+    futures = {
+        stage: pool.submit(contextvars.copy_context().run, run, stage, fn) for stage, fn in pooled.items()
+    }
+    results = {stage: run(stage, fn) for stage, fn in inline.items()}
+    for stage, future in futures.items():
+        results[stage] = future.result()
+    return results
+
+
 def generate_ticket_suggestion(
     ticket: Ticket,
     collection: str = "kb_main",
     n_results: int = 3,
     llm_override: Optional[LLMConfigOverride] = None,
+    collections: Optional[Sequence[str]] = None,
 ) -> TicketAISuggestion:
-    """Generate category, priority/tags suggestion and AI draft reply for a ticket."""
+    """Generate category, priority/tags suggestion and AI draft reply for a ticket.
+
+    Classification, KB retrieval and the history build do not depend on each
+    other and run concurrently; the LLM call waits for all three.
+    ``collections`` searches several KB collections at once instead of ``collection``.
+    """
+    timings: Dict[str, float] = {}
     classifier = get_ticket_classifier()
     text = f"{ticket.title}\n\n{ticket.content}"
-    cls_result: TicketClassificationResult = classifier.predict(text)
-
-    try:
-        docs, _metas, _dists = similarity_search(text, n_results=n_results, collection=collection)
-        kb_snippets: list[str] = [d for d in docs if d]
-    except Exception:
-        kb_snippets = []
-
-    # Collect conversation history
-    history: List[tuple[str, str]] = []
-    
-    # Add legacy replies
-    for reply in ticket.replies:
-        # Assuming author_id 1 is admin/agent, others are users? 
-        # Or just use "User" for all legacy replies if we can't distinguish easily without user lookup
-        # But TicketMessage has explicit sender_type.
-        # For simplicity, let's just use "Reply" or try to infer.
-        # Actually, let's focus on the new TicketMessage system which is the "Dialogue Context" feature.
-        pass
-
-    # Add new messages
-    # Sort by created_at
-    sorted_messages = sorted(ticket.messages, key=lambda m: m.created_at)
-    for msg in sorted_messages:
-        sender_label = "Agent" if msg.sender_type == "agent" else "User"
-        history.append((sender_label, msg.content))
+    results = _run_stages(
+        timings,
+        pooled={
+            "classify": lambda: classifier.predict(text),
+            "retrieve": lambda: _retrieve_snippets(text, collection, n_results, collections),
+        },
+        inline={"history": lambda: _conversation_history(ticket)},
+    )
+    cls_result: TicketClassificationResult = results["classify"]
+    kb_snippets: List[str] = results["retrieve"]
+    history: List[tuple[str, str]] = results["history"]
 
     suggested_priority, suggested_tags = _map_category_to_priority_and_tags(cls_result.category)
-    reply_text = generate_reply(
-        ticket, 
-        cls_result.category, 
-        kb_snippets, 
-        override=llm_override,
-        history=history
-    )
+    with _timed(timings, "llm"):
+        reply_text = generate_reply(
+            ticket,
+            cls_result.category,
+            kb_snippets,
+            override=llm_override,
+            history=history,
+        )
 
     return TicketAISuggestion(
         ticket_id=ticket.id,
@@ -86,4 +167,5 @@ def generate_ticket_suggestion(
         suggested_tags=suggested_tags,
         ai_reply=reply_text,
         kb_snippets=kb_snippets,
+        timings=timings,
     )
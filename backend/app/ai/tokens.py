@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+"""Token counting for prompt budgeting.
+
+Primary path:
+    - tiktoken encodings (optional dependency) for OpenAI-style models
+Fallback path:
+    - A cheap character-class estimator that needs no downloads
+
+Other tokenizers can be plugged in per model prefix via ``register_tokenizer``.
+"""
+
+from typing import Callable, Dict, Optional, Protocol
+
+
+class Tokenizer(Protocol):
+    """Anything that can count the tokens of a string."""
+
+    def count(self, text: str) -> int:  # pragma: no cover - interface
+        ...
+
+
+class EstimatingTokenizer:
+    """Heuristic counter: ~4 ASCII characters per token, 1 token per CJK character."""
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+class TiktokenTokenizer:
+    """Exact counts for OpenAI-compatible models via tiktoken."""
+
+    def __init__(self, model: str) -> None:
+        import tiktoken  # type: ignore
+
+        try:
+            self._enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            self._enc = tiktoken.get_encoding("cl100k_base")
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text, disallowed_special=()))
+
+
+# Context window sizes for models we commonly point at; unknown models use the default.
+MODEL_CONTEXT_TOKENS: Dict[str, int] = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "deepseek-chat": 64000,
+    "qwen-turbo": 131072,
+    "qwen-plus": 131072,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+_ESTIMATOR = EstimatingTokenizer()
+_FACTORIES: Dict[str, Callable[[str], Tokenizer]] = {}
+_CACHE: Dict[str, Tokenizer] = {}
+
+
+def register_tokenizer(model_prefix: str, factory: Callable[[str], Tokenizer]) -> None:
+    """Use ``factory(model)`` for every model name starting with ``model_prefix``."""
+    _FACTORIES[model_prefix] = factory
+    _CACHE.clear()
+
+
+def get_tokenizer(model: Optional[str] = None) -> Tokenizer:
+    """Return the best available tokenizer for ``model`` (cached per model)."""
+    key = model or ""
+    cached = _CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    tokenizer: Tokenizer = _ESTIMATOR
+    factory = None
+    for prefix in sorted(_FACTORIES, key=len, reverse=True):
+        if key.startswith(prefix):
+            factory = _FACTORIES[prefix]
+            break
+    try:
+        if factory is not None:
+            tokenizer = factory(key)
+        elif model:
+            tokenizer = TiktokenTokenizer(model)
+    except Exception:  # tiktoken missing or no encoding available offline
+        tokenizer = _ESTIMATOR
+    _CACHE[key] = tokenizer
+    return tokenizer
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    return get_tokenizer(model).count(text)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap estimate that never loads a tokenizer."""
+    return _ESTIMATOR.count(text)
+
+
+def context_window(model: Optional[str]) -> int:
+    if not model:
+        return DEFAULT_CONTEXT_TOKENS
+    for name in sorted(MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_CONTEXT_TOKENS[name]
+    return DEFAULT_CONTEXT_TOKENS
@@ -3,26 +3,52 @@ from __future__ import annotations
 """AI endpoints for Lesson 5.
 
 Currently provides:
-- POST /api/ai/tickets/{ticket_id}/suggest  → classify + draft reply
+- POST /api/ai/tickets/{ticket_id}/suggest  → classify + draft reply (or a fresh precomputed one)
 - POST /api/ai/chat                         → RAG-augmented chat
+- POST /api/ai/batches                      → batch suggestions for a ticket backlog
+- GET  /api/ai/batches/{batch_id}           → batch progress and stage timings
+- POST /api/ai/batches/{batch_id}/cancel    → stop starting new tickets
+- GET  /api/ai/tickets/{ticket_id}/suggestions → stored suggestions
+- POST /api/ai/tickets/{ticket_id}/suggest/jobs → suggestion as a background job
+- GET  /api/ai/providers                    → per-endpoint LLM routing health
 """
 
 from typing import List, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.ai.admission import AdmissionRejected
+from app.ai.batch import (
+    BatchFilters,
+    BatchOptions,
+    cancel_batch,
+    create_batch,
+    enqueue_batch,
+    fail_orphaned_batches,
+)
+from app.ai.breaker import CircuitOpenError
+from app.ai.precompute import PRECOMPUTED_LOOKUPS, find_fresh_suggestion, suggestion_version
 from app.ai.service import generate_ticket_suggestion
 from app.ai.llm import LLMConfigOverride, generate_chat_answer
-from app.db.models import Ticket
+from app.ai.provider_pool import get_provider_pool
+from app.core.config import get_settings
+from app.db.models import Job, SuggestionBatch, Ticket, TicketSuggestion
 from app.db.session import get_session
-from app.rag.store import similarity_search
+from app.jobs.queue import enqueue
+from app.rag.store import similarity_search, similarity_search_many
 from app.schemas.ai import (
     ChatRequest,
     ChatResponse,
+    LLMEndpointHealth,
+    SuggestionBatchCreate,
+    SuggestionBatchRead,
     TicketAISuggestionRequest,
     TicketAISuggestionResponse,
+    TicketSuggestionRead,
 )
+from app.schemas.jobs import JobRead
 
 
 router = APIRouter()
@@ -48,13 +74,39 @@ def suggest_for_ticket(
         model=payload.model,
         api_key=payload.api_key,
     )
+    # api_key overrides are never persisted, so nothing stored can match them
+    if get_settings().ai_precompute_suggestions and payload.use_precomputed and not payload.api_key:
+        version = suggestion_version(
+            ticket,
+            collection=payload.collection,
+            n_results=payload.n_results,
+            collections=payload.collections,
+            override=override,
+        )
+        stored = find_fresh_suggestion(session, ticket.id, version)
+        PRECOMPUTED_LOOKUPS.inc(outcome="hit" if stored else "miss")
+        if stored is not None:
+            return TicketAISuggestionResponse(
+                ticket_id=stored.ticket_id,
+                category=stored.category,
+                confidence=stored.confidence,
+                suggested_priority=stored.suggested_priority,
+                suggested_tags=stored.suggested_tags or [],
+                ai_reply=stored.ai_reply,
+                kb_snippets=stored.kb_snippets or [],
+                timings=stored.timings or {},
+                precomputed=True,
+            )
     try:
         suggestion = generate_ticket_suggestion(
             ticket=ticket,
             collection=payload.collection,
             n_results=payload.n_results,
             llm_override=override,
+            collections=payload.collections,
         )
+    except (AdmissionRejected, CircuitOpenError):
+        raise
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
     return TicketAISuggestionResponse(
@@ -65,9 +117,106 @@ def suggest_for_ticket(
         suggested_tags=suggestion.suggested_tags,
         ai_reply=suggestion.ai_reply,
         kb_snippets=suggestion.kb_snippets,
+        timings=suggestion.timings,
     )
 
 
+@router.post(
+    "/tickets/{ticket_id}/suggest/jobs",
+    response_model=JobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def suggest_for_ticket_in_background(
+    ticket_id: int,
+    payload: TicketAISuggestionRequest,
+    session: Session = Depends(get_session),
+) -> Job:
+    """Queue a suggestion; the result is stored in ticket_suggestions."""
+    if session.get(Ticket, ticket_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    if payload.api_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="api_key overrides are not persisted; background jobs use backend credentials.",
+        )
+    return enqueue(
+        session,
+        "ai.suggest",
+        {"ticket_id": ticket_id, **payload.model_dump(exclude={"api_key", "use_precomputed"})},
+    )
+
+
+@router.get("/tickets/{ticket_id}/suggestions", response_model=List[TicketSuggestionRead])
+def list_ticket_suggestions(
+    ticket_id: int,
+    limit: int = 10,
+    session: Session = Depends(get_session),
+) -> List[TicketSuggestion]:
+    if session.get(Ticket, ticket_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    stmt = (
+        select(TicketSuggestion)
+        .where(TicketSuggestion.ticket_id == ticket_id)
+        .order_by(TicketSuggestion.id.desc())
+        .limit(max(1, min(limit, 100)))
+    )
+    return list(session.scalars(stmt))
+
+
+@router.post(
+    "/batches",
+    response_model=SuggestionBatchRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def start_suggestion_batch(
+    payload: SuggestionBatchCreate,
+    session: Session = Depends(get_session),
+) -> SuggestionBatch:
+    filters = BatchFilters(
+        status=payload.status,
+        priority=payload.priority,
+        ticket_ids=payload.ticket_ids,
+        created_after=payload.created_after,
+        limit=payload.limit,
+        only_missing=payload.only_missing,
+    )
+    options = BatchOptions(
+        collection=payload.collection,
+        n_results=payload.n_results,
+        concurrency=payload.concurrency,
+        requests_per_minute=payload.requests_per_minute,
+    )
+    if payload.api_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="api_key overrides are not persisted; background jobs use backend credentials.",
+        )
+    override = LLMConfigOverride(provider=payload.provider, base_url=payload.base_url, model=payload.model)
+    batch_id, ticket_ids = create_batch(session, filters, options)
+    enqueue_batch(session, batch_id, ticket_ids, override)
+    batch = session.get(SuggestionBatch, batch_id)
+    assert batch is not None
+    return batch
+
+
+@router.get("/batches/{batch_id}", response_model=SuggestionBatchRead)
+def get_suggestion_batch(batch_id: int, session: Session = Depends(get_session)) -> SuggestionBatch:
+    batch = session.get(SuggestionBatch, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    fail_orphaned_batches(session, batch_id)
+    session.refresh(batch)
+    return batch
+
+
+@router.post("/batches/{batch_id}/cancel", response_model=SuggestionBatchRead)
+def cancel_suggestion_batch(batch_id: int, session: Session = Depends(get_session)) -> SuggestionBatch:
+    batch = cancel_batch(session, batch_id)
+    if batch is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found")
+    return batch
+
+
 @router.post(
     "/chat",
     response_model=ChatResponse,
@@ -76,12 +225,20 @@ def suggest_for_ticket(
 def chat_with_kb(payload: ChatRequest) -> ChatResponse:
     """RAG-augmented chat endpoint using the shared knowledge base."""
     try:
-        _ids, docs, metas, _dists = similarity_search(
-            payload.query,
-            n_results=payload.n_results,
-            collection=payload.collection,
-            distance_threshold=payload.distance_threshold,
-        )
+        if payload.collections:
+            _ids, docs, metas, _dists = similarity_search_many(
+                payload.query,
+                payload.collections,
+                n_results=payload.n_results,
+                distance_threshold=payload.distance_threshold,
+            )
+        else:
+            _ids, docs, metas, _dists = similarity_search(
+                payload.query,
+                n_results=payload.n_results,
+                collection=payload.collection,
+                distance_threshold=payload.distance_threshold,
+            )
         kb_snippets: List[str] = [d for d in docs if d]
 
         # Extract unique source titles from metadata
@@ -110,6 +267,8 @@ def chat_with_kb(payload: ChatRequest) -> ChatResponse:
     )
     try:
         answer = generate_chat_answer(payload.query, kb_snippets, history_pairs, override=override)
+    except (AdmissionRejected, CircuitOpenError):
+        raise
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
 
@@ -119,3 +278,12 @@ def chat_with_kb(payload: ChatRequest) -> ChatResponse:
         kb_sources=source_titles,
         kb_snippets=kb_snippets,
     )
+
+
+@router.get("/providers", response_model=List[LLMEndpointHealth])
+def list_llm_providers() -> List[LLMEndpointHealth]:
+    """Latency, error and cooldown stats for each endpoint in the LLM pool."""
+    pool = get_provider_pool()
+    if pool is None:
+        return []
+    return [LLMEndpointHealth(**row) for row in pool.snapshot()]
@@ -1,9 +1,14 @@
+import time
+from dataclasses import dataclass
 from datetime import timedelta
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.core.security import (
@@ -11,11 +16,15 @@ from app.core.security import (
     ALGORITHM,
     SECRET_KEY,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    needs_rehash,
+    verify_password_async,
 )
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import register_cache, timed
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import session_scope
 from pydantic import BaseModel, EmailStr
 
 router = APIRouter()
@@ -43,67 +52,174 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Detached snapshot of the authenticated user, safe to cache across requests."""
+
+    id: int
+    email: str
+    name: str | None = None
+
+
+# token -> subject, for tokens whose signature and expiry were already verified
+_token_cache: TTLCache[str, str] = TTLCache(maxsize=10_000, ttl=300)
+# subject (email) -> user snapshot
+_user_cache: TTLCache[str, AuthenticatedUser] = TTLCache(
+    maxsize=10_000, ttl=get_settings().auth_user_cache_ttl_seconds
+)
+register_cache("auth_token", _token_cache)
+register_cache("auth_user", _user_cache)
+
+
+def invalidate_user(email: str) -> None:
+    """Drop the cached snapshot for ``email`` (called whenever a user row changes)."""
+    _user_cache.pop(email)
+
+
+# Emails whose snapshots are dropped once the session's transaction commits.
+# Bulk update()/delete() statements skip the flush, so their callers call
+# invalidate_user themselves after committing.
+_PENDING_EMAILS = "auth_invalidate_emails"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, _flush_context) -> None:
+    for target in (*session.dirty, *session.deleted):
+        if isinstance(target, User):
+            pending = session.info.setdefault(_PENDING_EMAILS, set())
+            pending.add(target.email)
+            pending.update(inspect(target).attrs.email.history.deleted or ())
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for email in session.info.pop(_PENDING_EMAILS, ()):
+        invalidate_user(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(_PENDING_EMAILS, None)
+
+
+def _verify_token(token: str) -> str | None:
+    """Return the token subject, decoding the JWT only on a cache miss."""
+    subject = _token_cache.get(token)
+    if subject is not None:
+        return subject
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+    ttl = _token_cache.ttl
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(token, subject, ttl=ttl)
+    return subject
+
+
+def _load_user(email: str) -> AuthenticatedUser | None:
+    with session_scope() as db:
+        row = db.execute(select(User.id, User.email, User.name).where(User.email == email)).first()
+    if row is None:
+        return None
+    return AuthenticatedUser(id=row.id, email=row.email, name=row.name)
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    with timed("auth"):
+        try:
+            email = _verify_token(token)
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
-        raise credentials_exception
+
+        user = _user_cache.get(email)
+        if user is None:
+            # Blocking DB access stays off the event loop.
+            user = await run_in_threadpool(_load_user, email)
+            if user is None:
+                raise credentials_exception
+            _user_cache.set(email, user)
     return user
 
 
+def _password_hash_for(email: str) -> str | None:
+    with session_scope() as db:
+        return db.scalar(select(User.hashed_password).where(User.email == email))
+
+
+def _create_user(user_in: UserCreate, hashed_password: str) -> AuthenticatedUser:
+    with session_scope() as db:
+        new_user = User(
+            email=user_in.email,
+            hashed_password=hashed_password,
+            name=user_in.name,
+        )
+        db.add(new_user)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Email already registered")
+        invalidate_user(new_user.email)
+        return AuthenticatedUser(id=new_user.id, email=new_user.email, name=new_user.name)
+
+
+def _store_password_hash(email: str, hashed_password: str) -> None:
+    with session_scope() as db:
+        db.execute(update(User).where(User.email == email).values(hashed_password=hashed_password))
+        db.commit()
+    invalidate_user(email)
+
+
 @router.post("/register", response_model=UserResponse)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_in.email).first()
-    if user:
+async def register(user_in: UserCreate):
+    # DB work runs in the request threadpool, bcrypt in its own bounded pool,
+    # so a burst of sign-ups or logins never blocks unrelated requests.
+    if await run_in_threadpool(_password_hash_for, user_in.email) is not None:
         raise HTTPException(
             status_code=400,
             detail="Email already registered",
         )
-    
-    hashed_password = get_password_hash(user_in.password)
-    new_user = User(
-        email=user_in.email,
-        hashed_password=hashed_password,
-        name=user_in.name,
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+
+    hashed_password = await get_password_hash_async(user_in.password)
+    return await run_in_threadpool(_create_user, user_in, hashed_password)
 
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    email = form_data.username
+    hashed_password = await run_in_threadpool(_password_hash_for, email)
+    if hashed_password is None or not await verify_password_async(form_data.password, hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
+    if needs_rehash(hashed_password):
+        # Transparently upgrade hashes made with an older cost factor.
+        upgraded = await get_password_hash_async(form_data.password)
+        await run_in_threadpool(_store_password_hash, email, upgraded)
+
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": email}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=UserResponse)
-def read_users_me(current_user: Annotated[User, Depends(get_current_user)]):
+def read_users_me(current_user: Annotated[AuthenticatedUser, Depends(get_current_user)]):
     return current_user
@@ -12,6 +12,9 @@ from app.schemas.chat import (
     ChatMessageResponse,
     ChatRequest,
 )
+from app.ai.admission import AdmissionRejected
+from app.ai.breaker import CircuitOpenError
+from app.ai.history import load_history_window
 from app.ai.llm import LLMConfigOverride, generate_chat_answer
 from app.rag.store import similarity_search
 
@@ -92,19 +95,10 @@ def send_message(
     session.commit() # Commit to save user message first
 
     # 2. Prepare Context (History + RAG)
-    # Fetch recent history
-    history_msgs = session.scalars(
-        select(ChatMessage)
-        .where(ChatMessage.session_id == session_id)
-        .order_by(ChatMessage.created_at)
-    ).all()
-    
-    # Convert to format expected by LLM
-    history_pairs = [(m.role, m.content) for m in history_msgs[:-1]] # Exclude the one we just added? 
-    # Actually generate_chat_answer expects history BEFORE the current query.
-    # But we just added the query as a message.
-    # So history_pairs should be everything EXCEPT the last one.
-    
+    # Last N turns verbatim within the token budget; older turns are folded
+    # into the session's rolling summary (persisted with the commit below).
+    window = load_history_window(session, chat_session, before_id=user_msg.id)
+
     # RAG Search
     kb_snippets = []
     try:
@@ -130,9 +124,12 @@ def send_message(
         answer = generate_chat_answer(
             payload.query,
             kb_snippets,
-            history_pairs,
-            override=override
+            window.turns,
+            override=override,
+            summary=window.summary,
         )
+    except (AdmissionRejected, CircuitOpenError):
+        raise
     except Exception as exc:
         # If AI fails, we still saved the user message. 
         # Should we save an error message as assistant? Or just error out?
@@ -0,0 +1,20 @@
+"""Background job status endpoints."""
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.models import Job
+from app.db.session import get_session
+from app.schemas.jobs import JobRead
+
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: int, session: Session = Depends(get_session)) -> Job:
+    job = session.get(Job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
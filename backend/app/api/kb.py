@@ -2,17 +2,49 @@
 
 Endpoints:
 - POST /api/kb/ingest: ingest/chunk documents into Chroma collection
+- POST /api/kb/ingest/jobs: same, as a background job
 - POST /api/kb/search: query similar chunks
 - POST /api/kb/delete: delete by ids
+- GET  /api/kb/items: page through a collection (offset or cursor)
+- GET  /api/kb/export: stream a whole collection as NDJSON
+- POST /api/kb/snapshots: write a binary snapshot of a collection
+- GET  /api/kb/snapshots[/{name}]: list snapshots / download one
+- POST /api/kb/snapshots/{name}/restore: rebuild a collection from a snapshot
 """
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
 import re
 
-from app.rag.chunk import chunk_text, chunk_text_strategy
-from app.rag.store import add_documents, delete_by_ids, similarity_search, list_documents
-from app.rag.utils import extract_title, derive_doc_id
+from app.core.config import get_settings
+from app.db.models import Job
+from app.db.session import get_session
+from app.jobs.queue import enqueue
+from app.rag.ingest import ingest_documents
+from app.rag.snapshot import (
+    SnapshotError,
+    SnapshotNotFound,
+    export_snapshot,
+    read_manifest,
+    restore_snapshot,
+)
+from app.rag.store import (
+    delete_by_ids,
+    iter_documents,
+    list_documents,
+    similarity_search,
+    similarity_search_many,
+)
+from app.schemas.jobs import JobRead
 from app.schemas.kb import (
     KBDeleteRequest,
     KBDeleteResponse,
@@ -22,6 +54,10 @@ from app.schemas.kb import (
     KBListResponse,
     KBQueryRequest,
     KBQueryResponse,
+    KBSnapshotCreate,
+    KBSnapshotInfo,
+    KBSnapshotRestoreRequest,
+    KBSnapshotRestoreResponse,
 )
 
 
@@ -45,62 +81,39 @@ def _validate_collection_name(name: str) -> None:
 @router.post("/ingest", response_model=KBIngestResponse, status_code=status.HTTP_201_CREATED)
 def ingest_kb(payload: KBIngestRequest) -> KBIngestResponse:
     _validate_collection_name(payload.collection)
-    texts: list[str] = []
-    metadatas: list[dict | None] = []
-    ids: list[str] | None = []
-
-    if payload.chunk:
-        for doc in payload.documents:
-            chunks = chunk_text_strategy(
-                doc.text,
-                strategy=payload.chunk_strategy,
-                max_chars=payload.max_chars,
-                overlap=payload.overlap,
-                delimiters=payload.delimiters,
-            )
-            texts.extend(chunks)
-            # derive title and doc_id for consistent display across chunks
-            doc_meta = doc.metadata or {}
-            title = doc_meta.get("title") or extract_title(doc.text) or doc_meta.get("filename") or "Untitled"
-            doc_id = doc.id or doc_meta.get("doc_id") or derive_doc_id(doc.text, title)
-            base_meta = {"doc_id": doc_id, "title": title}
-            # include user-provided metadata
-            merged = {**doc_meta, **base_meta}
-            metadatas.extend([merged] * len(chunks))
-        ids = None  # let store assign ids per chunk
-    else:
-        temp_ids: list[str] = []
-        all_have_ids = True
-        for doc in payload.documents:
-            texts.append(doc.text)
-            doc_meta = doc.metadata or {}
-            title = doc_meta.get("title") or extract_title(doc.text) or doc_meta.get("filename") or "Untitled"
-            base_meta = {"title": title}
-            metadatas.append({**doc_meta, **base_meta})
-            if doc.id:
-                temp_ids.append(doc.id)
-            else:
-                all_have_ids = False
-        ids = temp_ids if all_have_ids else None
-
     try:
-        inserted_ids = add_documents(
-            texts=texts, ids=ids, metadatas=metadatas, collection=payload.collection
-        )
+        return ingest_documents(payload)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    return KBIngestResponse(
-        collection=payload.collection, inserted_ids=inserted_ids, chunks_added=len(texts)
-    )
+
+
+@router.post("/ingest/jobs", response_model=JobRead, status_code=status.HTTP_202_ACCEPTED)
+def ingest_kb_in_background(
+    payload: KBIngestRequest, session: Session = Depends(get_session)
+) -> Job:
+    """Queue a large ingest; poll GET /api/jobs/{id} for progress and result."""
+    _validate_collection_name(payload.collection)
+    return enqueue(session, "kb.ingest", payload.model_dump())
 
 
 @router.post("/search", response_model=KBQueryResponse)
 def search_kb(payload: KBQueryRequest) -> KBQueryResponse:
-    _validate_collection_name(payload.collection)
+    """Search one collection, or fan out over ``collections`` and merge into a global top-k."""
+    names = payload.collections or [payload.collection]
+    for name in names:
+        _validate_collection_name(name)
     try:
-        ids, docs, metas, dists = similarity_search(
-            query=payload.query, n_results=payload.n_results, collection=payload.collection
-        )
+        if payload.collections:
+            ids, docs, metas, dists = similarity_search_many(
+                query=payload.query,
+                collections=names,
+                n_results=payload.n_results,
+                normalize=payload.normalize,
+            )
+        else:
+            ids, docs, metas, dists = similarity_search(
+                query=payload.query, n_results=payload.n_results, collection=payload.collection
+            )
     except Exception as e:  # chroma errors
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -112,9 +125,12 @@ def search_kb(payload: KBQueryRequest) -> KBQueryResponse:
                 text=doc,
                 metadata=meta,
                 distance=(dist if isinstance(dist, (int, float)) else None),
+                collection=(meta or {}).get("collection") if payload.collections else payload.collection,
             )
         )
-    return KBQueryResponse(collection=payload.collection, query=payload.query, matches=matches)
+    return KBQueryResponse(
+        collection=names[0], collections=names, query=payload.query, matches=matches
+    )
 
 
 @router.post("/delete", response_model=KBDeleteResponse)
@@ -126,17 +142,51 @@ def delete_kb(payload: KBDeleteRequest) -> KBDeleteResponse:
     return KBDeleteResponse(collection=payload.collection, deleted=deleted)
 
 
+def _encode_cursor(position: int, last_id: str) -> str:
+    payload = json.dumps({"p": position, "id": last_id}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[int, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        position, last_id = data["p"], data["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(position, int) or position < 1 or not isinstance(last_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position, last_id
+
+
 @router.get("/items", response_model=KBListResponse)
-def list_kb_items(collection: str, limit: int = 20, offset: int = 0) -> KBListResponse:
+def list_kb_items(
+    collection: str, limit: int = 20, offset: int = 0, cursor: str | None = None
+) -> KBListResponse:
+    """One page of a collection; pass ``next_cursor`` back as ``cursor`` for the next page.
+
+    Chroma can only page by offset (no ordering or seek by id), so the cursor
+    is an offset plus the last id returned. If that id is no longer at the
+    offset, rows were deleted behind the cursor and paging on would skip
+    some; the request fails with 409 and the client starts over.
+    """
     _validate_collection_name(collection)
     if limit < 1 or limit > 200:
         raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
     if offset < 0:
         raise HTTPException(status_code=400, detail="offset must be >= 0")
+    stale = False
+    if cursor is not None:
+        offset, last_id = _decode_cursor(cursor)
     try:
-        ids, docs, metas, total = list_documents(collection=collection, limit=limit, offset=offset)
+        if cursor is not None:
+            stale = list_documents(collection=collection, limit=1, offset=offset - 1)[0] != [last_id]
+        if not stale:
+            ids, docs, metas, total = list_documents(collection=collection, limit=limit, offset=offset)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if stale:
+        raise HTTPException(status_code=409, detail="Collection changed since the cursor was issued")
 
     items = []
     for i, id_ in enumerate(ids):
@@ -144,4 +194,112 @@ def list_kb_items(collection: str, limit: int = 20, offset: int = 0) -> KBListRe
         meta = metas[i] if i < len(metas) else None
         items.append({"id": id_, "text": text, "metadata": meta})
 
-    return KBListResponse(collection=collection, total=total, items=items)
+    end = offset + len(ids)
+    next_cursor = _encode_cursor(end, ids[-1]) if ids and end < total else None
+    return KBListResponse(collection=collection, total=total, items=items, next_cursor=next_cursor)
+
+
+@router.get("/export")
+def export_kb(
+    collection: str, include_embeddings: bool = False, batch_size: int = 500
+) -> StreamingResponse:
+    """Stream every chunk as one JSON object per line (``application/x-ndjson``).
+
+    Rows are read from Chroma ``batch_size`` at a time while the response is
+    being sent, so memory use does not grow with the collection.
+    """
+    _validate_collection_name(collection)
+    if batch_size < 1 or batch_size > 5000:
+        raise HTTPException(status_code=400, detail="batch_size must be between 1 and 5000")
+    rows = iter_documents(collection, batch_size=batch_size, include_embeddings=include_embeddings)
+
+    def lines() -> Iterator[bytes]:
+        for id_, text, meta, embedding in rows:
+            record = {"id": id_, "text": text, "metadata": meta}
+            if include_embeddings:
+                record["embedding"] = embedding.tolist()
+            yield (json.dumps(record, ensure_ascii=False) + "\n").encode()
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{collection}.ndjson"'},
+    )
+
+
+SNAPSHOT_SUFFIX = ".atsnap"
+_SNAPSHOT_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]*\.atsnap$")
+
+
+def _snapshot_dir() -> Path:
+    return Path(get_settings().kb_snapshot_dir)
+
+
+def _snapshot_path(name: str) -> Path:
+    if not _SNAPSHOT_RE.match(name):
+        raise HTTPException(status_code=400, detail="Invalid snapshot name")
+    path = _snapshot_dir() / name
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return path
+
+
+def _snapshot_info(path: Path, manifest: dict) -> KBSnapshotInfo:
+    fields = ("collection", "count", "dim", "dtype", "embedding_model", "created_at", "sha256")
+    return KBSnapshotInfo(
+        name=path.name, size_bytes=path.stat().st_size, **{k: manifest[k] for k in fields}
+    )
+
+
+@router.post("/snapshots", response_model=KBSnapshotInfo, status_code=status.HTTP_201_CREATED)
+def create_kb_snapshot(payload: KBSnapshotCreate) -> KBSnapshotInfo:
+    """Snapshot ids, documents, metadata and embeddings so replicas can restore without re-embedding."""
+    _validate_collection_name(payload.collection)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    path = _snapshot_dir() / f"{payload.collection}-{stamp}{SNAPSHOT_SUFFIX}"
+    try:
+        manifest = export_snapshot(payload.collection, path, dtype=payload.dtype)
+    except SnapshotNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _snapshot_info(path, manifest)
+
+
+@router.get("/snapshots", response_model=List[KBSnapshotInfo])
+def list_kb_snapshots() -> List[KBSnapshotInfo]:
+    directory = _snapshot_dir()
+    if not directory.is_dir():
+        return []
+    infos = []
+    for path in sorted(directory.glob(f"*{SNAPSHOT_SUFFIX}")):
+        try:
+            infos.append(_snapshot_info(path, read_manifest(path)))
+        except SnapshotError:
+            continue  # partial or foreign file; not listed
+    return infos
+
+
+@router.get("/snapshots/{name}")
+def download_kb_snapshot(name: str) -> FileResponse:
+    return FileResponse(_snapshot_path(name), media_type="application/octet-stream", filename=name)
+
+
+@router.post("/snapshots/{name}/restore", response_model=KBSnapshotRestoreResponse)
+def restore_kb_snapshot(name: str, payload: KBSnapshotRestoreRequest) -> KBSnapshotRestoreResponse:
+    """Verify the checksum and model stamp, then bulk-load the snapshot into a collection."""
+    path = _snapshot_path(name)
+    if payload.collection is not None:
+        _validate_collection_name(payload.collection)
+    try:
+        result = restore_snapshot(
+            path,
+            collection=payload.collection,
+            replace=payload.replace,
+            allow_model_mismatch=payload.allow_model_mismatch,
+        )
+    except SnapshotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return KBSnapshotRestoreResponse(
+        collection=result.collection, restored=result.restored, seconds=round(result.seconds, 3)
+    )
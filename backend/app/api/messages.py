@@ -1,29 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.ai.precompute import enqueue_precompute
+from app.core.config import get_settings
 from app.db.models import Ticket, TicketMessage, User
-from app.db.session import get_session
+from app.db.session import get_session, session_scope
+from app.events.hub import get_event_hub
+from app.events.outbox import PAGE_SIZE, event_committed, events_after, record_event
 from app.schemas.messages import MessageCreate, MessageResponse
 
 router = APIRouter()
 
 
 @router.get("/{ticket_id}/messages", response_model=list[MessageResponse])
-def list_messages(ticket_id: int, session: Session = Depends(get_session)) -> list[TicketMessage]:
+def list_messages(
+    ticket_id: int,
+    request: Request,
+    response: Response,
+    since_id: int | None = Query(default=None, ge=0, description="Only messages with a larger id"),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    session: Session = Depends(get_session),
+) -> Any:
+    """Messages oldest first; poll with ``since_id`` and ``If-None-Match`` to fetch only what is new.
+
+    When ``limit`` cuts the page short, ``X-Next-Since-Id`` holds the cursor
+    for the next page.
+    """
     ticket = session.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    
-    stmt = select(TicketMessage).where(TicketMessage.ticket_id == ticket_id).order_by(TicketMessage.created_at)
-    result = session.execute(stmt)
-    return list(result.scalars().all())
+
+    # Messages are append-only, so count + max id identify the list
+    count, max_id = session.execute(
+        select(func.count(TicketMessage.id), func.max(TicketMessage.id)).where(TicketMessage.ticket_id == ticket_id)
+    ).one()
+    etag = f'W/"m{ticket_id}-{count}-{max_id or 0}-{since_id or 0}-{limit or 0}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    stmt = select(TicketMessage).where(TicketMessage.ticket_id == ticket_id)
+    if since_id is not None:
+        stmt = stmt.where(TicketMessage.id > since_id)
+    stmt = stmt.order_by(TicketMessage.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    messages = list(session.execute(stmt).scalars().all())
+    response.headers["ETag"] = etag
+    if limit is not None and len(messages) == limit and messages[-1].id != max_id:
+        response.headers["X-Next-Since-Id"] = str(messages[-1].id)
+    return messages
 
 
 @router.post("/{ticket_id}/messages", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 def create_message(
-    ticket_id: int, 
-    payload: MessageCreate, 
+    ticket_id: int,
+    payload: MessageCreate,
     sender_id: int, # In a real app, this would come from the token
     sender_type: str = "agent", # or "user"
     session: Session = Depends(get_session)
@@ -31,7 +70,7 @@ def create_message(
     ticket = session.get(Ticket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    
+
     sender = session.get(User, sender_id)
     if not sender:
         raise HTTPException(status_code=404, detail="Sender not found")
@@ -43,6 +82,95 @@ def create_message(
         content=payload.content
     )
     session.add(message)
+    session.flush()
+    record_event(
+        session,
+        ticket_id,
+        "message.created",
+        MessageResponse.model_validate(message).model_dump(mode="json"),
+    )
     session.commit()
+    event_committed()
     session.refresh(message)
+    # The message changes the ticket's suggestion version; precompute the next one
+    enqueue_precompute(session, ticket_id)
     return message
+
+
+def _sse(event: dict[str, Any]) -> str:
+    payload = json.dumps({k: event[k] for k in ("ticket_id", "data", "created_at")}, ensure_ascii=False)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+def _replay(ticket_id: int, after_id: int) -> list[dict[str, Any]]:
+    with session_scope() as session:
+        return events_after(session, after_id, ticket_id=ticket_id)
+
+
+def _ticket_exists(ticket_id: int) -> bool:
+    with session_scope() as session:
+        return session.get(Ticket, ticket_id) is not None
+
+
+@router.get("/{ticket_id}/events")
+async def stream_ticket_events(
+    ticket_id: int,
+    request: Request,
+    since_event_id: int | None = Query(default=None, ge=0, description="Replay events after this id"),
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Server-Sent Events for one ticket: new messages, replies and ticket updates.
+
+    Reconnecting clients send ``Last-Event-ID`` (EventSource does this
+    automatically) and get missed events replayed from the outbox. The stream
+    ends after ``TICKET_EVENTS_STREAM_MAX_SECONDS``; clients simply reconnect.
+    """
+    if not await run_in_threadpool(_ticket_exists, ticket_id):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    after_id = since_event_id
+    if after_id is None and last_event_id and last_event_id.isdigit():
+        after_id = int(last_event_id)
+
+    settings = get_settings()
+    hub = get_event_hub()
+    # Seeding the hub's position queries the database; keep it off the event loop
+    await run_in_threadpool(hub.start)
+    # Subscribe before replaying so nothing committed in between is missed
+    sub = hub.subscribe(ticket_id)
+
+    async def stream() -> AsyncIterator[str]:
+        try:
+            sent = after_id or 0
+            yield "retry: 3000\n\n"
+            if after_id is not None:
+                while True:
+                    page = await run_in_threadpool(_replay, ticket_id, sent)
+                    for event in page:
+                        sent = event["id"]
+                        yield _sse(event)
+                    if len(page) < PAGE_SIZE:
+                        break
+            deadline = time.monotonic() + settings.ticket_events_stream_max_seconds
+            while not await request.is_disconnected():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    event = await sub.get(min(settings.ticket_events_heartbeat_seconds, remaining))
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:  # fell behind; the client reconnects and replays
+                    break
+                if event["id"] <= sent:
+                    continue
+                sent = event["id"]
+                yield _sse(event)
+        finally:
+            sub.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -9,6 +9,7 @@ from app.api.messages import router as messages_router
 from app.api.chat import router as chat_router
 from app.api.auth import router as auth_router
 from app.api.stats import router as stats_router
+from app.api.jobs import router as jobs_router
 
 api_router = APIRouter()
 
@@ -20,3 +21,4 @@ api_router.include_router(messages_router, prefix="/tickets", tags=["messages"])
 api_router.include_router(chat_router, prefix="/chat", tags=["chat"])
 api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
 api_router.include_router(stats_router, prefix="/stats", tags=["stats"])
+api_router.include_router(jobs_router, prefix="/jobs", tags=["jobs"])
@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.api.auth import get_current_user
-from app.db.models import Ticket, TicketStatus, User
+from app.api.auth import AuthenticatedUser, get_current_user
+from app.db.models import Ticket, TicketStatus
 from app.db.session import get_db
 from pydantic import BaseModel
 
@@ -28,7 +28,7 @@ class DashboardStats(BaseModel):
 
 @router.get("/dashboard", response_model=DashboardStats)
 def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # 1. Basic Counts
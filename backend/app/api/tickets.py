@@ -1,15 +1,30 @@
 """Ticket and Reply CRUD endpoints (Lesson 2)."""
 from __future__ import annotations
 
+import os
+import re
 from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy import and_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.ai.precompute import enqueue_precompute
+from app.core.config import get_settings
+from app.db.bulk_import import import_records, iter_records
 from app.db.models import Reply, Ticket, TicketPriority, TicketStatus, User
 from app.db.session import get_session
-from app.schemas.ticket import ReplyCreate, ReplyRead, TicketCreate, TicketRead, TicketUpdate
+from app.events.outbox import event_committed, record_event
+from app.schemas.ticket import (
+    ReplyCreate,
+    ReplyRead,
+    TicketCreate,
+    TicketImportResponse,
+    TicketRead,
+    TicketUpdate,
+)
 
 
 router = APIRouter()
@@ -41,9 +56,64 @@ def create_ticket(payload: TicketCreate, session: Session = Depends(get_session)
     session.add(ticket)
     session.commit()
     session.refresh(ticket)
+    enqueue_precompute(session, ticket.id)
     return ticket
 
 
+_CHECKPOINT_RE = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+@router.post("/import", response_model=TicketImportResponse)
+def import_tickets(
+    file: UploadFile = File(...),
+    kind: Literal["tickets", "messages"] = "tickets",
+    format: Literal["jsonl", "csv"] | None = None,
+    batch_size: int = Query(5000, ge=100, le=50000),
+    skip: int = Query(0, ge=0),
+    checkpoint: str | None = Query(None, description="Name of a server-side resume checkpoint"),
+    session: Session = Depends(get_session),
+) -> TicketImportResponse:
+    """Bulk import tickets or ticket messages from a JSONL/CSV upload."""
+    fmt = format
+    if fmt is None:
+        fmt = "csv" if (file.filename or "").lower().endswith(".csv") else "jsonl"
+
+    checkpoint_path = None
+    if checkpoint is not None:
+        if not _CHECKPOINT_RE.match(checkpoint):
+            raise HTTPException(status_code=400, detail="Invalid checkpoint name")
+        checkpoint_dir = get_settings().import_checkpoint_dir
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        checkpoint_path = os.path.join(checkpoint_dir, f"{checkpoint}.json")
+
+    try:
+        result = import_records(
+            session,
+            iter_records(file.file, fmt),
+            kind=kind,
+            batch_size=batch_size,
+            skip=skip,
+            checkpoint_path=checkpoint_path,
+        )
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except IntegrityError as exc:
+        session.rollback()
+        raise HTTPException(
+            status_code=409, detail=f"Import conflicts with existing rows: {exc.orig}"
+        ) from exc
+    return TicketImportResponse(
+        kind=result.kind,
+        records_read=result.records_read,
+        inserted=result.inserted,
+        rejected=result.rejected,
+        skipped=result.skipped,
+        elapsed_seconds=round(result.elapsed_seconds, 3),
+        rows_per_second=round(result.rows_per_second, 1),
+        errors=result.errors,
+    )
+
+
 @router.get("/", response_model=list[TicketRead])
 def list_tickets(
     session: Session = Depends(get_session),
@@ -98,7 +168,11 @@ def update_ticket(
     if data:
         data["updated_at"] = datetime.now(timezone.utc)
         session.execute(update(Ticket).where(Ticket.id == ticket_id).values(**data))
+        record_event(session, ticket_id, "ticket.updated", payload.model_dump(mode="json", exclude_unset=True))
         session.commit()
+        event_committed()
+        if "title" in data or "content" in data:
+            enqueue_precompute(session, ticket_id)
     updated = session.get(Ticket, ticket_id)
     assert updated is not None
     return updated
@@ -129,7 +203,10 @@ def add_reply(
 
     reply = Reply(ticket_id=ticket_id, author_id=payload.author_id, content=payload.content)
     session.add(reply)
+    session.flush()
+    record_event(session, ticket_id, "reply.created", ReplyRead.model_validate(reply).model_dump(mode="json"))
     session.commit()
+    event_committed()
     session.refresh(reply)
     return reply
 
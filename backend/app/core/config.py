@@ -1,5 +1,6 @@
 """Application-level configuration and dependency helpers."""
 from functools import lru_cache
+from typing import Any, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +11,15 @@ class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./astratickets.db"
     vector_store_path: str = "./vector_store"
     sentence_transformers_model: str | None = None
+    # SentenceTransformers CPU inference: backend, forward-pass batch size and
+    # intra-op threads (None = library default)
+    embedding_backend: Literal["torch", "torch-int8", "onnx"] = "torch"
+    embedding_batch_size: int = 32
+    embedding_threads: int | None = None
+    # Micro-batch concurrent query embeddings: wait up to this long for other
+    # queries to join one forward pass (0 = off), at most this many per batch
+    embedding_query_batch_wait_ms: float = 0.0
+    embedding_query_batch_size: int = 32
     # LLM / AI configuration (Lesson 5+)
     llm_provider: str | None = None
     llm_base_url: str | None = None
@@ -17,8 +27,96 @@ class Settings(BaseSettings):
     openai_api_key: str | None = None
     deepseek_api_key: str | None = None
     qwen_api_key: str | None = None
+    # Upper bound for the per-request prompt (user message); capped by the model's context window
+    llm_prompt_token_budget: int | None = 3000
+    # Optional pool of OpenAI-compatible endpoints (JSON list of
+    # {name, base_url, api_key, model?, weight?}); defaults to LLM_BASE_URL + provider key
+    llm_endpoints: list[dict[str, Any]] = []
+    llm_request_timeout_seconds: float = 10.0
+    # Send a second request to the next endpoint after the first one's p95 latency
+    llm_hedge_requests: bool = True
+    llm_hedge_delay_ms: float = 2000.0
+    llm_hedge_min_delay_ms: float = 100.0
+    # Identical in-flight LLM requests share one upstream call; results are reused briefly
+    llm_coalesce_requests: bool = True
+    llm_cache_ttl_seconds: float = 30.0
+    llm_cache_max_entries: int = 512
+    # Admission control: concurrent upstream LLM calls and bounded wait queue per
+    # traffic class; interactive overflow is shed with 429 + Retry-After
+    llm_interactive_concurrency: int = 8
+    llm_interactive_queue_size: int = 16
+    llm_interactive_queue_timeout_seconds: float = 5.0
+    llm_batch_concurrency: int = 2
+    llm_batch_queue_size: int = 1000
+    llm_batch_queue_timeout_seconds: float = 300.0
+    # Circuit breaker: open when >= failure_ratio of the calls in the window failed or
+    # took longer than slow_call_seconds; fail fast (or answer from KB snippets) while open
+    llm_breaker_enabled: bool = True
+    llm_breaker_failure_ratio: float = 0.5
+    llm_breaker_min_calls: int = 5
+    llm_breaker_window_seconds: float = 30.0
+    llm_breaker_slow_call_seconds: float | None = 8.0
+    llm_breaker_open_seconds: float = 30.0
+    llm_breaker_fallback: bool = True
+    # Chat history window: last N turns verbatim, older turns folded into a summary
+    chat_history_max_turns: int = 6
+    chat_history_token_budget: int = 1500
+    chat_summary_token_budget: int = 400
+    # Batch AI suggestions: tickets processed concurrently and LLM requests per minute
+    ai_batch_concurrency: int = 4
+    ai_batch_requests_per_minute: int = 60
+    # Background jobs: worker threads started with the app, lease/heartbeat and retries
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 1.0
+    job_lease_seconds: int = 60
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 5.0
+    # Ticket event push (SSE): outbox poll interval, how long events are kept
+    # for Last-Event-ID replay, and stream lifetime before clients reconnect
+    ticket_events_poll_interval_seconds: float = 0.5
+    ticket_events_retention_seconds: float = 86400.0
+    ticket_events_stream_max_seconds: float = 300.0
+    ticket_events_heartbeat_seconds: float = 15.0
+    # Server-side checkpoints for resumable bulk imports
+    import_checkpoint_dir: str = "./import_checkpoints"
+    # In-process quantized KB search ("float16" or "int8"); the top
+    # n_results * rescore_factor candidates are rescored with exact float32
+    # vectors. Unset = query Chroma's index directly. The index is held in
+    # addition to Chroma's own HNSW data, so it costs memory rather than saving it.
+    vector_search_quantization: Literal["float16", "int8"] | None = None
+    vector_search_rescore_factor: int = 4
+    # Rebuild the quantized index at least this often to pick up writes from other processes
+    vector_search_index_ttl_seconds: float = 300.0
+    # HNSW parameters for newly created KB collections (None = Chroma default:
+    # l2, M=16, construction_ef=100, search_ef=100); ingest requests can override them
+    kb_distance_space: Literal["l2", "cosine", "ip"] = "l2"
+    kb_hnsw_m: int | None = None
+    kb_hnsw_construction_ef: int | None = None
+    kb_hnsw_search_ef: int | None = None
+    kb_collection_cache_ttl_seconds: float = 60.0
+    # Precompute suggestions in the background when tickets/messages are created;
+    # /suggest serves them while they match the ticket's current version
+    ai_precompute_suggestions: bool = False
+    ai_precompute_delay_seconds: float = 2.0
+    ai_precompute_max_age_seconds: float = 3600.0
+    # Threads running classification and KB retrieval concurrently per ticket suggestion
+    ai_suggest_stage_workers: int = 8
+    # Threads querying collections concurrently for multi-collection search
+    kb_search_fanout_workers: int = 8
+    # Binary vector-collection snapshots written/read by /api/kb/snapshots
+    kb_snapshot_dir: str = "./vector_snapshots"
     secret_key: str = "lesson7-secret-key-change-me-in-production"
     access_token_expire_minutes: int = 30
+    # bcrypt cost factor; existing hashes with another cost are upgraded on login
+    bcrypt_rounds: int = 12
+    # Threads dedicated to password hashing (0 = min(4, CPU count))
+    password_hash_workers: int = 0
+    # Server-Timing header on every response; X-Profile: <token> enables request profiling
+    server_timing_enabled: bool = True
+    profiling_token: str | None = None
+    profiling_interval_ms: float = 5.0
+    # Authenticated-user snapshots are cached per token subject for this long
+    auth_user_cache_ttl_seconds: float = 60.0
 
     model_config = SettingsConfigDict(
         env_file=".env",
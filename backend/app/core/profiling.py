@@ -0,0 +1,168 @@
+"""Opt-in sampling profiler for individual requests.
+
+cProfile only sees the thread it runs in, while most request work here
+happens in threadpool threads (sync endpoints, DB, embeddings, LLM calls).
+``SamplingProfiler`` instead samples the stacks of every thread with
+``sys._current_frames()`` at a fixed interval and aggregates
+self/cumulative sample counts per function.
+
+Samples cover the whole process, so profile a request while the server is
+otherwise quiet for the clearest picture. Finished profiles are kept in a
+small TTL cache and fetched by id.
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import TTLCache
+
+
+# Leaf frames that mean "this thread is parked", not doing work.
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("base_events.py", "_run_once"),
+    ("thread.py", "_worker"),
+}
+
+
+@dataclass
+class FunctionStats:
+    function: str
+    self_samples: int
+    total_samples: int
+    self_percent: float
+    total_percent: float
+
+
+@dataclass
+class Profile:
+    id: str
+    method: str
+    path: str
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    top: List[FunctionStats] = field(default_factory=list)
+    server_timing: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _label(code) -> str:
+    filename = code.co_filename.replace("\\", "/")
+    # Keep the path short: from the package root when it is one of ours
+    marker = filename.rfind("/app/")
+    short = filename[marker + 1 :] if marker >= 0 else filename.rsplit("/", 2)[-1]
+    return f"{short}:{code.co_firstlineno}({code.co_name})"
+
+
+def _is_idle(code) -> bool:
+    return (code.co_filename.replace("\\", "/").rsplit("/", 1)[-1], code.co_name) in _IDLE_LEAVES
+
+
+class SamplingProfiler:
+    """Samples all thread stacks from a background thread until ``stop``."""
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self._self: Counter[str] = Counter()
+        self._total: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self.duration = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self) -> "SamplingProfiler":
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop sampling; ``wait=False`` signals the thread without joining it."""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self._sample(own)
+
+    def _sample(self, own_ident: int) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident or frame is None or _is_idle(frame.f_code):
+                continue
+            seen = set()
+            leaf = True
+            depth = 0
+            while frame is not None and depth < self.max_depth:
+                label = _label(frame.f_code)
+                if leaf:
+                    self._self[label] += 1
+                    leaf = False
+                if label not in seen:
+                    self._total[label] += 1
+                    seen.add(label)
+                frame = frame.f_back
+                depth += 1
+            self.samples += 1
+
+    def top(self, limit: int = 25) -> List[FunctionStats]:
+        samples = max(self.samples, 1)
+        ranked = sorted(self._total.items(), key=lambda kv: (kv[1], self._self[kv[0]]), reverse=True)
+        return [
+            FunctionStats(
+                function=name,
+                self_samples=self._self[name],
+                total_samples=total,
+                self_percent=round(100.0 * self._self[name] / samples, 1),
+                total_percent=round(100.0 * total / samples, 1),
+            )
+            for name, total in ranked[:limit]
+        ]
+
+
+_profiles: TTLCache[str, Profile] = TTLCache(maxsize=100, ttl=3600)
+
+
+def store_profile(
+    profiler: SamplingProfiler,
+    method: str,
+    path: str,
+    server_timing: Dict[str, float],
+    limit: int = 25,
+) -> Profile:
+    profile = Profile(
+        id=uuid.uuid4().hex,
+        method=method,
+        path=path,
+        duration_ms=round(profiler.duration * 1000, 2),
+        interval_ms=profiler.interval * 1000,
+        samples=profiler.samples,
+        top=profiler.top(limit),
+        server_timing=server_timing,
+    )
+    _profiles.set(profile.id, profile)
+    return profile
+
+
+def get_profile(profile_id: str) -> Optional[Profile]:
+    return _profiles.get(profile_id)
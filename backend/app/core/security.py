@@ -1,4 +1,8 @@
 """Security utilities for authentication."""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any, Union
 
@@ -6,6 +10,7 @@ import bcrypt
 from jose import jwt
 
 from app.core.config import get_settings
+from app.core.metrics import timed
 
 settings = get_settings()
 SECRET_KEY = settings.secret_key
@@ -13,6 +18,12 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_minutes
 
 
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+
+_hash_executor: ThreadPoolExecutor | None = None
+_hash_executor_lock = threading.Lock()
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash."""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
@@ -20,11 +31,49 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Generate a password hash."""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """True when the hash was made with a different cost than ``BCRYPT_ROUNDS``."""
+    # bcrypt hashes look like $2b$12$<salt+digest>
+    parts = hashed_password.split("$")
+    try:
+        return int(parts[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    """Dedicated pool so hashing bursts cannot starve the shared request threadpool."""
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            workers = settings.password_hash_workers or min(4, os.cpu_count() or 1)
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=max(1, workers), thread_name_prefix="bcrypt"
+            )
+        return _hash_executor
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` on the bounded hashing pool (bcrypt releases the GIL)."""
+    loop = asyncio.get_running_loop()
+    with timed("password_hash"):
+        return await loop.run_in_executor(
+            _get_hash_executor(), verify_password, plain_password, hashed_password
+        )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """``get_password_hash`` on the bounded hashing pool."""
+    loop = asyncio.get_running_loop()
+    with timed("password_hash"):
+        return await loop.run_in_executor(_get_hash_executor(), get_password_hash, password)
+
+
 def create_access_token(data: dict[str, Any], expires_delta: Union[timedelta, None] = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -0,0 +1,164 @@
+"""Per-request ``Server-Timing`` header and opt-in request profiling.
+
+Every stage reported through ``app.core.metrics.timed`` is also added to a
+per-request accumulator held in a ContextVar. Threadpool work (sync
+endpoints, ``run_in_threadpool``, ``asyncio.to_thread``) copies the
+context, so stages that run off the event loop are counted too. The totals
+are grouped (auth, db, embed, retrieve, llm, ...) and sent as::
+
+    Server-Timing: db;dur=3.1, embed;dur=0.4, retrieve;dur=2.2, llm;dur=812.0, total;dur=820.4
+
+When the request carries ``X-Profile: <PROFILING_TOKEN>`` it also runs
+under the sampling profiler; the profile id comes back in
+``X-Profile-Id`` and the top functions are served at
+``/debug/profiles/{id}`` (same header required).
+"""
+from __future__ import annotations
+
+import hmac
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.metrics import add_stage_observer
+from app.core.profiling import Profile, SamplingProfiler, store_profile
+
+
+PROFILE_HEADER = "x-profile"
+
+# Stage name (as passed to ``timed``) -> Server-Timing metric name.
+# ``None`` hides stages that only wrap other, already reported stages.
+SERVER_TIMING_GROUPS: Dict[str, Optional[str]] = {
+    "auth": "auth",
+    "password_hash": "auth",
+    "db": "db",
+    "db_commit": "db",
+    "embed_documents": "embed",
+    "embed_query": "embed",
+    "vector_query": "retrieve",
+    "vector_add": "retrieve",
+    "vector_rescore": "retrieve",
+    "similarity_search": None,
+    "classify": "classify",
+    "prompt_build": "prompt",
+    "llm_call": "llm",
+}
+
+class _StageTotals:
+    """Seconds per Server-Timing group for one request.
+
+    The copied context shares this object with every thread the request
+    fans out to (threadpool endpoints, the suggestion stage pool), so
+    updates are locked.
+    """
+
+    def __init__(self) -> None:
+        self._totals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, group: str, seconds: float) -> None:
+        with self._lock:
+            self._totals[group] = self._totals.get(group, 0.0) + seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+
+_request_stages: ContextVar[Optional[_StageTotals]] = ContextVar(
+    "request_stages", default=None
+)
+
+
+def _record_stage(stage: str, seconds: float) -> None:
+    stages = _request_stages.get()
+    if stages is None:
+        return
+    group = SERVER_TIMING_GROUPS.get(stage, stage)
+    if group is not None:
+        stages.add(group, seconds)
+
+
+add_stage_observer(_record_stage)
+
+
+def current_stages() -> Dict[str, float]:
+    """Seconds per group accumulated so far in the current request."""
+    stages = _request_stages.get()
+    return stages.snapshot() if stages is not None else {}
+
+
+def format_server_timing(stages: Dict[str, float], total: float) -> str:
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in sorted(stages.items())]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def is_profiling_authorized(value: Optional[str]) -> bool:
+    token = get_settings().profiling_token
+    return bool(token and value and hmac.compare_digest(value, token))
+
+
+def _finish_profile(
+    profiler: SamplingProfiler, method: str, path: str, server_timing: Dict[str, float]
+) -> Profile:
+    profiler.stop()
+    return store_profile(profiler, method, path, server_timing)
+
+
+class ServerTimingMiddleware:
+    """Pure ASGI middleware, so the header is added without buffering the body."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_settings()
+        profile_header = None
+        for key, value in scope.get("headers", ()):
+            if key == PROFILE_HEADER.encode():
+                profile_header = value.decode("latin-1")
+                break
+        profiler: Optional[SamplingProfiler] = None
+        if is_profiling_authorized(profile_header):
+            profiler = SamplingProfiler(interval=settings.profiling_interval_ms / 1000.0)
+
+        stages = _StageTotals()
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                if settings.server_timing_enabled:
+                    value = format_server_timing(stages.snapshot(), time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                if profiler is not None:
+                    # Joining the sampler thread blocks, so keep it off the event loop.
+                    profile = await run_in_threadpool(
+                        _finish_profile,
+                        profiler,
+                        scope.get("method", ""),
+                        scope.get("path", ""),
+                        {k: round(v * 1000, 2) for k, v in stages.snapshot().items()},
+                    )
+                    headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        if profiler is not None:
+            profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None and profiler.running:
+                profiler.stop(wait=False)
+            _request_stages.reset(token)
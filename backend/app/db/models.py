@@ -4,7 +4,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from enum import Enum
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.session import Base
@@ -93,6 +93,10 @@ class ChatSession(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
     title: Mapped[str] = mapped_column(String(255), default="New Chat")
+    # Rolling summary of turns that fell out of the verbatim history window.
+    # summary_until_id is the last ChatMessage.id already folded into it.
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_until_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
 
@@ -101,6 +105,7 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (Index("ix_chat_messages_session_created", "session_id", "created_at"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     session_id: Mapped[int] = mapped_column(ForeignKey("chat_sessions.id"))
@@ -111,6 +116,97 @@ class ChatMessage(Base):
     session: Mapped[ChatSession] = relationship(back_populates="messages")
 
 
+class SuggestionBatch(Base):
+    """A batch AI-suggestion run over a filtered set of tickets."""
+
+    __tablename__ = "suggestion_batches"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    # pending → running → completed / cancelled / failed
+    status: Mapped[str] = mapped_column(String(32), default="pending", index=True)
+    filters: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    options: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    completed: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    # Summed seconds per pipeline stage across finished tickets
+    stage_seconds: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # The ai.batch job running it; None for foreground (CLI) runs
+    job_id: Mapped[int | None] = mapped_column(Integer, nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class TicketSuggestion(Base):
+    """Persisted AI suggestion (category, priority/tags and draft reply) for a ticket."""
+
+    __tablename__ = "ticket_suggestions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    ticket_id: Mapped[int] = mapped_column(ForeignKey("tickets.id", ondelete="CASCADE"), index=True)
+    batch_id: Mapped[int | None] = mapped_column(ForeignKey("suggestion_batches.id"), nullable=True, index=True)
+    category: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    confidence: Mapped[float | None] = mapped_column(Float, nullable=True)
+    suggested_priority: Mapped[str | None] = mapped_column(String(16), nullable=True)
+    suggested_tags: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    ai_reply: Mapped[str | None] = mapped_column(Text, nullable=True)
+    kb_snippets: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    timings: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Hash of the inputs it was generated from (app.ai.precompute.suggestion_version)
+    version: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, index=True)
+
+
+class Job(Base):
+    """Durable background job claimed by the in-process worker pool.
+
+    A running job holds a lease that its worker extends with heartbeats; if
+    the worker dies, the lease expires and another worker re-claims the job.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_after", "status", "run_after"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    kind: Mapped[str] = mapped_column(String(64), index=True)
+    # queued → running → succeeded / failed (queued again while retries remain)
+    status: Mapped[str] = mapped_column(String(16), default="queued")
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    progress: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=3)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class TicketEvent(Base):
+    """Outbox of ticket conversation changes (new messages/replies, ticket updates).
+
+    Written in the same transaction as the change; every API process tails
+    the table and pushes new rows to its SSE subscribers. No foreign key, so
+    events outlive a deleted ticket until they are pruned.
+    """
+
+    __tablename__ = "ticket_events"
+    __table_args__ = (Index("ix_ticket_events_ticket_id_id", "ticket_id", "id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    ticket_id: Mapped[int] = mapped_column(Integer)
+    # message.created / reply.created / ticket.updated
+    type: Mapped[str] = mapped_column(String(32))
+    data: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, index=True)
+
+
 # Update relationships in User and Ticket
 User.messages = relationship("TicketMessage", back_populates="sender")
 Ticket.messages = relationship("TicketMessage", back_populates="ticket", cascade="all, delete-orphan")
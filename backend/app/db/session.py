@@ -4,12 +4,14 @@ Using a sync engine avoids extra runtime dependencies in restricted envs.
 """
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
+from contextlib import contextmanager
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.core.config import get_settings
+from app.core.metrics import instrument_engine
 
 
 class Base(DeclarativeBase):
@@ -27,6 +29,7 @@ def _get_engine():
         settings = get_settings()
         _engine = create_engine(settings.sync_database_url, echo=False, future=True)
         SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False)
+        instrument_engine(_engine, SessionLocal)
     return _engine
 
 
@@ -46,9 +49,37 @@ def get_session() -> Generator[Session, None, None]:
 get_db = get_session
 
 
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Session for work outside a request (background jobs, CLI scripts)."""
+    yield from get_session()
+
+
 def init_models() -> None:
     """Create all tables for Lesson 2 prototypes (no migrations)."""
     engine = _get_engine()
     from app.db import models  # noqa: F401  ensures model metadata is registered
 
     Base.metadata.create_all(bind=engine)
+    _sync_schema(engine)
+
+
+def _sync_schema(engine) -> None:
+    """Add nullable columns and indexes introduced after a table was created.
+
+    There are no migrations yet, so an existing SQLite file would otherwise
+    miss columns that later lessons add to existing models.
+    """
+    insp = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                ddl_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl_type}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
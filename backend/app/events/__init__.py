@@ -0,0 +1,8 @@
+"""Real-time ticket conversation events.
+
+Includes:
+- A ``ticket_events`` outbox written in the same transaction as each change
+- An in-process hub that tails the outbox and fans events out to SSE
+  subscribers, so every uvicorn worker sees every other worker's writes
+- Replay from the outbox for clients reconnecting with ``Last-Event-ID``
+"""
@@ -0,0 +1,171 @@
+"""In-process pub/sub hub fed by the ticket event outbox."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.metrics import REGISTRY
+from app.db.session import session_scope
+from app.events import outbox
+
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBERS = REGISTRY.gauge(
+    "astratickets_ticket_event_subscribers",
+    "Open ticket event streams in this process.",
+)
+EVENTS_DELIVERED = REGISTRY.counter(
+    "astratickets_ticket_events_delivered_total",
+    "Ticket events handed to subscribers, and subscribers dropped for falling behind.",
+    ["outcome"],
+)
+
+# Events buffered per subscriber before it is dropped; the client reconnects
+# with Last-Event-ID and catches up from the outbox.
+_SUBSCRIBER_BUFFER = 256
+_PRUNE_EVERY_SECONDS = 60.0
+
+
+class Subscription:
+    """One SSE stream's view of a ticket; ``get`` returns None once dropped."""
+
+    def __init__(self, hub: "EventHub", ticket_id: int) -> None:
+        self.hub = hub
+        self.ticket_id = ticket_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=_SUBSCRIBER_BUFFER)
+
+    def deliver(self, event: dict[str, Any] | None) -> None:
+        """Called on the event loop thread."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            EVENTS_DELIVERED.inc(outcome="dropped_subscriber")
+            self.hub.unsubscribe(self)
+            # Make room for the end-of-stream marker
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> dict[str, Any] | None:
+        """Next event; raises TimeoutError when nothing arrives within ``timeout``."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """A daemon thread tailing ``ticket_events`` and fanning rows out by ticket.
+
+    Every process runs its own hub against the shared database, so events
+    written by any uvicorn worker reach subscribers in all of them; a local
+    commit wakes the hub at once, other workers' commits within one poll
+    interval. The thread starts with the first subscription, after the
+    hub's position is set to the newest event so nothing committed once a
+    stream has subscribed can be skipped.
+    """
+
+    def __init__(self, poll_interval: float | None = None) -> None:
+        self.poll_interval = poll_interval or get_settings().ticket_events_poll_interval_seconds
+        self._lock = threading.Lock()
+        self._subs: dict[int, set[Subscription]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_id: int | None = None
+        self._last_prune = 0.0
+
+    def subscribe(self, ticket_id: int) -> Subscription:
+        """Register the calling event loop's stream for ``ticket_id``."""
+        sub = Subscription(self, ticket_id)
+        with self._lock:
+            self._subs.setdefault(ticket_id, set()).add(sub)
+            SUBSCRIBERS.set(sum(len(s) for s in self._subs.values()))
+        self.start()
+        return sub
+
+    def start(self) -> None:
+        """Seed the position and start the polling thread, once."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._seed()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="ticket-event-hub", daemon=True)
+            self._thread.start()
+
+    def _seed(self) -> None:
+        if self._last_id is None:
+            # Subscribers start from "now"; older events are served by replay
+            with session_scope() as session:
+                self._last_id = outbox.latest_event_id(session)
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.ticket_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.ticket_id]
+            SUBSCRIBERS.set(sum(len(s) for s in self._subs.values()))
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        outbox.event_available.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:  # pragma: no cover - keep the hub alive
+                logger.exception("ticket event hub failed while polling")
+            outbox.event_available.wait(self.poll_interval)
+            outbox.event_available.clear()
+
+    def poll(self) -> int:
+        """Dispatch events committed since the last poll; returns how many were read."""
+        settings = get_settings()
+        self._seed()
+        read = 0
+        while True:
+            with session_scope() as session:
+                events = outbox.events_after(session, self._last_id)
+            self._dispatch(events)
+            read += len(events)
+            if len(events) < outbox.PAGE_SIZE:
+                break
+        if time.monotonic() - self._last_prune > _PRUNE_EVERY_SECONDS:
+            self._last_prune = time.monotonic()
+            with session_scope() as session:
+                outbox.prune(session, settings.ticket_events_retention_seconds)
+        return read
+
+    def _dispatch(self, events: list[dict[str, Any]]) -> None:
+        for event in events:
+            self._last_id = event["id"]
+            with self._lock:
+                targets = list(self._subs.get(event["ticket_id"], ()))
+            for sub in targets:
+                EVENTS_DELIVERED.inc(outcome="delivered")
+                try:
+                    sub.loop.call_soon_threadsafe(sub.deliver, event)
+                except RuntimeError:  # the subscriber's event loop is closed
+                    self.unsubscribe(sub)
+
+_hub: EventHub | None = None
+_hub_lock = threading.Lock()
+
+
+def get_event_hub() -> EventHub:
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = EventHub()
+        return _hub
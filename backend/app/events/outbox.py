@@ -0,0 +1,62 @@
+"""Outbox operations on the ``ticket_events`` table."""
+from __future__ import annotations
+
+import threading
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import TicketEvent, utcnow
+
+
+# Set after this process commits an event so the hub polls at once instead
+# of waiting an interval; other processes pick the row up on their next poll.
+event_available = threading.Event()
+
+# Rows read per query; readers keep paging until a short page comes back
+PAGE_SIZE = 500
+
+
+def record_event(session: Session, ticket_id: int, type: str, data: dict[str, Any] | None = None) -> None:
+    """Add an event to the caller's transaction; it is published when the caller commits."""
+    session.add(TicketEvent(ticket_id=ticket_id, type=type, data=data or {}))
+
+
+def event_committed() -> None:
+    """Wake the local hub after committing events."""
+    event_available.set()
+
+
+def to_dict(event: TicketEvent) -> dict[str, Any]:
+    return {
+        "id": event.id,
+        "ticket_id": event.ticket_id,
+        "type": event.type,
+        "data": event.data or {},
+        "created_at": event.created_at.isoformat() if event.created_at else None,
+    }
+
+
+def events_after(
+    session: Session, after_id: int, ticket_id: int | None = None, limit: int | None = None
+) -> list[dict[str, Any]]:
+    """Up to ``limit`` (default ``PAGE_SIZE``) events with id > ``after_id``, oldest first."""
+    stmt = select(TicketEvent).where(TicketEvent.id > after_id)
+    if ticket_id is not None:
+        stmt = stmt.where(TicketEvent.ticket_id == ticket_id)
+    rows = session.execute(stmt.order_by(TicketEvent.id).limit(limit or PAGE_SIZE)).scalars().all()
+    return [to_dict(row) for row in rows]
+
+
+def latest_event_id(session: Session) -> int:
+    return int(session.execute(select(func.max(TicketEvent.id))).scalar() or 0)
+
+
+def prune(session: Session, retention_seconds: float) -> int:
+    """Delete events older than the retention window; returns the number removed."""
+    cutoff = utcnow() - timedelta(seconds=retention_seconds)
+    result = session.execute(delete(TicketEvent).where(TicketEvent.created_at < cutoff))
+    session.commit()
+    return result.rowcount or 0
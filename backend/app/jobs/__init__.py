@@ -0,0 +1,8 @@
+"""Durable in-process background jobs.
+
+Includes:
+- A ``jobs`` table used as the queue (no external broker)
+- Lease + heartbeat columns so jobs of a crashed worker are re-claimed
+- Retries with exponential backoff
+- A thread worker pool started from the FastAPI lifespan
+"""
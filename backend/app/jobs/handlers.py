@@ -0,0 +1,75 @@
+"""Built-in job handlers (imported by the worker pool on start)."""
+from __future__ import annotations
+
+from typing import Any
+
+from app.ai.admission import BATCH, admission_class
+from app.ai.batch import run_batch_job
+from app.ai.llm import LLMConfigOverride
+from app.ai.precompute import find_fresh_suggestion, suggestion_version
+from app.ai.service import generate_ticket_suggestion
+from app.db.models import Ticket, TicketSuggestion
+from app.db.session import session_scope
+from app.jobs.queue import JobContext, job_handler
+from app.rag.ingest import ingest_documents
+from app.schemas.kb import KBIngestRequest
+
+
+@job_handler("kb.ingest")
+def run_kb_ingest(payload: dict[str, Any], ctx: JobContext) -> dict[str, Any]:
+    request = KBIngestRequest.model_validate(payload)
+
+    def on_progress(done: int, total: int) -> None:
+        ctx.set_progress({"chunks_done": done, "chunks_total": total})
+        ctx.heartbeat()
+
+    response = ingest_documents(request, on_progress=on_progress)
+    return response.model_dump()
+
+
+@job_handler("ai.batch")
+def run_suggestion_batch(payload: dict[str, Any], ctx: JobContext) -> dict[str, Any]:
+    """Run a batch created through ``POST /api/ai/batches``; a retry resumes it."""
+    return run_batch_job(payload)
+
+
+@job_handler("ai.suggest")
+def run_ticket_suggestion(payload: dict[str, Any], ctx: JobContext) -> dict[str, Any]:
+    """Generate and store a suggestion for ``payload['ticket_id']``."""
+    with session_scope() as session:
+        ticket = session.get(Ticket, payload["ticket_id"])
+        if ticket is None:
+            raise LookupError(f"Ticket {payload['ticket_id']} not found")
+        params = dict(
+            collection=payload.get("collection", "kb_main"),
+            n_results=payload.get("n_results", 3),
+            collections=payload.get("collections"),
+        )
+        override = LLMConfigOverride(
+            provider=payload.get("provider"),
+            base_url=payload.get("base_url"),
+            model=payload.get("model"),
+        )
+        # Stamped before generating: a message arriving meanwhile makes this row stale
+        version = suggestion_version(ticket, override=override, **params)
+        if payload.get("precompute"):
+            fresh = find_fresh_suggestion(session, ticket.id, version)
+            if fresh is not None:
+                return {"suggestion_id": fresh.id, "ticket_id": ticket.id, "skipped": "fresh"}
+        # Background work queues behind interactive traffic instead of being shed
+        with admission_class(BATCH):
+            suggestion = generate_ticket_suggestion(ticket=ticket, llm_override=override, **params)
+        row = TicketSuggestion(
+            ticket_id=ticket.id,
+            category=suggestion.category,
+            confidence=suggestion.confidence,
+            suggested_priority=suggestion.suggested_priority,
+            suggested_tags=suggestion.suggested_tags,
+            ai_reply=suggestion.ai_reply,
+            kb_snippets=suggestion.kb_snippets,
+            timings=suggestion.timings,
+            version=version,
+        )
+        session.add(row)
+        session.commit()
+        return {"suggestion_id": row.id, "ticket_id": ticket.id}
@@ -0,0 +1,187 @@
+"""Job queue operations on the ``jobs`` table.
+
+Claiming is a conditional UPDATE (compare-and-set on status/lease), so it is
+safe across threads, uvicorn workers and processes sharing the database.
+"""
+from __future__ import annotations
+
+import random
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import Job, utcnow
+
+
+@dataclass
+class JobContext:
+    """Passed to handlers so long-running work can keep its lease alive."""
+
+    job_id: int
+    attempt: int
+    heartbeat: Callable[[], None]
+    set_progress: Callable[[dict[str, Any]], None]
+
+
+JobHandler = Callable[[dict[str, Any], JobContext], dict[str, Any] | None]
+
+_HANDLERS: dict[str, JobHandler] = {}
+# Set on enqueue so idle workers in this process wake up without waiting a poll interval.
+job_available = threading.Event()
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """Register ``func`` as the handler for jobs of ``kind``."""
+
+    def decorator(func: JobHandler) -> JobHandler:
+        _HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def get_handler(kind: str) -> JobHandler | None:
+    return _HANDLERS.get(kind)
+
+
+def enqueue(
+    session: Session,
+    kind: str,
+    payload: dict[str, Any] | None = None,
+    max_attempts: int | None = None,
+    delay_seconds: float = 0.0,
+) -> Job:
+    """Insert a queued job and commit."""
+    job = Job(
+        kind=kind,
+        status="queued",
+        payload=payload or {},
+        max_attempts=max_attempts or get_settings().job_max_attempts,
+        run_after=utcnow() + timedelta(seconds=delay_seconds),
+    )
+    session.add(job)
+    session.commit()
+    job_available.set()
+    return job
+
+
+def _claimable(now):
+    expired_lease = and_(Job.status == "running", Job.lease_expires_at < now)
+    return and_(
+        or_(and_(Job.status == "queued", Job.run_after <= now), expired_lease),
+        Job.attempts < Job.max_attempts,
+    )
+
+
+def claim_next(session: Session, owner: str, kinds: list[str] | None = None) -> Job | None:
+    """Atomically lease the oldest runnable job for ``owner``."""
+    lease = timedelta(seconds=get_settings().job_lease_seconds)
+    for _ in range(5):  # lost races retry with the next candidate
+        now = utcnow()
+        stmt = select(Job.id).where(_claimable(now)).order_by(Job.id).limit(1)
+        if kinds:
+            stmt = stmt.where(Job.kind.in_(kinds))
+        job_id = session.scalar(stmt)
+        if job_id is None:
+            return None
+        claimed = session.execute(
+            update(Job)
+            .where(Job.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                lease_owner=owner,
+                lease_expires_at=now + lease,
+                heartbeat_at=now,
+                started_at=now,
+                attempts=Job.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        if claimed.rowcount == 1:
+            job = session.get(Job, job_id)
+            if job is not None:
+                session.refresh(job)
+            return job
+    return None
+
+
+def heartbeat(session: Session, job_id: int, owner: str) -> bool:
+    """Extend the lease; returns False if the job was taken over by another worker."""
+    now = utcnow()
+    lease = timedelta(seconds=get_settings().job_lease_seconds)
+    res = session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner, Job.status == "running")
+        .values(lease_expires_at=now + lease, heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return res.rowcount == 1
+
+
+def set_progress(session: Session, job_id: int, owner: str, progress: dict[str, Any]) -> None:
+    session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner)
+        .values(progress=progress)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def complete(session: Session, job_id: int, owner: str, result: dict[str, Any] | None) -> None:
+    session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner)
+        .values(status="succeeded", result=result, error=None, finished_at=utcnow(),
+                lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempt-1) * [0.8, 1.2)."""
+    base = get_settings().job_retry_backoff_seconds
+    return base * (2 ** max(0, attempt - 1)) * random.uniform(0.8, 1.2)
+
+
+def fail(session: Session, job_id: int, owner: str, error: str) -> None:
+    """Record a failed attempt: re-queue with backoff or mark failed for good."""
+    job = session.get(Job, job_id)
+    if job is None or job.lease_owner != owner:
+        return
+    session.refresh(job)
+    job.error = error
+    job.lease_expires_at = None
+    if job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.run_after = utcnow() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = "failed"
+        job.finished_at = utcnow()
+    session.commit()
+
+
+def reap_exhausted(session: Session) -> int:
+    """Fail running jobs whose lease expired after their last allowed attempt."""
+    now = utcnow()
+    res = session.execute(
+        update(Job)
+        .where(
+            Job.status == "running",
+            Job.lease_expires_at < now,
+            Job.attempts >= Job.max_attempts,
+        )
+        .values(status="failed", finished_at=now, error="Lease expired (worker crashed or stalled)")
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return res.rowcount or 0
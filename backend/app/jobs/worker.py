@@ -0,0 +1,109 @@
+"""Thread pool that executes queued jobs inside the API process."""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from typing import Any
+
+from app.core.config import get_settings
+from app.db.session import session_scope
+from app.jobs import queue
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerPool:
+    """N daemon threads polling the jobs table; started/stopped by the app lifespan."""
+
+    def __init__(self, workers: int | None = None, kinds: list[str] | None = None) -> None:
+        settings = get_settings()
+        self.workers = settings.job_workers if workers is None else workers
+        self.kinds = kinds
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        from app.jobs import handlers  # noqa: F401  registers built-in job handlers
+
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, args=(f"{self._prefix}:{i}",),
+                                 name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        queue.job_available.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads.clear()
+
+    def _loop(self, owner: str) -> None:
+        interval = get_settings().job_poll_interval_seconds
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once(owner)
+            except Exception:  # pragma: no cover - keep the worker alive
+                logger.exception("job worker %s crashed while polling", owner)
+                ran = False
+            if not ran:
+                queue.job_available.wait(interval)
+                queue.job_available.clear()
+
+    def run_once(self, owner: str | None = None) -> bool:
+        """Claim and execute a single job; returns False if nothing was runnable."""
+        owner = owner or f"{self._prefix}:inline"
+        with session_scope() as session:
+            queue.reap_exhausted(session)
+            job = queue.claim_next(session, owner, self.kinds)
+            if job is None:
+                return False
+            job_id, kind, attempt = job.id, job.kind, job.attempts
+            payload: dict[str, Any] = dict(job.payload or {})
+        self._execute(job_id, kind, attempt, payload, owner)
+        return True
+
+    def _execute(self, job_id: int, kind: str, attempt: int, payload: dict[str, Any], owner: str) -> None:
+        handler = queue.get_handler(kind)
+        done = threading.Event()
+        lease = get_settings().job_lease_seconds
+
+        def beat() -> None:
+            with session_scope() as s:
+                queue.heartbeat(s, job_id, owner)
+
+        def progress(data: dict[str, Any]) -> None:
+            with session_scope() as s:
+                queue.set_progress(s, job_id, owner, data)
+
+        def keep_alive() -> None:
+            while not done.wait(max(1.0, lease / 3)):
+                try:
+                    beat()
+                except Exception:  # pragma: no cover - transient DB errors
+                    logger.warning("heartbeat failed for job %s", job_id, exc_info=True)
+
+        beater = threading.Thread(target=keep_alive, name=f"job-{job_id}-heartbeat", daemon=True)
+        beater.start()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'")
+            result = handler(payload, queue.JobContext(job_id, attempt, beat, progress))
+        except Exception as exc:
+            logger.warning("job %s (%s) attempt %s failed: %s", job_id, kind, attempt, exc)
+            done.set()
+            with session_scope() as s:
+                queue.fail(s, job_id, owner, "".join(traceback.format_exception_only(exc)).strip())
+        else:
+            done.set()
+            with session_scope() as s:
+                queue.complete(s, job_id, owner, result)
+        finally:
+            done.set()
+            beater.join(1.0)
+
@@ -5,11 +5,22 @@ Lesson 2: mounts domain routers and prepares the database.
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
 
+from app.ai.admission import AdmissionRejected, get_admission_controller
+from app.ai.batch import fail_orphaned_batches
+from app.ai import provider_pool
+from app.ai.breaker import CircuitOpenError
+from app.ai.llm import circuit_state
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.profiling import get_profile
+from app.core.timing import ServerTimingMiddleware, is_profiling_authorized
 from app.api.router import api_router
-from app.db.session import init_models
+from app.db.session import init_models, session_scope
+from app.events.hub import get_event_hub
+from app.jobs.worker import JobWorkerPool
 
 settings = get_settings()
 
@@ -19,17 +30,69 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Lifespan context manager for startup and shutdown events."""
     # Startup: Create tables for Lesson 2 prototypes (no migrations yet)
     init_models()
+    # Settle batches whose job gave up while no process was running it
+    with session_scope() as session:
+        fail_orphaned_batches(session)
+    # Background job workers (KB ingest, AI suggestions) run in-process
+    workers = JobWorkerPool()
+    workers.start()
     yield
-    # Shutdown: cleanup if needed
+    # Shutdown: stop polling; in-flight jobs are re-claimed after their lease expires
+    workers.stop()
+    get_event_hub().stop()
+    provider_pool.shutdown()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app.add_middleware(ServerTimingMiddleware)
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> JSONResponse:
+    """LLM capacity is saturated: ask the client to back off instead of queueing forever."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError) -> JSONResponse:
+    """The LLM provider is failing: answer at once instead of waiting for its timeout."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/health", tags=["system"])
-async def health_check() -> dict[str, str]:
-    """Lightweight probe for Lesson 1 demos."""
-    return {"status": "ok", "environment": settings.environment}
+async def health_check() -> dict:
+    """Lightweight probe for Lesson 1 demos; includes LLM admission queue depth and circuit state."""
+    return {
+        "status": "ok",
+        "environment": settings.environment,
+        "llm_admission": get_admission_controller().snapshot(),
+        "llm_circuit": circuit_state(),
+    }
+
+
+@app.get("/metrics", tags=["system"], include_in_schema=False)
+async def metrics_endpoint() -> Response:
+    """Prometheus text exposition of in-process metrics (stage latencies, caches, DB)."""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/debug/profiles/{profile_id}", tags=["system"], include_in_schema=False)
+async def read_profile(profile_id: str, x_profile: str | None = Header(default=None)) -> dict:
+    """Top functions of a request profiled with ``X-Profile: <PROFILING_TOKEN>``."""
+    if not is_profiling_authorized(x_profile):
+        raise HTTPException(status_code=403, detail="Profiling not authorized")
+    profile = get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.to_dict()
 
 
 # Mount API routers under /api
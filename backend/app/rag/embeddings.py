@@ -7,8 +7,21 @@ from __future__ import annotations
 """
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, List, Optional
+import logging
 import math
+import zlib
+
+from app.core.metrics import instrument
+
+
+logger = logging.getLogger(__name__)
+
+# Inference backends for SentenceTransformerEmbedding:
+# - torch:      the stock PyTorch model
+# - torch-int8: PyTorch with dynamic int8 quantization of the Linear layers
+# - onnx:       ONNX Runtime (needs ``optimum[onnxruntime]``; falls back to torch)
+ST_BACKENDS = ("torch", "torch-int8", "onnx")
 
 
 def _try_import_sentence_transformers() -> Optional[object]:
@@ -23,6 +36,11 @@ def _try_import_sentence_transformers() -> Optional[object]:
 class EmbeddingProvider:
     """Abstract embedding provider interface."""
 
+    @property
+    def model_id(self) -> str:
+        """Identifies the vector space; vectors from different ids are not comparable."""
+        return type(self).__name__
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:  # pragma: no cover - interface
         raise NotImplementedError
 
@@ -39,51 +57,116 @@ class HashingEmbedding(EmbeddingProvider):
 
     dim: int = 384
 
+    @property
+    def model_id(self) -> str:
+        return f"hashing-crc32-{self.dim}"
+
     def _vec(self, text: str) -> List[float]:
         vec = [0.0] * self.dim
-        # Very simple bag-of-words hashing
+        # Very simple bag-of-words hashing; crc32 rather than hash(), which is
+        # salted per process and would make stored vectors unusable after a restart
         for token in text.lower().split():
-            h = hash(token) % self.dim
+            h = zlib.crc32(token.encode("utf-8")) % self.dim
             vec[h] += 1.0
         # L2 normalize
         norm = math.sqrt(sum(v * v for v in vec)) or 1.0
         return [v / norm for v in vec]
 
+    @instrument("embed_documents")
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         return [self._vec(t) for t in texts]
 
+    @instrument("embed_query")
     def embed_query(self, text: str) -> List[float]:
         return self._vec(text)
 
 
 @dataclass
 class SentenceTransformerEmbedding(EmbeddingProvider):
+    """SentenceTransformers model with a selectable CPU inference backend.
+
+    ``batch_size`` is the forward-pass batch; ``encode`` sorts its inputs by
+    length before batching, so each batch pads to similar lengths. ``threads``
+    caps intra-op parallelism (None leaves the library default, usually one
+    thread per core).
+    """
+
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    backend: str = "torch"
+    batch_size: int = 32
+    threads: Optional[int] = None
     _st_model: object | None = None
 
+    def __post_init__(self) -> None:
+        if self.backend not in ST_BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(ST_BACKENDS)}")
+
+    @property
+    def model_id(self) -> str:
+        # All backends run the same weights, so their vectors share one space
+        return self.model_name
+
     def _ensure_model(self) -> None:
         if self._st_model is not None:
             return
         st = _try_import_sentence_transformers()
         if st is None:
             raise RuntimeError("sentence-transformers not available")
-        self._st_model = st.SentenceTransformer(self.model_name)
-
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.threads:
+            import torch  # type: ignore
+
+            torch.set_num_threads(self.threads)
+        if self.backend == "onnx":
+            try:
+                self._st_model = st.SentenceTransformer(
+                    self.model_name, backend="onnx", model_kwargs=self._onnx_kwargs()
+                )
+                return
+            except Exception as exc:
+                logger.warning("ONNX backend unavailable for %s (%s); using torch", self.model_name, exc)
+        model = st.SentenceTransformer(self.model_name, device="cpu")
+        if self.backend == "torch-int8":
+            import torch  # type: ignore
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self._st_model = model
+
+    def _onnx_kwargs(self) -> dict:
+        kwargs: dict = {"provider": "CPUExecutionProvider"}
+        if self.threads:
+            import onnxruntime  # type: ignore
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            kwargs["session_options"] = options
+        return kwargs
+
+    def _encode(self, texts: List[str]) -> Any:
         self._ensure_model()
         assert self._st_model is not None
-        # encode returns numpy array; convert to list of floats
-        vecs = self._st_model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
-        return [v.tolist() for v in vecs]
+        # A (len(texts), dim) float32 numpy array; Chroma takes it as is, so no
+        # per-element conversion to Python floats (8-byte doubles plus object headers)
+        return self._st_model.encode(
+            texts, batch_size=self.batch_size, show_progress_bar=False, normalize_embeddings=True
+        )
 
-    def embed_query(self, text: str) -> List[float]:
-        return self.embed_documents([text])[0]
+    @instrument("embed_documents")
+    def embed_documents(self, texts: List[str]) -> Any:
+        return self._encode(texts)
+
+    @instrument("embed_query")
+    def embed_query(self, text: str) -> Any:
+        return self._encode([text])[0]
 
 
-def get_default_provider() -> EmbeddingProvider:
-    """Return the best available embedding provider."""
+def get_default_provider(**st_options: Any) -> EmbeddingProvider:
+    """Return the best available embedding provider.
+
+    ``st_options`` (backend, batch_size, threads) configure the
+    SentenceTransformers provider when it is chosen.
+    """
     # Attempt to use SentenceTransformers if present
     if _try_import_sentence_transformers() is not None:
-        return SentenceTransformerEmbedding()
+        return SentenceTransformerEmbedding(**st_options)
     # Fallback to hashing embedder
     return HashingEmbedding()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+"""KB ingestion pipeline shared by the API and background jobs."""
+
+from typing import Callable, Dict, List, Optional
+
+from app.rag.chunk import chunk_text_strategy
+from app.rag.store import add_documents
+from app.rag.utils import derive_doc_id, extract_title
+from app.schemas.kb import KBIngestRequest, KBIngestResponse
+
+
+# Texts embedded and written per add_documents call; keeps memory flat and
+# gives long ingests a point to report progress / heartbeat.
+INGEST_BATCH_SIZE = 256
+
+
+def prepare_ingest(
+    payload: KBIngestRequest,
+) -> tuple[List[str], List[Dict | None], Optional[List[str]]]:
+    """Chunk documents and build per-chunk metadata; returns (texts, metadatas, ids)."""
+    texts: list[str] = []
+    metadatas: list[dict | None] = []
+    ids: list[str] | None = []
+
+    if payload.chunk:
+        for doc in payload.documents:
+            chunks = chunk_text_strategy(
+                doc.text,
+                strategy=payload.chunk_strategy,
+                max_chars=payload.max_chars,
+                overlap=payload.overlap,
+                delimiters=payload.delimiters,
+            )
+            texts.extend(chunks)
+            # derive title and doc_id for consistent display across chunks
+            doc_meta = doc.metadata or {}
+            title = doc_meta.get("title") or extract_title(doc.text) or doc_meta.get("filename") or "Untitled"
+            doc_id = doc.id or doc_meta.get("doc_id") or derive_doc_id(doc.text, title)
+            base_meta = {"doc_id": doc_id, "title": title}
+            # include user-provided metadata
+            merged = {**doc_meta, **base_meta}
+            metadatas.extend([merged] * len(chunks))
+        ids = None  # let store assign ids per chunk
+    else:
+        temp_ids: list[str] = []
+        all_have_ids = True
+        for doc in payload.documents:
+            texts.append(doc.text)
+            doc_meta = doc.metadata or {}
+            title = doc_meta.get("title") or extract_title(doc.text) or doc_meta.get("filename") or "Untitled"
+            base_meta = {"title": title}
+            metadatas.append({**doc_meta, **base_meta})
+            if doc.id:
+                temp_ids.append(doc.id)
+            else:
+                all_have_ids = False
+        ids = temp_ids if all_have_ids else None
+    return texts, metadatas, ids
+
+
+def ingest_documents(
+    payload: KBIngestRequest,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> KBIngestResponse:
+    """Chunk, embed and store ``payload``; ``on_progress(done, total)`` after each batch."""
+    texts, metadatas, ids = prepare_ingest(payload)
+    index = payload.index.model_dump(exclude_none=True) if payload.index else None
+    inserted_ids: list[str] = []
+    for start in range(0, len(texts), INGEST_BATCH_SIZE):
+        end = start + INGEST_BATCH_SIZE
+        inserted_ids.extend(
+            add_documents(
+                texts=texts[start:end],
+                ids=ids[start:end] if ids is not None else None,
+                metadatas=metadatas[start:end],
+                collection=payload.collection,
+                index=index,
+            )
+        )
+        if on_progress is not None:
+            on_progress(min(end, len(texts)), len(texts))
+    return KBIngestResponse(
+        collection=payload.collection, inserted_ids=inserted_ids, chunks_added=len(texts)
+    )
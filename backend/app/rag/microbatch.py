@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+"""Micro-batching of concurrent single-text query embeddings.
+
+Each request embeds its query with ``embed_query``: one forward pass with a
+batch of one. ``MicroBatchingEmbedding`` wraps a provider and turns
+concurrent ``embed_query`` calls into one ``embed_documents`` batch:
+
+- the first caller becomes the batch leader and waits up to ``max_wait_ms``
+  for others to join
+- callers arriving meanwhile enqueue their text and wait on a future
+- the batch runs as soon as it holds ``max_batch_size`` texts or the wait
+  ends, in the thread of whichever caller closed it, and every caller's
+  future gets its row
+
+A lone caller pays at most ``max_wait_ms`` of extra latency; under load the
+model sees fewer, larger batches. ``embed_documents`` passes straight through.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from app.core.metrics import REGISTRY
+from app.rag.embeddings import EmbeddingProvider
+
+
+EMBED_BATCH_SIZE = REGISTRY.histogram(
+    "astratickets_embed_query_batch_size",
+    "Query texts per micro-batched embedding forward pass.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+EMBED_BATCH_WAIT = REGISTRY.histogram(
+    "astratickets_embed_query_batch_wait_seconds",
+    "Time a query spent queued before its micro-batch ran.",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1),
+)
+
+
+@dataclass
+class _Pending:
+    text: str
+    queued_at: float = field(default_factory=time.perf_counter)
+    future: Future = field(default_factory=Future)
+    taken: bool = False
+
+
+class MicroBatchingEmbedding(EmbeddingProvider):
+    def __init__(self, inner: EmbeddingProvider, max_wait_ms: float = 2.0, max_batch_size: int = 32) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.inner = inner
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._cond = threading.Condition()
+        self._pending: List[_Pending] = []
+        self._leader_waiting = False
+
+    @property
+    def model_id(self) -> str:
+        return self.inner.model_id
+
+    def embed_documents(self, texts: List[str]) -> Any:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> Any:
+        item = _Pending(text)
+        batch: List[_Pending] = []
+        with self._cond:
+            self._pending.append(item)
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take()
+                self._cond.notify_all()
+            elif not self._leader_waiting:
+                self._leader_waiting = True
+                deadline = time.monotonic() + self.max_wait
+                while not item.taken and len(self._pending) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not item.taken:
+                    batch = self._take()
+        if batch:
+            self._run(batch)
+        return item.future.result()
+
+    def _take(self) -> List[_Pending]:
+        """Claim everything queued (caller holds the lock); the next arrival leads a new batch."""
+        batch, self._pending = self._pending, []
+        for pending in batch:
+            pending.taken = True
+        self._leader_waiting = False
+        return batch
+
+    def _run(self, batch: List[_Pending]) -> None:
+        started = time.perf_counter()
+        EMBED_BATCH_SIZE.observe(len(batch))
+        for pending in batch:
+            EMBED_BATCH_WAIT.observe(started - pending.queued_at)
+        try:
+            vectors = self.inner.embed_documents([p.text for p in batch])
+        except BaseException as exc:
+            for pending in batch:
+                pending.future.set_exception(exc)
+            return
+        for pending, vector in zip(batch, vectors):
+            pending.future.set_result(vector)
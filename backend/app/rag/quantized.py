@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+"""Compact in-process vector index for first-pass candidate search.
+
+Vectors are held as
+
+- ``float16``: half the memory of float32, near-lossless for unit vectors
+- ``int8``: a quarter of float32; each row is scaled by ``max(|v|) / 127``
+  and rounded, with the scale kept per vector
+
+plus the exact squared norm of every original vector. ``candidates`` ranks
+all rows by approximate squared L2 distance (Chroma's default metric) and
+returns the best ``k``. Callers rescore those candidates against the exact
+float32 vectors in the collection's own distance space, so quantization
+error only affects which rows reach the rescoring step, not the distances
+that are returned. (For normalized embeddings, L2, cosine and inner-product
+rankings agree.)
+
+The index is a copy kept next to Chroma's HNSW index, which still holds its
+own float32 vectors and graph; enabling it adds ``nbytes`` (roughly a half or
+a quarter of the raw vectors) per process rather than replacing anything.
+What it buys is a predictable, exact-recall candidate scan.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+PRECISIONS = ("float16", "int8")
+
+# Rows dequantized per matmul; bounds the float32 scratch space per query.
+_BLOCK_ROWS = 16384
+
+
+class QuantizedIndex:
+    def __init__(self, ids: Sequence[str], vectors: np.ndarray, precision: str = "int8") -> None:
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {', '.join(PRECISIONS)}")
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(ids) != vectors.shape[0]:
+            raise ValueError("vectors must be a (len(ids), dim) matrix")
+        self.ids: List[str] = list(ids)
+        self.precision = precision
+        self.dim = int(vectors.shape[1]) if vectors.size else 0
+        self._sq_norms = np.einsum("ij,ij->i", vectors, vectors).astype(np.float32)
+        if precision == "float16":
+            self._codes = vectors.astype(np.float16)
+            self._scales = None
+        else:
+            scales = np.abs(vectors).max(axis=1) / 127.0 if vectors.size else np.zeros(0)
+            scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+            self._codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+            self._scales = scales
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by codes, scales and norms."""
+        total = self._codes.nbytes + self._sq_norms.nbytes
+        if self._scales is not None:
+            total += self._scales.nbytes
+        return total
+
+    def candidates(self, query: Sequence[float], k: int) -> Tuple[List[str], np.ndarray]:
+        """(ids, approximate squared L2 distances) of the ``k`` nearest rows, nearest first."""
+        n = len(self.ids)
+        k = min(k, n)
+        if k <= 0:
+            return [], np.zeros(0, dtype=np.float32)
+        q = np.asarray(query, dtype=np.float32)
+        q_norm = float(q @ q)
+        best_idx = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=np.float32)
+        for start in range(0, n, _BLOCK_ROWS):
+            end = min(n, start + _BLOCK_ROWS)
+            dots = self._codes[start:end].astype(np.float32) @ q
+            if self._scales is not None:
+                dots *= self._scales[start:end]
+            dist = q_norm + self._sq_norms[start:end] - 2.0 * dots
+            if len(dist) > k:
+                keep = np.argpartition(dist, k - 1)[:k]
+            else:
+                keep = np.arange(len(dist))
+            best_idx = np.concatenate([best_idx, keep + start])
+            best_dist = np.concatenate([best_dist, dist[keep]])
+            if len(best_idx) > k:
+                top = np.argpartition(best_dist, k - 1)[:k]
+                best_idx, best_dist = best_idx[top], best_dist[top]
+        order = np.argsort(best_dist, kind="stable")
+        return [self.ids[i] for i in best_idx[order]], best_dist[order]
@@ -0,0 +1,354 @@
+from __future__ import annotations
+
+"""Binary snapshots of vector collections.
+
+A snapshot holds everything needed to rebuild a collection without
+re-embedding: ids, documents, metadata and the embedding matrix. Layout
+(all integers little-endian)::
+
+    MAGIC
+    payload    columns back to back:
+               ids, documents, metadatas - (count + 1) uint64 offsets, then UTF-8 bytes
+               embeddings                - contiguous count x dim float32/float16 matrix
+    manifest   JSON: collection, count, dim, dtype, embedding model, distance
+               space, column
+               offsets/lengths within the payload, sha256 of the payload
+    uint64     manifest length
+    MAGIC
+
+The manifest sits at the end so export can stream rows into the payload
+while hashing it. Restore verifies the checksum and the embedding-model
+stamp, then bulk-loads the rows in batches of up to Chroma's maximum.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+import uuid
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.rag.store import (
+    _get_provider,
+    add_embeddings,
+    collection_exists,
+    collection_space,
+    count_documents,
+    drop_collection,
+    get_collection,
+    iter_documents,
+    max_batch_size,
+    rename_collection,
+)
+
+
+MAGIC = b"ATSNAP1\n"
+FORMAT_VERSION = 1
+DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+_TEXT_COLUMNS = ("ids", "documents", "metadatas")
+_COPY_CHUNK = 1 << 20
+
+
+class SnapshotError(ValueError):
+    """The snapshot is unreadable, corrupt or does not fit the target."""
+
+
+class SnapshotNotFound(SnapshotError):
+    """The collection to export does not exist."""
+
+
+@dataclass
+class RestoreResult:
+    collection: str
+    restored: int
+    seconds: float
+
+
+def _copy_hashed(src: BinaryIO, dst: BinaryIO, digest: Any) -> int:
+    src.seek(0)
+    written = 0
+    while True:
+        chunk = src.read(_COPY_CHUNK)
+        if not chunk:
+            return written
+        digest.update(chunk)
+        dst.write(chunk)
+        written += len(chunk)
+
+
+def export_snapshot(
+    collection: str,
+    path: str | os.PathLike,
+    dtype: str = "float32",
+    batch_size: int = 1000,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """Write ``collection`` to ``path`` and return the manifest.
+
+    Rows are spooled column by column to temporary files, so memory use is
+    bounded by ``batch_size`` plus one uint64 offset per row and column.
+    """
+    if dtype not in DTYPES:
+        raise SnapshotError(f"dtype must be one of {', '.join(DTYPES)}")
+    if not collection_exists(collection):
+        raise SnapshotNotFound(f"collection {collection!r} does not exist")
+    np_dtype = DTYPES[dtype]
+    path = Path(path)
+    offsets = {name: array("Q", [0]) for name in _TEXT_COLUMNS}
+    spools = {name: tempfile.TemporaryFile() for name in (*_TEXT_COLUMNS, "embeddings")}
+    count, dim = 0, None
+    try:
+        for id_, text, meta, vector in iter_documents(
+            collection, batch_size=batch_size, include_embeddings=True
+        ):
+            if dim is None:
+                dim = len(vector)
+            elif len(vector) != dim:
+                raise SnapshotError(f"row {id_!r} has {len(vector)} dimensions, expected {dim}")
+            values = (id_, text or "", json.dumps(meta, ensure_ascii=False) if meta else "")
+            for name, value in zip(_TEXT_COLUMNS, values):
+                data = value.encode("utf-8")
+                spools[name].write(data)
+                offsets[name].append(offsets[name][-1] + len(data))
+            spools["embeddings"].write(np.asarray(vector, dtype=np_dtype).tobytes())
+            count += 1
+            if on_progress and count % batch_size == 0:
+                on_progress(count)
+
+        digest = hashlib.sha256()
+        columns: Dict[str, Dict[str, int]] = {}
+        tmp_path = path.with_name(path.name + ".tmp")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as out:
+            out.write(MAGIC)
+            position = 0
+            for name in _TEXT_COLUMNS:
+                header = np.asarray(offsets[name], dtype="<u8").tobytes()
+                digest.update(header)
+                out.write(header)
+                length = len(header) + _copy_hashed(spools[name], out, digest)
+                columns[name] = {"offset": position, "length": length}
+                position += length
+            length = _copy_hashed(spools["embeddings"], out, digest)
+            columns["embeddings"] = {"offset": position, "length": length}
+
+            manifest = {
+                "format_version": FORMAT_VERSION,
+                "collection": collection,
+                "count": count,
+                "dim": dim or 0,
+                "dtype": dtype,
+                "embedding_model": _get_provider().model_id,
+                "space": collection_space(collection),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "columns": columns,
+                "sha256": digest.hexdigest(),
+            }
+            raw = json.dumps(manifest).encode("utf-8")
+            out.write(raw)
+            out.write(struct.pack("<Q", len(raw)))
+            out.write(MAGIC)
+        os.replace(tmp_path, path)
+    finally:
+        for spool in spools.values():
+            spool.close()
+    return manifest
+
+
+def read_manifest(path: str | os.PathLike) -> Dict[str, Any]:
+    """Return the manifest of the snapshot at ``path`` without reading the payload."""
+    with open(path, "rb") as fh:
+        return _read_manifest(fh)[0]
+
+
+def _read_manifest(fh: BinaryIO) -> tuple[Dict[str, Any], int]:
+    """(manifest, payload length) of an open snapshot."""
+    footer = len(MAGIC) + 8
+    fh.seek(0, os.SEEK_END)
+    size = fh.tell()
+    if size < 2 * len(MAGIC) + 8:
+        raise SnapshotError("file is too small to be a snapshot")
+    fh.seek(0)
+    head = fh.read(len(MAGIC))
+    fh.seek(size - footer)
+    (manifest_len,) = struct.unpack("<Q", fh.read(8))
+    tail = fh.read(len(MAGIC))
+    if head != MAGIC or tail != MAGIC:
+        raise SnapshotError("not a vector snapshot (bad magic)")
+    payload_len = size - footer - manifest_len - len(MAGIC)
+    if payload_len < 0:
+        raise SnapshotError("snapshot manifest is truncated")
+    fh.seek(len(MAGIC) + payload_len)
+    try:
+        manifest = json.loads(fh.read(manifest_len))
+    except ValueError as exc:
+        raise SnapshotError(f"snapshot manifest is unreadable: {exc}") from exc
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format version {manifest.get('format_version')}")
+    return manifest, payload_len
+
+
+def _verify(fh: BinaryIO, payload_len: int, expected: str) -> None:
+    digest = hashlib.sha256()
+    fh.seek(len(MAGIC))
+    remaining = payload_len
+    while remaining:
+        chunk = fh.read(min(_COPY_CHUNK, remaining))
+        if not chunk:
+            break
+        digest.update(chunk)
+        remaining -= len(chunk)
+    if digest.hexdigest() != expected:
+        raise SnapshotError("checksum mismatch; the snapshot is corrupt or incomplete")
+
+
+def restore_snapshot(
+    path: str | os.PathLike,
+    collection: Optional[str] = None,
+    replace: bool = False,
+    allow_model_mismatch: bool = False,
+    batch_size: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> RestoreResult:
+    """Load a snapshot into ``collection`` (default: the collection it was taken from).
+
+    The target must be empty unless ``replace`` is set, in which case it is
+    replaced once the whole snapshot has loaded. The snapshot's embedding
+    model must match the configured provider, since query vectors would
+    otherwise live in a different space.
+    """
+    started = time.perf_counter()
+    with open(path, "rb") as fh:
+        manifest, payload_len = _read_manifest(fh)
+        _verify(fh, payload_len, manifest["sha256"])
+
+    target = collection or manifest["collection"]
+    current_model = _get_provider().model_id
+    if manifest["embedding_model"] != current_model and not allow_model_mismatch:
+        raise SnapshotError(
+            f"snapshot was embedded with {manifest['embedding_model']!r} but the configured "
+            f"provider is {current_model!r}"
+        )
+    _check_layout(path, manifest, payload_len)
+    if not replace and count_documents(target):
+        raise SnapshotError(f"collection {target!r} is not empty; restore with replace=true")
+
+    # Rows are loaded into a staging collection (created with the snapshot's
+    # distance space) and swapped in only once every batch has been written,
+    # so a failed restore leaves the target untouched.
+    staging = f"{target}__restore_{uuid.uuid4().hex[:8]}"
+    index = {"space": manifest["space"]} if manifest.get("space") else None
+    get_collection(staging, index=index)
+    try:
+        _load_rows(path, manifest, staging, batch_size, on_progress)
+    except BaseException:
+        drop_collection(staging)
+        raise
+    finish_restore(staging, target)
+    return RestoreResult(
+        collection=target, restored=manifest["count"], seconds=time.perf_counter() - started
+    )
+
+
+def finish_restore(staging: str, target: str) -> None:
+    """Swap a fully loaded ``staging`` collection in as ``target``.
+
+    Chroma cannot rename over an existing collection, so the target is
+    dropped first; the two steps are not atomic. If either fails the staging
+    collection is kept and calling this again completes the swap.
+    """
+    if not collection_exists(staging):
+        raise SnapshotNotFound(f"staging collection {staging!r} does not exist")
+    try:
+        drop_collection(target)
+        rename_collection(staging, target)
+    except Exception as e:
+        raise SnapshotError(
+            f"snapshot loaded into {staging!r} but swapping it in as {target!r} failed ({e}); "
+            f"the staging collection was kept; run `kb_snapshot.py finish {staging} {target}` to retry"
+        ) from e
+
+
+def _check_layout(path: str | os.PathLike, manifest: Dict[str, Any], payload_len: int) -> None:
+    """Make sure the manifest's columns fit the payload before anything is written."""
+    try:
+        count, dim, dtype = int(manifest["count"]), int(manifest["dim"]), manifest["dtype"]
+        columns = {name: manifest["columns"][name] for name in (*_TEXT_COLUMNS, "embeddings")}
+    except (KeyError, TypeError, ValueError) as exc:
+        raise SnapshotError(f"snapshot manifest is incomplete: {exc}") from exc
+    if dtype not in DTYPES:
+        raise SnapshotError(f"unsupported snapshot dtype {dtype!r}")
+    if count and dim <= 0:
+        raise SnapshotError("snapshot has rows but no embedding dimension")
+    for name, col in columns.items():
+        if col["offset"] < 0 or col["offset"] + col["length"] > payload_len:
+            raise SnapshotError(f"column {name!r} lies outside the payload")
+    if columns["embeddings"]["length"] != count * dim * DTYPES[dtype].itemsize:
+        raise SnapshotError("embedding matrix size does not match count x dim")
+    base = len(MAGIC)
+    for name in _TEXT_COLUMNS:
+        col = columns[name]
+        header = (count + 1) * 8
+        if col["length"] < header:
+            raise SnapshotError(f"column {name!r} is truncated")
+        offs = np.memmap(path, dtype="<u8", mode="r", offset=base + col["offset"], shape=(count + 1,))
+        if int(offs[0]) != 0 or int(offs[-1]) != col["length"] - header or np.any(offs[1:] < offs[:-1]):
+            raise SnapshotError(f"column {name!r} has inconsistent offsets")
+
+
+def _load_rows(
+    path: str | os.PathLike,
+    manifest: Dict[str, Any],
+    collection: str,
+    batch_size: Optional[int],
+    on_progress: Optional[Callable[[int, int], None]],
+) -> None:
+    count, dim = manifest["count"], manifest["dim"]
+    columns = manifest["columns"]
+    base = len(MAGIC)
+    step = min(batch_size or max_batch_size(), max_batch_size())
+    if not count:
+        return
+
+    def text_column(name: str) -> tuple[np.ndarray, int]:
+        col = columns[name]
+        offs = np.memmap(path, dtype="<u8", mode="r", offset=base + col["offset"], shape=(count + 1,))
+        return offs, base + col["offset"] + (count + 1) * 8
+
+    ids_offs, ids_start = text_column("ids")
+    docs_offs, docs_start = text_column("documents")
+    metas_offs, metas_start = text_column("metadatas")
+    matrix = np.memmap(
+        path,
+        dtype=DTYPES[manifest["dtype"]],
+        mode="r",
+        offset=base + columns["embeddings"]["offset"],
+        shape=(count, dim),
+    )
+
+    def read_strings(fh: BinaryIO, offs: np.ndarray, start: int, lo: int, hi: int) -> List[str]:
+        first, last = int(offs[lo]), int(offs[hi])
+        fh.seek(start + first)
+        blob = fh.read(last - first)
+        return [
+            blob[int(offs[i]) - first : int(offs[i + 1]) - first].decode("utf-8") for i in range(lo, hi)
+        ]
+
+    with open(path, "rb") as fh:
+        for lo in range(0, count, step):
+            hi = min(count, lo + step)
+            ids = read_strings(fh, ids_offs, ids_start, lo, hi)
+            docs = [d or None for d in read_strings(fh, docs_offs, docs_start, lo, hi)]
+            metas = [json.loads(m) if m else None for m in read_strings(fh, metas_offs, metas_start, lo, hi)]
+            vectors = np.ascontiguousarray(matrix[lo:hi], dtype=np.float32)
+            add_embeddings(ids, docs, vectors, metas, collection=collection)
+            if on_progress:
+                on_progress(hi, count)
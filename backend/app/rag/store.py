@@ -2,14 +2,24 @@ from __future__ import annotations
 
 """Chroma persistent store helpers for Lesson 4."""
 
+import contextvars
 import numbers
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 import chromadb
 from chromadb import Settings as ChromaSettings
 from chromadb.api.models.Collection import Collection
+from chromadb.errors import NotFoundError
 
+from app.core.cache import SingleFlight, TTLCache
 from app.core.config import get_settings
+from app.core.metrics import instrument, register_cache, timed
+from app.rag.microbatch import MicroBatchingEmbedding
+from app.rag.quantized import PRECISIONS, QuantizedIndex
 from app.rag.embeddings import (
     EmbeddingProvider,
     SentenceTransformerEmbedding,
@@ -19,6 +29,37 @@ from app.rag.embeddings import (
 
 _client: chromadb.PersistentClient | None = None
 _provider: EmbeddingProvider | None = None
+# Collection sizes, dropped on every write through this module; the TTL bounds
+# staleness when another process (CLI import, second worker) writes the store.
+_counts: TTLCache[str, int] = TTLCache(maxsize=256, ttl=60)
+register_cache("kb_count", _counts)
+# Collection handles; dropped when this process deletes or reconfigures a
+# collection, and expired so deletes from other processes are picked up.
+_collections: TTLCache[str, Collection] = TTLCache(
+    maxsize=256, ttl=get_settings().kb_collection_cache_ttl_seconds
+)
+register_cache("kb_collection", _collections)
+# Quantized in-process indexes per (collection, precision). Local writes drop
+# them; writes from other processes are caught by the size check against
+# count_documents and, for same-size updates, by the TTL.
+_indexes: TTLCache[Tuple[str, str], QuantizedIndex] = TTLCache(
+    maxsize=32, ttl=get_settings().vector_search_index_ttl_seconds
+)
+register_cache("kb_quantized_index", _indexes)
+_index_builds: SingleFlight[Tuple[str, str, int], QuantizedIndex] = SingleFlight()
+# Bumped on every local write so a build that raced a write is not cached
+_generations: Dict[str, int] = {}
+
+# (ids, documents, metadatas, distances), nearest first
+SearchResult = Tuple[List[str], List[str], List[Dict[str, Any] | None], List[float]]
+
+
+def _invalidate(collection: str) -> None:
+    """Forget cached state derived from ``collection`` after a write."""
+    _counts.pop(collection)
+    _generations[collection] = _generations.get(collection, 0) + 1
+    for precision in PRECISIONS:
+        _indexes.pop((collection, precision))
 
 
 def _get_client() -> chromadb.PersistentClient:
@@ -36,31 +77,94 @@ def _get_provider() -> EmbeddingProvider:
     global _provider
     if _provider is None:
         settings = get_settings()
+        st_options = {
+            "backend": settings.embedding_backend,
+            "batch_size": settings.embedding_batch_size,
+            "threads": settings.embedding_threads,
+        }
         # If user specifies a ST model and package is available, use it
         if settings.sentence_transformers_model:
             try:
-                _provider = SentenceTransformerEmbedding(model_name=settings.sentence_transformers_model)
+                _provider = SentenceTransformerEmbedding(
+                    model_name=settings.sentence_transformers_model, **st_options
+                )
             except Exception:
-                _provider = get_default_provider()
+                _provider = get_default_provider(**st_options)
         else:
-            _provider = get_default_provider()
+            _provider = get_default_provider(**st_options)
+        if settings.embedding_query_batch_wait_ms > 0:
+            _provider = MicroBatchingEmbedding(
+                _provider,
+                max_wait_ms=settings.embedding_query_batch_wait_ms,
+                max_batch_size=settings.embedding_query_batch_size,
+            )
     return _provider
 
 
-def get_collection(name: str = "kb_main") -> Collection:
-    client = _get_client()
-    # We embed outside and pass embeddings explicitly, so no server-side embedding fn is needed.
-    col = client.get_or_create_collection(name=name)
+def _hnsw_configuration(index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Chroma HNSW settings for a new collection: Settings defaults, then ``index`` overrides.
+
+    ``index`` uses the ingest request's field names (space, m, construction_ef, search_ef).
+    """
+    settings = get_settings()
+    values = {
+        "space": settings.kb_distance_space,
+        "m": settings.kb_hnsw_m,
+        "construction_ef": settings.kb_hnsw_construction_ef,
+        "search_ef": settings.kb_hnsw_search_ef,
+    }
+    values.update({k: v for k, v in (index or {}).items() if v is not None})
+    chroma_names = {"space": "space", "m": "max_neighbors", "construction_ef": "ef_construction", "search_ef": "ef_search"}
+    return {chroma_names[k]: v for k, v in values.items() if v is not None}
+
+
+def get_collection(name: str = "kb_main", index: Optional[Dict[str, Any]] = None) -> Collection:
+    """Cached handle for ``name``, creating the collection if needed.
+
+    ``index`` (HNSW space/M/ef) only applies when the collection is created;
+    existing collections keep the parameters they were built with.
+    """
+    col = _collections.get(name)
+    if col is None:
+        # We embed outside and pass embeddings explicitly, so no server-side embedding fn is needed.
+        col = _get_client().get_or_create_collection(
+            name=name, configuration={"hnsw": _hnsw_configuration(index)}
+        )
+        _collections.set(name, col)
     return col
 
 
+def collection_exists(name: str) -> bool:
+    """Whether ``name`` exists, without creating it."""
+    if _collections.get(name) is not None:
+        return True
+    try:
+        _get_client().get_collection(name)
+    except NotFoundError:
+        return False
+    return True
+
+
+def collection_space(collection: str) -> str:
+    """Distance function of ``collection`` ("l2", "cosine" or "ip")."""
+    config = get_collection(collection).configuration or {}
+    return (config.get("hnsw") or {}).get("space") or "l2"
+
+
+def set_search_ef(collection: str, search_ef: int) -> None:
+    """Change the query-time HNSW ``ef`` of an existing collection (persisted by Chroma)."""
+    get_collection(collection).modify(configuration={"hnsw": {"ef_search": search_ef}})
+    _collections.pop(collection)
+
+
 def add_documents(
     texts: List[str],
     ids: Optional[List[str]] = None,
     metadatas: Optional[List[Dict[str, Any]]] = None,
     collection: str = "kb_main",
+    index: Optional[Dict[str, Any]] = None,
 ) -> List[str]:
-    col = get_collection(collection)
+    col = get_collection(collection, index=index)
     provider = _get_provider()
     embeddings = provider.embed_documents(texts)
     # Ensure IDs are present
@@ -78,35 +182,145 @@ def add_documents(
             metas_to_send = norm
         else:
             metas_to_send = None
-    col.add(documents=texts, embeddings=embeddings, ids=ids, metadatas=metas_to_send)
+    with timed("vector_add"):
+        col.add(documents=texts, embeddings=embeddings, ids=ids, metadatas=metas_to_send)
+    _invalidate(collection)
     return ids
 
 
-def similarity_search(
-    query: str,
-    n_results: int = 5,
+def add_embeddings(
+    ids: List[str],
+    texts: List[str | None],
+    embeddings: Any,
+    metadatas: Optional[List[Dict[str, Any] | None]] = None,
     collection: str = "kb_main",
-    distance_threshold: Optional[float] = None,
-) -> Tuple[List[str], List[str], List[Dict[str, Any] | None], List[float]]:
-    col = get_collection(collection)
-    provider = _get_provider()
-    qvec = provider.embed_query(query)
-    res = col.query(
-        query_embeddings=[qvec],
-        n_results=n_results,
-        include=["documents", "metadatas", "distances"],
+    index: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Write precomputed vectors (e.g. from a snapshot) without embedding anything."""
+    col = get_collection(collection, index=index)
+    if metadatas is not None and not any(metadatas):
+        metadatas = None
+    with timed("vector_add"):
+        col.add(ids=ids, documents=texts, embeddings=embeddings, metadatas=metadatas)
+    _invalidate(collection)
+
+
+def drop_collection(collection: str) -> None:
+    """Delete a collection and everything in it (no-op if it does not exist)."""
+    try:
+        _get_client().delete_collection(collection)
+    except NotFoundError:
+        pass
+    _collections.pop(collection)
+    _invalidate(collection)
+
+
+def rename_collection(old: str, new: str) -> None:
+    """Rename ``old`` to ``new``; ``new`` must not exist."""
+    get_collection(old).modify(name=new)
+    for name in (old, new):
+        _collections.pop(name)
+        _invalidate(name)
+
+
+def max_batch_size() -> int:
+    """Largest number of rows Chroma accepts in a single add."""
+    return int(_get_client().get_max_batch_size())
+
+
+def _build_quantized_index(collection: str, precision: str) -> QuantizedIndex:
+    ids: List[str] = []
+    rows: List[np.ndarray] = []
+    for id_, _doc, _meta, vector in iter_documents(collection, batch_size=2000, include_embeddings=True):
+        ids.append(id_)
+        rows.append(vector)
+    matrix = np.stack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+    return QuantizedIndex(ids, matrix, precision=precision)
+
+
+def _get_quantized_index(collection: str, precision: str) -> QuantizedIndex:
+    """Cached index for ``collection``; concurrent misses share one full scan."""
+    key = (collection, precision)
+    index = _indexes.get(key)
+    if index is not None and len(index) == count_documents(collection):
+        return index
+    generation = _generations.get(collection, 0)
+
+    def store_if_current(built: QuantizedIndex) -> None:
+        if _generations.get(collection, 0) == generation:
+            _indexes.set(key, built)
+
+    index, _shared = _index_builds.do(
+        (collection, precision, generation),
+        lambda: _build_quantized_index(collection, precision),
+        on_done=store_if_current,
+    )
+    return index
+
+
+def exact_distances(vectors: np.ndarray, query: np.ndarray, space: str = "l2") -> np.ndarray:
+    """Distances as Chroma reports them: squared L2, 1 - cosine similarity, or 1 - dot product."""
+    if space == "l2":
+        diff = vectors - query
+        return np.einsum("ij,ij->i", diff, diff)
+    dots = vectors @ query
+    if space == "ip":
+        return 1.0 - dots
+    norms = np.linalg.norm(vectors, axis=1) * float(np.linalg.norm(query))
+    return 1.0 - dots / np.where(norms > 0, norms, 1.0)
+
+
+def _quantized_query(
+    col: Collection, collection: str, qvec: Any, n_results: int, precision: str
+) -> SearchResult:
+    """Top ``n_results`` via the quantized index, rescored with Chroma's float32 vectors."""
+    index = _get_quantized_index(collection, precision)
+    factor = max(1, get_settings().vector_search_rescore_factor)
+    with timed("vector_query"):
+        candidates, _approx = index.candidates(qvec, n_results * factor)
+    if not candidates:
+        return [], [], [], []
+    with timed("vector_rescore"):
+        res = col.get(ids=candidates, include=["embeddings", "documents", "metadatas"])
+        exact = np.asarray(res["embeddings"], dtype=np.float32)
+        dists = exact_distances(exact, np.asarray(qvec, dtype=np.float32), collection_space(collection))
+        order = np.argsort(dists, kind="stable")[:n_results]
+    docs = res.get("documents") or [None] * len(res["ids"])
+    metas = res.get("metadatas") or [None] * len(res["ids"])
+    return (
+        [res["ids"][i] for i in order],
+        [docs[i] for i in order],
+        [metas[i] for i in order],
+        [float(dists[i]) for i in order],
     )
 
-    def _extract_first(key: str) -> list:
-        v = res.get(key)
-        if isinstance(v, list) and v and isinstance(v[0], list):
-            return v[0]
-        return []
 
-    ids = _extract_first("ids")
-    docs = _extract_first("documents")
-    metas = _extract_first("metadatas")
-    dists = _extract_first("distances")
+def _query_vector(
+    collection: str, qvec: Any, n_results: int, distance_threshold: Optional[float] = None
+) -> SearchResult:
+    """Nearest chunks in one collection for an already-embedded query."""
+    col = get_collection(collection)
+    precision = get_settings().vector_search_quantization
+    if precision:
+        ids, docs, metas, dists = _quantized_query(col, collection, qvec, n_results, precision)
+    else:
+        with timed("vector_query"):
+            res = col.query(
+                query_embeddings=[qvec],
+                n_results=n_results,
+                include=["documents", "metadatas", "distances"],
+            )
+
+        def _extract_first(key: str) -> list:
+            v = res.get(key)
+            if isinstance(v, list) and v and isinstance(v[0], list):
+                return v[0]
+            return []
+
+        ids = _extract_first("ids")
+        docs = _extract_first("documents")
+        metas = _extract_first("metadatas")
+        dists = _extract_first("distances")
     # Ensure lengths align; pad distances with a high value for poor matches if needed
     if len(dists) < len(docs):
         dists = dists + [2.0] * (len(docs) - len(dists))
@@ -127,14 +341,101 @@ def similarity_search(
     return ids, docs, metas, dists
 
 
+@instrument("similarity_search")
+def similarity_search(
+    query: str,
+    n_results: int = 5,
+    collection: str = "kb_main",
+    distance_threshold: Optional[float] = None,
+) -> SearchResult:
+    qvec = _get_provider().embed_query(query)
+    return _query_vector(collection, qvec, n_results, distance_threshold)
+
+
+_fanout_pool: ThreadPoolExecutor | None = None
+_fanout_lock = threading.Lock()
+
+
+def _get_fanout_pool() -> ThreadPoolExecutor:
+    global _fanout_pool
+    with _fanout_lock:
+        if _fanout_pool is None:
+            _fanout_pool = ThreadPoolExecutor(
+                max_workers=get_settings().kb_search_fanout_workers, thread_name_prefix="kb-fanout"
+            )
+        return _fanout_pool
+
+
+@instrument("similarity_search")
+def similarity_search_many(
+    query: str,
+    collections: Sequence[str],
+    n_results: int = 5,
+    distance_threshold: Optional[float] = None,
+    normalize: str = "none",
+) -> SearchResult:
+    """Global top ``n_results`` across several collections.
+
+    The query is embedded once and every collection is queried concurrently,
+    so latency tracks the slowest collection rather than the sum. Each
+    result's metadata gains a ``collection`` key. ``normalize="minmax"``
+    rescales distances to [0, 1] within each collection before merging, for
+    collections whose distance ranges differ; returned distances stay raw.
+    """
+    if normalize not in ("none", "minmax"):
+        raise ValueError("normalize must be 'none' or 'minmax'")
+    names = list(dict.fromkeys(collections))
+    if not names:
+        return [], [], [], []
+    qvec = _get_provider().embed_query(query)
+    if len(names) == 1:
+        per_collection = [_query_vector(names[0], qvec, n_results, distance_threshold)]
+    else:
+        pool = _get_fanout_pool()
+        # copy_context keeps per-request stage timings (Server-Timing) attached to worker threads
+        futures = [
+            pool.submit(contextvars.copy_context().run, _query_vector, name, qvec, n_results, distance_threshold)
+            for name in names
+        ]
+        per_collection = [f.result() for f in futures]
+
+    merged = []
+    for name, (ids, docs, metas, dists) in zip(names, per_collection):
+        keys = list(dists)
+        if normalize == "minmax" and dists:
+            low, high = min(dists), max(dists)
+            keys = [(d - low) / (high - low) if high > low else 0.0 for d in dists]
+        for key, id_val, doc, meta, dist in zip(keys, ids, docs, metas, dists):
+            merged.append((key, dist, id_val, doc, {**(meta or {}), "collection": name}))
+    merged.sort(key=lambda row: (row[0], row[1]))
+    top = merged[:n_results]
+    return (
+        [row[2] for row in top],
+        [row[3] for row in top],
+        [row[4] for row in top],
+        [row[1] for row in top],
+    )
+
+
 def delete_by_ids(ids: List[str], collection: str = "kb_main") -> int:
     col = get_collection(collection)
     before = col.count() or 0
     col.delete(ids=ids)
     after = col.count() or 0
+    _invalidate(collection)
+    _counts.set(collection, after)
     return max(0, before - after)
 
 
+def count_documents(collection: str = "kb_main") -> int:
+    """Number of chunks in the collection, cached until the next write."""
+    total = _counts.get(collection)
+    if total is None:
+        total = int(get_collection(collection).count() or 0)
+        _counts.set(collection, total)
+    return total
+
+
 def list_documents(
     collection: str = "kb_main", limit: int = 20, offset: int = 0
 ) -> Tuple[List[str], List[str | None], List[Dict[str, Any] | None], int]:
@@ -143,9 +444,43 @@ def list_documents(
     Uses Chroma's Collection.get with pagination.
     """
     col = get_collection(collection)
-    total = col.count() or 0
     res = col.get(limit=limit, offset=offset, include=["documents", "metadatas"])
     ids = res.get("ids", []) or []
     docs = res.get("documents", []) or []
     metas = res.get("metadatas", []) or []
-    return ids, docs, metas, int(total)
+    return ids, docs, metas, count_documents(collection)
+
+
+def iter_documents(
+    collection: str = "kb_main",
+    batch_size: int = 500,
+    include_embeddings: bool = False,
+    start: int = 0,
+) -> Iterator[Tuple[str, str | None, Dict[str, Any] | None, np.ndarray | None]]:
+    """Yield (id, document, metadata, embedding) for every chunk from position ``start``.
+
+    Reads ``batch_size`` rows per Chroma call and holds one batch at a time,
+    so memory stays flat however large the collection is. ``embedding`` is
+    a float32 array, or None unless ``include_embeddings`` is set. Chroma has no keyset
+    pagination, so positions are offsets in its insertion order; rows
+    written behind the current position during iteration may be skipped.
+    """
+    col = get_collection(collection)
+    include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+    offset = start
+    while True:
+        res = col.get(limit=batch_size, offset=offset, include=include)
+        ids = res.get("ids") or []
+        if not ids:
+            return
+        docs = res.get("documents") or [None] * len(ids)
+        metas = res.get("metadatas") or [None] * len(ids)
+        embeddings = res.get("embeddings") if include_embeddings else None
+        for i, id_ in enumerate(ids):
+            vector = None
+            if embeddings is not None:
+                vector = np.asarray(embeddings[i], dtype=np.float32)
+            yield id_, docs[i], metas[i], vector
+        if len(ids) < batch_size:
+            return
+        offset += len(ids)
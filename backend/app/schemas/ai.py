@@ -2,16 +2,27 @@ from __future__ import annotations
 
 """Pydantic schemas for AI-related APIs (Lesson 5)."""
 
-from typing import List, Literal
+from datetime import datetime
+from typing import Dict, List, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TicketAISuggestionRequest(BaseModel):
     """Request body for generating a ticket AI suggestion."""
 
     collection: str = Field(default="kb_main", description="Knowledge base collection name")
+    collections: List[str] | None = Field(
+        default=None,
+        min_length=1,
+        max_length=20,
+        description="Search several collections concurrently and merge results (overrides collection).",
+    )
     n_results: int = Field(default=3, ge=1, le=10, description="Number of KB snippets to retrieve")
+    use_precomputed: bool = Field(
+        default=True,
+        description="Serve a fresh precomputed suggestion when AI_PRECOMPUTE_SUGGESTIONS is on.",
+    )
     # Optional per-request LLM overrides (frontend demo only)
     provider: str | None = Field(
         default=None,
@@ -41,6 +52,63 @@ class TicketAISuggestionResponse(BaseModel):
     suggested_tags: List[str]
     ai_reply: str
     kb_snippets: List[str]
+    timings: Dict[str, float] = Field(default_factory=dict, description="Seconds per pipeline stage")
+    precomputed: bool = Field(default=False, description="Served from a stored background suggestion")
+
+
+class SuggestionBatchCreate(BaseModel):
+    """Start a batch AI-suggestion run over tickets matching the filters."""
+
+    status: Literal["open", "in_progress", "resolved", "closed"] | None = "open"
+    priority: Literal["low", "medium", "high", "urgent"] | None = None
+    ticket_ids: List[int] | None = None
+    created_after: datetime | None = None
+    limit: int | None = Field(default=None, ge=1)
+    only_missing: bool = Field(default=False, description="Skip tickets that already have a suggestion")
+    collection: str = Field(default="kb_main", description="Knowledge base collection name")
+    n_results: int = Field(default=3, ge=1, le=10)
+    concurrency: int | None = Field(default=None, ge=1, le=64)
+    requests_per_minute: int | None = Field(default=None, ge=1)
+    provider: str | None = None
+    base_url: str | None = None
+    model: str | None = None
+    api_key: str | None = Field(
+        default=None, description="Not supported: batches run as background jobs with backend credentials."
+    )
+
+
+class SuggestionBatchRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: str
+    total: int
+    completed: int
+    failed: int
+    stage_seconds: Dict[str, float] | None = None
+    filters: dict | None = None
+    error: str | None = None
+    job_id: int | None = None
+    created_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class TicketSuggestionRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    ticket_id: int
+    batch_id: int | None = None
+    category: str | None = None
+    confidence: float | None = None
+    suggested_priority: str | None = None
+    suggested_tags: List[str] | None = None
+    ai_reply: str | None = None
+    kb_snippets: List[str] | None = None
+    timings: Dict[str, float] | None = None
+    error: str | None = None
+    version: str | None = None
+    created_at: datetime | None = None
 
 
 class ChatMessage(BaseModel):
@@ -55,6 +123,12 @@ class ChatRequest(BaseModel):
 
     query: str
     collection: str = Field(default="kb_main", description="Knowledge base collection name")
+    collections: List[str] | None = Field(
+        default=None,
+        min_length=1,
+        max_length=20,
+        description="Search several collections concurrently and merge results (overrides collection).",
+    )
     n_results: int = Field(default=4, ge=1, le=10, description="Number of KB snippets to retrieve")
     distance_threshold: float | None = Field(
         default=None,
@@ -90,3 +164,22 @@ class ChatResponse(BaseModel):
     kb_sources: List[str]
     kb_snippets: List[str]
 
+
+class LLMEndpointHealth(BaseModel):
+    """Routing statistics for one configured LLM endpoint."""
+
+    name: str
+    base_url: str
+    model: str | None = None
+    weight: float
+    healthy: bool = Field(description="False while cooling down after a 429/5xx")
+    cooldown_remaining_s: float
+    ewma_latency_ms: float | None = None
+    p95_latency_ms: float | None = None
+    requests: int
+    successes: int
+    failures: int
+    rate_limited: int
+    hedges_won: int
+    in_flight: int
+    last_error: str | None = None
@@ -14,6 +14,15 @@ class KBDocument(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class KBIndexConfig(BaseModel):
+    """HNSW parameters; only applied when the ingest creates the collection."""
+
+    space: Literal["l2", "cosine", "ip"] | None = None
+    m: int | None = Field(default=None, ge=2, le=256)
+    construction_ef: int | None = Field(default=None, ge=1, le=4096)
+    search_ef: int | None = Field(default=None, ge=1, le=4096)
+
+
 class KBIngestRequest(BaseModel):
     collection: str = Field(default="kb_main", min_length=1)
     chunk: bool = True
@@ -21,6 +30,8 @@ class KBIngestRequest(BaseModel):
     overlap: int = 80
     chunk_strategy: Literal["window", "punctuation"] = "window"
     delimiters: str | None = None
+    # Overrides the KB_HNSW_* / KB_DISTANCE_SPACE settings for a new collection
+    index: Optional[KBIndexConfig] = None
     documents: List[KBDocument]
 
 
@@ -32,6 +43,10 @@ class KBIngestResponse(BaseModel):
 
 class KBQueryRequest(BaseModel):
     collection: str = Field(default="kb_main", min_length=1)
+    # Search several collections at once (overrides ``collection``); results are merged
+    collections: Optional[List[str]] = Field(default=None, min_length=1, max_length=20)
+    # "minmax": rescale distances per collection before merging
+    normalize: Literal["none", "minmax"] = "none"
     query: str = Field(min_length=1)
     n_results: int = 5
 
@@ -41,10 +56,12 @@ class KBMatch(BaseModel):
     text: str
     metadata: Optional[Dict[str, Any]] = None
     distance: float | None = None
+    collection: str | None = None
 
 
 class KBQueryResponse(BaseModel):
     collection: str
+    collections: List[str] = Field(default_factory=list)
     query: str
     matches: List[KBMatch]
 
@@ -69,3 +86,34 @@ class KBListResponse(BaseModel):
     collection: str
     total: int
     items: List[KBItem]
+    next_cursor: str | None = None
+
+
+class KBSnapshotCreate(BaseModel):
+    collection: str = Field(default="kb_main", min_length=1)
+    dtype: Literal["float32", "float16"] = "float32"
+
+
+class KBSnapshotInfo(BaseModel):
+    name: str
+    size_bytes: int
+    collection: str
+    count: int
+    dim: int
+    dtype: str
+    embedding_model: str
+    created_at: str
+    sha256: str
+
+
+class KBSnapshotRestoreRequest(BaseModel):
+    # Defaults to the collection the snapshot was taken from
+    collection: str | None = None
+    replace: bool = False
+    allow_model_mismatch: bool = False
+
+
+class KBSnapshotRestoreResponse(BaseModel):
+    collection: str
+    restored: int
+    seconds: float
@@ -56,3 +56,19 @@ class ReplyRead(ReplyBase):
     author_id: int
     created_at: datetime | None = None
 
+
+
+class TicketImportError(BaseModel):
+    record: int
+    error: str
+
+
+class TicketImportResponse(BaseModel):
+    kind: Literal["tickets", "messages"]
+    records_read: int
+    inserted: int
+    rejected: int
+    skipped: int
+    elapsed_seconds: float
+    rows_per_second: float
+    errors: list[TicketImportError]
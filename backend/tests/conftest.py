@@ -1,8 +1,27 @@
 import os
 import sys
 
+import pytest
+
 # Ensure 'backend/app' package is importable when pytest sets rootdir at repo root
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """Point the KB store at a fresh Chroma directory for one test."""
+    from app.core.config import get_settings
+    from app.rag import store
+
+    def clear_caches():
+        store._collections.clear()
+        store._counts.clear()
+        store._indexes.clear()
+
+    monkeypatch.setattr(get_settings(), "vector_store_path", str(tmp_path / "vector_store"))
+    monkeypatch.setattr(store, "_client", None)
+    clear_caches()
+    yield store
+    clear_caches()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.ai.llm as llm
+from app.ai.admission import (
+    BATCH,
+    INTERACTIVE,
+    AdmissionController,
+    AdmissionRejected,
+    _ClassState,
+    admission_class,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+def _controller(limit=1, max_queue=1, timeout=2.0):
+    return AdmissionController(
+        {
+            INTERACTIVE: _ClassState(limit=limit, max_queue=max_queue, queue_timeout=timeout),
+            BATCH: _ClassState(limit=1, max_queue=10, queue_timeout=timeout),
+        }
+    )
+
+
+def _hold_slot(controller, release, traffic_class=None):
+    entered = threading.Event()
+
+    def run():
+        with controller.slot(traffic_class):
+            entered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert entered.wait(2)
+    return thread
+
+
+def _wait_for_queued(controller, name, count):
+    deadline = time.time() + 2
+    while controller.snapshot()[name]["queued"] < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_queue_is_shed_with_retry_after():
+    controller = _controller(limit=1, max_queue=1)
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+
+    def wait_for_slot():
+        with controller.slot():
+            pass
+
+    waiter = threading.Thread(target=wait_for_slot)
+    waiter.start()
+    _wait_for_queued(controller, INTERACTIVE, 1)
+
+    with pytest.raises(AdmissionRejected) as info:
+        with controller.slot():
+            pass
+    assert info.value.reason == "queue_full"
+    assert info.value.retry_after >= 1
+
+    release.set()
+    holder.join()
+    waiter.join()
+
+
+def test_queued_request_times_out():
+    controller = _controller(limit=1, max_queue=4, timeout=0.05)
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+    with pytest.raises(AdmissionRejected) as info:
+        with controller.slot():
+            pass
+    assert info.value.reason == "queue_timeout"
+    assert controller.snapshot()[INTERACTIVE]["queued"] == 0
+    release.set()
+    holder.join()
+
+
+def test_batch_class_does_not_consume_interactive_slots():
+    controller = _controller(limit=1, max_queue=0, timeout=0.05)
+    release = threading.Event()
+    holder = _hold_slot(controller, release, BATCH)
+    with admission_class(INTERACTIVE):
+        with controller.slot():
+            assert controller.snapshot()[BATCH]["active"] == 1
+            assert controller.snapshot()[INTERACTIVE]["active"] == 1
+    release.set()
+    holder.join()
+
+
+def test_saturated_chat_returns_429_and_health_reports_depth(monkeypatch):
+    controller = _controller(limit=1, max_queue=0)
+    monkeypatch.setattr(llm, "get_admission_controller", lambda: controller)
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "answer")
+    llm._results.clear()
+    release = threading.Event()
+    holder = _hold_slot(controller, release)
+    try:
+        r = client.post("/api/ai/chat", json={"query": "reset password admission test"})
+        assert r.status_code == 429
+        assert int(r.headers["retry-after"]) >= 1
+
+        health = client.get("/health").json()
+        assert set(health["llm_admission"]) == {INTERACTIVE, BATCH}
+    finally:
+        release.set()
+        holder.join()
+
+    r = client.post("/api/ai/chat", json={"query": "reset password admission test"})
+    assert r.status_code == 200
+    assert r.json()["answer"] == "answer"
+    llm._results.clear()
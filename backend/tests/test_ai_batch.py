@@ -0,0 +1,152 @@
+import asyncio
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+import app.ai.llm as llm
+import app.jobs.handlers  # noqa: F401  registers the ai.batch handler
+from app.ai.batch import (
+    BatchFilters,
+    BatchOptions,
+    BatchSuggestionRunner,
+    TokenBucket,
+    cancel_batch,
+    create_batch,
+)
+from app.db.models import Job, SuggestionBatch, Ticket, TicketSuggestion, User
+from app.db.session import session_scope
+from app.jobs.worker import JobWorkerPool
+from app.main import app
+
+client = TestClient(app)
+
+
+def _seed_tickets(n: int) -> list[int]:
+    with session_scope() as session:
+        tag = uuid.uuid4().hex[:8]
+        user = User(email=f"batch_{tag}@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        tickets = [
+            Ticket(title=f"Refund {i} ({tag})", content="I was charged twice", requester_id=user.id)
+            for i in range(n)
+        ]
+        session.add_all(tickets)
+        session.commit()
+        return [t.id for t in tickets]
+
+
+def test_batch_runner_persists_suggestions_with_stage_timings(monkeypatch):
+    calls = []
+
+    def fake_llm(prompt, override=None, system_prompt=""):
+        calls.append(prompt)
+        return "Draft reply"
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", fake_llm)
+    ticket_ids = _seed_tickets(5)
+    options = BatchOptions(concurrency=3, requests_per_minute=6000)
+    with session_scope() as session:
+        batch_id, selected = create_batch(
+            session, BatchFilters(status=None, ticket_ids=ticket_ids), options
+        )
+    assert sorted(selected) == sorted(ticket_ids)
+
+    asyncio.run(BatchSuggestionRunner(batch_id, selected, options).run())
+
+    assert len(calls) == 5
+    with session_scope() as session:
+        batch = session.get(SuggestionBatch, batch_id)
+        assert batch.status == "completed"
+        assert batch.completed == 5 and batch.failed == 0
+        assert {"classify", "retrieve", "llm", "total"} <= set(batch.stage_seconds)
+        rows = session.query(TicketSuggestion).filter(TicketSuggestion.batch_id == batch_id).all()
+        assert {r.ticket_id for r in rows} == set(ticket_ids)
+        assert all(r.ai_reply == "Draft reply" and r.category == "billing" for r in rows)
+
+        # only_missing now selects nothing for these tickets
+        again = create_batch(
+            session, BatchFilters(status=None, ticket_ids=ticket_ids, only_missing=True), options
+        )
+        assert again[1] == []
+
+
+def test_cancelled_batch_starts_no_new_tickets(monkeypatch):
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "x")
+    ticket_ids = _seed_tickets(3)
+    options = BatchOptions(concurrency=1, requests_per_minute=6000)
+    with session_scope() as session:
+        batch_id, selected = create_batch(session, BatchFilters(status=None, ticket_ids=ticket_ids), options)
+    runner = BatchSuggestionRunner(batch_id, selected, options)
+    runner.cancel()
+    asyncio.run(runner.run())
+    with session_scope() as session:
+        batch = session.get(SuggestionBatch, batch_id)
+        assert batch.status == "cancelled"
+        assert batch.completed == 0
+
+
+def test_cancel_written_before_the_runner_starts_is_kept(monkeypatch):
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "x")
+    ticket_ids = _seed_tickets(2)
+    options = BatchOptions(requests_per_minute=6000)
+    with session_scope() as session:
+        batch_id, selected = create_batch(session, BatchFilters(status=None, ticket_ids=ticket_ids), options)
+        # No runner is registered yet, so only the row says "cancelling"
+        assert cancel_batch(session, batch_id).status == "cancelling"
+    asyncio.run(BatchSuggestionRunner(batch_id, selected, options).run())
+    with session_scope() as session:
+        batch = session.get(SuggestionBatch, batch_id)
+        assert batch.status == "cancelled" and batch.completed == 0
+
+
+def test_api_batches_run_as_jobs_and_resume_after_a_crash(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda prompt, **k: calls.append(prompt) or "ok")
+    ticket_ids = _seed_tickets(3)
+    r = client.post("/api/ai/batches", json={"status": None, "ticket_ids": ticket_ids, "requests_per_minute": 6000})
+    assert r.status_code == 202, r.text
+    batch_id, job_id = r.json()["id"], r.json()["job_id"]
+    assert job_id is not None
+
+    # An earlier attempt finished one ticket before its process died
+    with session_scope() as session:
+        session.add(TicketSuggestion(ticket_id=ticket_ids[0], batch_id=batch_id, category="billing"))
+        batch = session.get(SuggestionBatch, batch_id)
+        batch.status, batch.completed = "running", 1
+        session.commit()
+
+    pool = JobWorkerPool(workers=0, kinds=["ai.batch"])
+    while pool.run_once():
+        pass
+    assert len(calls) == 2
+    body = client.get(f"/api/ai/batches/{batch_id}").json()
+    assert body["status"] == "completed" and body["completed"] == 3
+
+    assert client.post("/api/ai/batches", json={"ticket_ids": ticket_ids, "api_key": "sk-x"}).status_code == 400
+
+
+def test_batch_whose_job_gave_up_is_marked_failed():
+    ticket_ids = _seed_tickets(1)
+    with session_scope() as session:
+        batch_id, _ = create_batch(session, BatchFilters(status=None, ticket_ids=ticket_ids), BatchOptions())
+        job = Job(kind="ai.batch", status="failed", payload={"batch_id": batch_id})
+        session.add(job)
+        session.commit()
+        batch = session.get(SuggestionBatch, batch_id)
+        batch.status, batch.job_id = "running", job.id
+        session.commit()
+    body = client.get(f"/api/ai/batches/{batch_id}").json()
+    assert body["status"] == "failed" and body["finished_at"] is not None
+
+
+def test_token_bucket_paces_requests():
+    async def take(n: int) -> float:
+        bucket = TokenBucket(rate_per_minute=600)  # 10/s, burst of 10
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(take(12)) >= 0.15
@@ -0,0 +1,112 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.ai.llm as llm
+import app.jobs.handlers  # noqa: F401  registers ai.suggest
+from app.ai.precompute import enqueue_precompute
+from app.core.config import get_settings
+from app.db.models import Job, TicketSuggestion, User
+from app.db.session import session_scope
+from app.jobs.worker import JobWorkerPool
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def precompute(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ai_precompute_suggestions", True)
+    monkeypatch.setattr(get_settings(), "ai_precompute_delay_seconds", 0.0)
+    calls = []
+
+    def fake_llm(prompt, override=None, system_prompt=""):
+        calls.append(prompt)
+        return f"Draft {len(calls)}"
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", fake_llm)
+    return calls
+
+
+def _drain_suggest_jobs() -> None:
+    while JobWorkerPool(workers=0, kinds=["ai.suggest"]).run_once():
+        pass
+
+
+def _create_ticket() -> tuple[int, int]:
+    tag = uuid.uuid4().hex[:8]  # unique prompt, so the LLM response cache never answers
+    with session_scope() as session:
+        user = User(email=f"pre_{tag}@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+    r = client.post(
+        "/api/tickets/",
+        json={"title": f"Double charge {tag}", "content": "I was billed twice this month", "requester_id": user_id},
+    )
+    assert r.status_code == 201, r.text
+    return r.json()["id"], user_id
+
+
+def test_suggest_serves_precomputed_until_a_new_message_arrives(precompute):
+    ticket_id, user_id = _create_ticket()
+    _drain_suggest_jobs()
+    assert len(precompute) == 1
+
+    r = client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={})
+    assert r.status_code == 200, r.text
+    assert r.json()["precomputed"] is True
+    assert r.json()["ai_reply"] == "Draft 1"
+    assert len(precompute) == 1
+
+    # A new message makes the stored suggestion stale and queues the next one.
+    r = client.post(
+        f"/api/tickets/{ticket_id}/messages",
+        params={"sender_id": user_id, "sender_type": "user"},
+        json={"content": "Still waiting on that refund"},
+    )
+    assert r.status_code == 201, r.text
+    r = client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={})
+    assert r.json()["precomputed"] is False
+    assert "Still waiting on that refund" in precompute[-1]
+
+    _drain_suggest_jobs()
+    r = client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={})
+    assert r.json()["precomputed"] is True
+    with session_scope() as session:
+        versions = {
+            s.version for s in session.query(TicketSuggestion).filter(TicketSuggestion.ticket_id == ticket_id)
+        }
+    assert len(versions) == 2
+
+
+def test_different_request_parameters_do_not_match(precompute):
+    ticket_id, _ = _create_ticket()
+    _drain_suggest_jobs()
+    r = client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={"n_results": 5})
+    assert r.json()["precomputed"] is False
+    r = client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={"use_precomputed": False})
+    assert r.json()["precomputed"] is False
+
+
+def test_precompute_job_skips_when_fresh(precompute):
+    ticket_id, _ = _create_ticket()
+    _drain_suggest_jobs()
+    with session_scope() as session:
+        job = enqueue_precompute(session, ticket_id)
+        job_id = job.id
+    _drain_suggest_jobs()
+    assert len(precompute) == 1
+    with session_scope() as session:
+        assert session.get(Job, job_id).result["skipped"] == "fresh"
+
+
+def test_precompute_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "Draft")
+    with session_scope() as session:
+        before = session.query(Job).filter(Job.kind == "ai.suggest").count()
+    ticket_id, _ = _create_ticket()
+    with session_scope() as session:
+        assert session.query(Job).filter(Job.kind == "ai.suggest").count() == before
+    assert client.post(f"/api/ai/tickets/{ticket_id}/suggest", json={}).json()["precomputed"] is False
@@ -0,0 +1,75 @@
+import time
+import uuid
+
+import app.ai.llm as llm
+import app.ai.service as service
+from app.ai.classifier import TicketClassificationResult
+from app.ai.service import generate_ticket_suggestion
+from app.db.models import Ticket, TicketMessage, User
+from app.db.session import session_scope
+from app.rag.store import add_documents
+
+SNIPPET = "Duplicate charges are refunded automatically within 5 business days."
+
+
+def _seed_ticket(session) -> Ticket:
+    user = User(email=f"suggest_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    session.add(user)
+    session.commit()
+    ticket = Ticket(title="Charged twice", content="My card was charged twice for one refund order", requester_id=user.id)
+    session.add(ticket)
+    session.commit()
+    session.add(TicketMessage(ticket_id=ticket.id, sender_id=user.id, sender_type="user", content="Any update on my refund?"))
+    session.commit()
+    return ticket
+
+
+def test_kb_snippets_and_history_reach_the_prompt(monkeypatch):
+    add_documents([SNIPPET], ids=["suggest_kb_1"], collection="kb_suggest_test")
+    prompts = []
+    monkeypatch.setattr(
+        llm, "_call_openai_compatible_api", lambda prompt, override=None, system_prompt="": prompts.append(prompt) or "Draft"
+    )
+    with session_scope() as session:
+        suggestion = generate_ticket_suggestion(_seed_ticket(session), collection="kb_suggest_test")
+
+    assert suggestion.kb_snippets == [SNIPPET]
+    assert suggestion.ai_reply == "Draft"
+    assert SNIPPET in prompts[0]
+    assert "Any update on my refund?" in prompts[0]
+    assert {"classify", "retrieve", "history", "llm"} <= set(suggestion.timings)
+
+
+def test_classification_and_retrieval_run_concurrently(monkeypatch):
+    def slow_predict(text):
+        time.sleep(0.3)
+        return TicketClassificationResult(category="billing", confidence=0.9)
+
+    def slow_search(text, n_results=3, collection="kb_main"):
+        time.sleep(0.3)
+        return ["k1"], [SNIPPET], [None], [0.1]
+
+    monkeypatch.setattr(service.get_ticket_classifier(), "predict", slow_predict)
+    monkeypatch.setattr(service, "similarity_search", slow_search)
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "Draft")
+    with session_scope() as session:
+        started = time.perf_counter()
+        suggestion = generate_ticket_suggestion(_seed_ticket(session))
+        elapsed = time.perf_counter() - started
+
+    assert suggestion.category == "billing"
+    assert suggestion.kb_snippets == [SNIPPET]
+    assert suggestion.timings["classify"] >= 0.3 and suggestion.timings["retrieve"] >= 0.3
+    assert elapsed < 0.55
+
+
+def test_retrieval_failure_still_drafts_a_reply(monkeypatch):
+    def broken_search(*args, **kwargs):
+        raise RuntimeError("vector store unavailable")
+
+    monkeypatch.setattr(service, "similarity_search", broken_search)
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", lambda *a, **k: "Draft")
+    with session_scope() as session:
+        suggestion = generate_ticket_suggestion(_seed_ticket(session))
+    assert suggestion.kb_snippets == []
+    assert suggestion.ai_reply == "Draft"
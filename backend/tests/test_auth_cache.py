@@ -0,0 +1,98 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.api import auth
+from app.db.models import User
+from app.db.session import get_session
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _register_and_login() -> tuple[str, str]:
+    email = f"auth_{uuid.uuid4().hex[:8]}@example.com"
+    r = client.post("/api/auth/register", json={"email": email, "password": "secret", "name": "Ada"})
+    assert r.status_code == 200, r.text
+    r = client.post("/api/auth/token", data={"username": email, "password": "secret"})
+    assert r.status_code == 200, r.text
+    return email, r.json()["access_token"]
+
+
+def test_current_user_is_served_from_cache(monkeypatch):
+    email, token = _register_and_login()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/auth/me", headers=headers).json()["email"] == email
+
+    calls = []
+    original = auth._load_user
+    monkeypatch.setattr(auth, "_load_user", lambda e: calls.append(e) or original(e))
+    for _ in range(3):
+        r = client.get("/api/auth/me", headers=headers)
+        assert r.status_code == 200
+    assert calls == []
+
+
+def test_user_changes_invalidate_cached_snapshot():
+    email, token = _register_and_login()
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/auth/me", headers=headers).json()["name"] == "Ada"
+
+    session = next(get_session())
+    user = session.query(User).filter(User.email == email).one()
+    user.name = "Grace"
+    session.commit()
+    assert client.get("/api/auth/me", headers=headers).json()["name"] == "Grace"
+
+    session.delete(user)
+    session.commit()
+    session.close()
+    assert client.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_snapshot_is_dropped_on_commit_not_flush():
+    email, token = _register_and_login()
+    headers = {"Authorization": f"Bearer {token}"}
+    session = next(get_session())
+    user = session.query(User).filter(User.email == email).one()
+    user.name = "Grace"
+    session.flush()
+    # A request between flush and commit still reads, and caches, the committed row
+    assert client.get("/api/auth/me", headers=headers).json()["name"] == "Ada"
+    session.commit()
+    assert client.get("/api/auth/me", headers=headers).json()["name"] == "Grace"
+
+    user.name = "Lin"
+    session.flush()
+    session.rollback()
+    assert client.get("/api/auth/me", headers=headers).json()["name"] == "Grace"
+    session.close()
+
+
+def test_invalid_token_is_rejected():
+    r = client.get("/api/auth/me", headers={"Authorization": "Bearer not-a-jwt"})
+    assert r.status_code == 401
+
+
+def test_login_rehashes_when_cost_factor_changes(monkeypatch):
+    from app.core import security
+
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 4)
+    email, _ = _register_and_login()
+    session = next(get_session())
+    old_hash = session.query(User.hashed_password).filter(User.email == email).scalar()
+    assert old_hash.startswith("$2b$04$")
+    assert not security.needs_rehash(old_hash)
+
+    monkeypatch.setattr(security, "BCRYPT_ROUNDS", 5)
+    r = client.post("/api/auth/token", data={"username": email, "password": "secret"})
+    assert r.status_code == 200
+    session.expire_all()
+    new_hash = session.query(User.hashed_password).filter(User.email == email).scalar()
+    assert new_hash.startswith("$2b$05$")
+    assert security.verify_password("secret", new_hash)
+
+    r = client.post("/api/auth/token", data={"username": email, "password": "wrong"})
+    assert r.status_code == 401
+    session.close()
@@ -0,0 +1,55 @@
+from app.ai.history import fold_into_summary, load_history_window
+from app.ai.tokens import estimate_tokens
+from app.db.models import ChatMessage, ChatSession
+from app.db.session import get_session
+
+
+def _seed_session(session, n_messages: int) -> ChatSession:
+    chat_session = ChatSession(title="history test")
+    session.add(chat_session)
+    session.commit()
+    for i in range(n_messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        session.add(ChatMessage(session_id=chat_session.id, role=role, content=f"Message {i}. Detail {i}."))
+        session.commit()
+    return chat_session
+
+
+def test_history_window_keeps_recent_turns_and_folds_the_rest():
+    session = next(get_session())
+    chat_session = _seed_session(session, 10)
+
+    window = load_history_window(session, chat_session, max_turns=2, token_budget=1000)
+    assert [c for _, c in window.turns] == [f"Message {i}. Detail {i}." for i in range(6, 10)]
+    assert window.summary is not None
+    assert window.summary.splitlines()[0] == "User: Message 0."
+    assert window.summary.splitlines()[-1] == "Assistant: Message 5."
+    session.commit()
+
+    # A new turn only folds the turns that just left the window.
+    session.add(ChatMessage(session_id=chat_session.id, role="user", content="Message 10."))
+    session.add(ChatMessage(session_id=chat_session.id, role="assistant", content="Message 11."))
+    session.commit()
+    window = load_history_window(session, chat_session, max_turns=2, token_budget=1000)
+    lines = window.summary.splitlines()
+    assert len(lines) == 8
+    assert lines[-2:] == ["User: Message 6.", "Assistant: Message 7."]
+    session.close()
+
+
+def test_history_window_respects_token_budget():
+    session = next(get_session())
+    chat_session = _seed_session(session, 6)
+
+    budget = estimate_tokens("Message 5. Detail 5.") * 2
+    window = load_history_window(session, chat_session, max_turns=10, token_budget=budget)
+    assert len(window.turns) == 2
+    assert window.summary is not None and len(window.summary.splitlines()) == 4
+    session.close()
+
+
+def test_fold_into_summary_trims_oldest_lines():
+    messages = [("user", "x" * 100) for _ in range(20)]
+    summary = fold_into_summary(None, messages, token_budget=60)
+    assert summary is not None
+    assert estimate_tokens(summary) <= 60
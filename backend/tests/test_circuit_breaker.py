@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app.ai.llm as llm
+from app.ai.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock, **kwargs):
+    options = dict(failure_ratio=0.5, min_calls=4, window_seconds=30, slow_call_seconds=2.0, open_seconds=10)
+    options.update(kwargs)
+    return CircuitBreaker(clock=clock, **options)
+
+
+def test_opens_on_error_rate_and_recovers_through_half_open():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for error in (False, True, False, True):
+        breaker.before_call()
+        breaker.record(0.1, error=error)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.retry_after == 10
+
+    clock.now += 10
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record(0.1, error=False)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_count_as_failures_and_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(5.0, error=False)
+    assert breaker.state == OPEN
+
+    clock.now += 10
+    breaker.before_call()
+    breaker.record(0.1, error=True)
+    assert breaker.state == OPEN
+
+
+def test_old_outcomes_leave_the_window():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        breaker.record(0.1, error=True)
+    clock.now += 31
+    breaker.record(0.1, error=True)
+    assert breaker.state == CLOSED
+
+
+def test_open_circuit_fails_fast_with_kb_fallback(monkeypatch):
+    clock = FakeClock()
+    breaker = _breaker(clock, min_calls=2)
+    monkeypatch.setattr(llm, "_breaker", breaker)
+    calls = []
+
+    def failing_llm(prompt, override=None, system_prompt=""):
+        calls.append(prompt)
+        raise RuntimeError("LLM request failed: 503")
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", failing_llm)
+    for i in range(2):
+        with pytest.raises(RuntimeError):
+            llm.complete(f"prompt {i}")
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        llm.complete("prompt 3")
+    answer = llm.generate_chat_answer("how do I reset?", ["Use the Forgot password link."], [])
+    assert "temporarily unavailable" in answer
+    assert "Forgot password" in answer
+    assert len(calls) == 2
+
+    r = client.post("/api/ai/chat", json={"query": "breaker test with empty kb", "collection": "breaker_empty"})
+    assert r.status_code == 503
+    assert int(r.headers["retry-after"]) >= 1
+    assert client.get("/health").json()["llm_circuit"] == OPEN
+
+
+def test_misconfiguration_does_not_trip_the_breaker(monkeypatch):
+    breaker = _breaker(FakeClock(), min_calls=1)
+    monkeypatch.setattr(llm, "_breaker", breaker)
+
+    def misconfigured(prompt, override=None, system_prompt=""):
+        raise ValueError("LLM provider not configured.")
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", misconfigured)
+    with pytest.raises(ValueError):
+        llm.complete("anything")
+    assert breaker.state == CLOSED
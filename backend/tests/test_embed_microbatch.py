@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.metrics import REGISTRY
+from app.rag.embeddings import EmbeddingProvider, HashingEmbedding
+from app.rag.microbatch import MicroBatchingEmbedding
+
+
+class _Recording(EmbeddingProvider):
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model crashed")
+        return [[float(len(t))] for t in texts]
+
+
+def test_concurrent_queries_share_one_batch():
+    inner = _Recording()
+    batcher = MicroBatchingEmbedding(inner, max_wait_ms=200, max_batch_size=8)
+    texts = ["x" * n for n in range(1, 9)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        vectors = list(pool.map(batcher.embed_query, texts))
+
+    # Every caller gets its own row back, from far fewer forward passes.
+    assert vectors == [[float(n)] for n in range(1, 9)]
+    assert sorted(len(t) for batch in inner.batches for t in batch) == list(range(1, 9))
+    assert len(inner.batches) < 8
+    assert "astratickets_embed_query_batch_size_bucket" in REGISTRY.render()
+
+
+def test_full_batch_runs_without_waiting():
+    inner = _Recording()
+    batcher = MicroBatchingEmbedding(inner, max_wait_ms=10_000, max_batch_size=2)
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(batcher.embed_query, ["ab", "abc"]))
+    assert time.monotonic() - started < 5
+    assert results == [[2.0], [3.0]]
+    assert [sorted(batch) for batch in inner.batches] == [["ab", "abc"]]
+
+
+def test_lone_query_matches_the_wrapped_provider():
+    inner = HashingEmbedding(dim=64)
+    batcher = MicroBatchingEmbedding(inner, max_wait_ms=1)
+    assert batcher.embed_query("reset my password") == inner.embed_query("reset my password")
+    assert batcher.model_id == inner.model_id
+
+
+def test_batch_errors_reach_every_caller():
+    batcher = MicroBatchingEmbedding(_Recording(fail=True), max_wait_ms=50, max_batch_size=4)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(batcher.embed_query, t) for t in ("a", "b", "c")]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                future.result()
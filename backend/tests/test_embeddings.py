@@ -0,0 +1,50 @@
+import types
+
+import numpy as np
+import pytest
+
+from app.rag import embeddings
+from app.rag.embeddings import SentenceTransformerEmbedding
+
+
+class _FakeModel:
+    def __init__(self, name, backend="torch", **kwargs):
+        if backend == "onnx":
+            raise ImportError("optimum is not installed")
+        self.name, self.backend, self.kwargs = name, backend, kwargs
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(kwargs)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def fake_st(monkeypatch):
+    module = types.SimpleNamespace(SentenceTransformer=_FakeModel)
+    monkeypatch.setattr(embeddings, "_try_import_sentence_transformers", lambda: module)
+    return module
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        SentenceTransformerEmbedding(backend="tensorrt")
+
+
+def test_encode_uses_configured_batch_size(fake_st):
+    provider = SentenceTransformerEmbedding(model_name="m", batch_size=7)
+    assert provider.embed_documents(["a", "b"]).shape == (2, 4)
+    assert provider._st_model.calls[0]["batch_size"] == 7
+    assert provider._st_model.calls[0]["normalize_embeddings"] is True
+
+
+def test_onnx_backend_falls_back_to_torch(fake_st):
+    provider = SentenceTransformerEmbedding(model_name="m", backend="onnx")
+    provider.embed_query("hello")
+    assert provider._st_model.backend == "torch"
+    assert provider.model_id == "m"
+
+
+def test_default_provider_passes_options(fake_st):
+    provider = embeddings.get_default_provider(backend="torch-int8", batch_size=16, threads=None)
+    assert (provider.backend, provider.batch_size) == ("torch-int8", 16)
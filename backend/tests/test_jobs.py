@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.models import Job, utcnow
+from app.db.session import session_scope
+from app.jobs import queue
+from app.jobs.worker import JobWorkerPool
+from app.main import app
+
+
+client = TestClient(app)
+
+
+@queue.job_handler("test.echo")
+def _echo(payload, ctx):
+    ctx.set_progress({"step": 1})
+    return {"echo": payload["value"], "attempt": ctx.attempt}
+
+
+@queue.job_handler("test.flaky")
+def _flaky(payload, ctx):
+    if ctx.attempt < 2:
+        raise RuntimeError("transient")
+    return {"ok": True}
+
+
+def _run_kind(kind: str) -> bool:
+    return JobWorkerPool(workers=0, kinds=[kind]).run_once()
+
+
+def test_job_runs_and_is_visible_via_api():
+    with session_scope() as session:
+        job = queue.enqueue(session, "test.echo", {"value": 42})
+    assert _run_kind("test.echo")
+
+    r = client.get(f"/api/jobs/{job.id}")
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["status"] == "succeeded"
+    assert data["result"] == {"echo": 42, "attempt": 1}
+    assert data["progress"] == {"step": 1}
+    assert client.get("/api/jobs/999999999").status_code == 404
+
+
+def test_failed_job_is_retried_with_backoff():
+    with session_scope() as session:
+        job = queue.enqueue(session, "test.flaky", max_attempts=3)
+    assert _run_kind("test.flaky")
+    with session_scope() as session:
+        row = session.get(Job, job.id)
+        assert row.status == "queued" and row.attempts == 1
+        assert "transient" in row.error
+        # Backoff: not runnable yet; make it due now.
+        assert not _run_kind("test.flaky")
+        session.execute(update(Job).where(Job.id == job.id).values(run_after=utcnow()))
+        session.commit()
+    assert _run_kind("test.flaky")
+    with session_scope() as session:
+        assert session.get(Job, job.id).status == "succeeded"
+
+
+def test_expired_lease_is_reclaimed():
+    with session_scope() as session:
+        job = queue.enqueue(session, "test.echo", {"value": "x"})
+        claimed = queue.claim_next(session, "crashed-worker", ["test.echo"])
+        assert claimed is not None and claimed.id == job.id
+        # Worker died: nobody else can claim until the lease expires.
+        assert queue.claim_next(session, "other", ["test.echo"]) is None
+        session.execute(
+            update(Job).where(Job.id == job.id)
+            .values(lease_expires_at=utcnow() - timedelta(seconds=1))
+        )
+        session.commit()
+    assert _run_kind("test.echo")
+    with session_scope() as session:
+        row = session.get(Job, job.id)
+        assert row.status == "succeeded" and row.attempts == 2
+
+
+def test_kb_ingest_job():
+    payload = {
+        "collection": "kb_jobs_test",
+        "documents": [{"text": "Refunds are processed within 5 business days."}],
+    }
+    r = client.post("/api/kb/ingest/jobs", json=payload)
+    assert r.status_code == 202, r.text
+    job_id = r.json()["id"]
+    from app.jobs import handlers  # noqa: F401
+
+    assert _run_kind("kb.ingest")
+    data = client.get(f"/api/jobs/{job_id}").json()
+    assert data["status"] == "succeeded", data
+    assert data["result"]["chunks_added"] == 1
@@ -0,0 +1,61 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.rag import store
+
+client = TestClient(app)
+
+
+def _ingest(collection, docs):
+    r = client.post(
+        "/api/kb/ingest",
+        json={"collection": collection, "chunk": False,
+              "documents": [{"id": i, "text": t} for i, t in docs.items()]},
+    )
+    assert r.status_code == 201, r.text
+
+
+def test_search_merges_results_across_collections():
+    _ingest("kb_fan_main", {"m1": "Reset your password from the sign-in page.",
+                            "m2": "Locked accounts unlock after 30 minutes."})
+    _ingest("kb_fan_billing", {"b1": "Refunds for a duplicate charge take 5-7 days.",
+                               "b2": "Download invoices from the billing page."})
+
+    r = client.post(
+        "/api/kb/search",
+        json={"query": "refund duplicate charge", "n_results": 3,
+              "collections": ["kb_fan_main", "kb_fan_billing"]},
+    )
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["collections"] == ["kb_fan_main", "kb_fan_billing"]
+    matches = data["matches"]
+    assert len(matches) == 3
+    assert matches[0]["id"] == "b1" and matches[0]["collection"] == "kb_fan_billing"
+    assert {m["collection"] for m in matches} == {"kb_fan_main", "kb_fan_billing"}
+    assert [m["distance"] for m in matches] == sorted(m["distance"] for m in matches)
+
+    r = client.post(
+        "/api/kb/search",
+        json={"query": "refund duplicate charge", "n_results": 4, "normalize": "minmax",
+              "collections": ["kb_fan_main", "kb_fan_billing"]},
+    )
+    # Each collection's best match normalizes to 0, so both lead the merged list.
+    top = r.json()["matches"][:2]
+    assert "b1" in {m["id"] for m in top}
+    assert {m["collection"] for m in top} == {"kb_fan_main", "kb_fan_billing"}
+
+
+def test_collections_are_queried_concurrently(monkeypatch):
+    def slow_query(collection, qvec, n_results, distance_threshold=None):
+        time.sleep(0.2)
+        return [f"{collection}-1"], ["text"], [None], [0.5]
+
+    monkeypatch.setattr(store, "_query_vector", slow_query)
+    started = time.perf_counter()
+    ids, _, metas, _ = store.similarity_search_many("q", ["kb_a1", "kb_b1", "kb_c1", "kb_d1"], n_results=4)
+    assert time.perf_counter() - started < 0.6
+    assert len(ids) == 4
+    assert [m["collection"] for m in metas] == ["kb_a1", "kb_b1", "kb_c1", "kb_d1"]
@@ -0,0 +1,73 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.main import app
+from app.rag import store
+
+client = TestClient(app)
+
+DOCS = [
+    {"id": "h1", "text": "Reset your password from the sign-in page."},
+    {"id": "h2", "text": "Refunds are issued to the original payment method."},
+    {"id": "h3", "text": "Invoices can be downloaded from the billing page."},
+]
+
+
+def test_collection_handles_are_cached_until_dropped():
+    first = store.get_collection("kb_handle_test")
+    assert store.get_collection("kb_handle_test") is first
+
+    store.drop_collection("kb_handle_test")
+    assert store.get_collection("kb_handle_test") is not first
+
+
+def test_ingest_index_config_sets_hnsw_parameters():
+    store.drop_collection("kb_cosine_test")
+    r = client.post(
+        "/api/kb/ingest",
+        json={
+            "collection": "kb_cosine_test",
+            "chunk": False,
+            "index": {"space": "cosine", "m": 8, "construction_ef": 64, "search_ef": 20},
+            "documents": DOCS,
+        },
+    )
+    assert r.status_code == 201, r.text
+    hnsw = store.get_collection("kb_cosine_test").configuration["hnsw"]
+    assert (hnsw["space"], hnsw["max_neighbors"], hnsw["ef_construction"], hnsw["ef_search"]) == ("cosine", 8, 64, 20)
+
+    ids, _, _, dists = store.similarity_search("download invoices billing", n_results=3, collection="kb_cosine_test")
+    assert ids[0] == "h3"
+    assert all(0.0 <= d <= 2.0 for d in dists)
+
+
+def test_settings_define_defaults_for_new_collections(monkeypatch):
+    monkeypatch.setattr(get_settings(), "kb_distance_space", "ip")
+    monkeypatch.setattr(get_settings(), "kb_hnsw_search_ef", 33)
+    store.drop_collection("kb_ip_test")
+    hnsw = store.get_collection("kb_ip_test").configuration["hnsw"]
+    assert (hnsw["space"], hnsw["ef_search"]) == ("ip", 33)
+    store.drop_collection("kb_ip_test")
+
+
+def test_set_search_ef_refreshes_the_cached_handle():
+    client.post("/api/kb/ingest", json={"collection": "kb_ef_test", "chunk": False, "documents": DOCS})
+    store.set_search_ef("kb_ef_test", 12)
+    assert store.get_collection("kb_ef_test").configuration["hnsw"]["ef_search"] == 12
+
+
+@pytest.mark.parametrize("space", ["cosine", "ip"])
+def test_quantized_rescoring_uses_collection_space(monkeypatch, space):
+    name = f"kb_quant_{space}_test"
+    store.drop_collection(name)
+    client.post(
+        "/api/kb/ingest",
+        json={"collection": name, "chunk": False, "index": {"space": space}, "documents": DOCS},
+    )
+    query = "how do I reset my password"
+    ids, _, _, dists = store.similarity_search(query, n_results=3, collection=name)
+    monkeypatch.setattr(get_settings(), "vector_search_quantization", "float16")
+    q_ids, _, _, q_dists = store.similarity_search(query, n_results=3, collection=name)
+    assert q_ids == ids
+    assert q_dists == pytest.approx(dists, abs=1e-4)
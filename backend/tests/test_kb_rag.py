@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 
+from app.api import kb as kb_api
 from app.main import app
 
 
@@ -36,3 +37,50 @@ def test_kb_ingest_and_search():
     assert r.status_code == 200
     assert r.json()["deleted"] >= 0
 
+
+
+def test_kb_cursor_listing_and_ndjson_export(vector_store, monkeypatch):
+    import json
+
+    docs = [{"id": f"exp{i}", "text": f"Export article number {i} about invoices."} for i in range(5)]
+    r = client.post("/api/kb/ingest", json={"collection": "kb_export_test", "chunk": False, "documents": docs})
+    assert r.status_code == 201, r.text
+
+    seen, cursor = [], None
+    while True:
+        params = {"collection": "kb_export_test", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/kb/items", params=params).json()
+        assert page["total"] == 5
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(d["id"] for d in docs)
+
+    r = client.get("/api/kb/export", params={"collection": "kb_export_test", "include_embeddings": True})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(row["id"] for row in rows) == sorted(seen)
+    assert all(isinstance(row["embedding"], list) and row["embedding"] for row in rows)
+
+    # The cached count follows writes.
+    client.post("/api/kb/delete", json={"collection": "kb_export_test", "ids": ["exp0"]})
+    assert client.get("/api/kb/items", params={"collection": "kb_export_test"}).json()["total"] == 4
+    assert client.get("/api/kb/items", params={"collection": "kb_export_test", "cursor": "bogus"}).status_code == 400
+
+    # Deleting rows behind a cursor shifts Chroma's offsets; the stale cursor is refused
+    page = client.get("/api/kb/items", params={"collection": "kb_export_test", "limit": 2}).json()
+    client.post("/api/kb/delete", json={"collection": "kb_export_test", "ids": [page["items"][0]["id"]]})
+    r = client.get("/api/kb/items", params={"collection": "kb_export_test", "cursor": page["next_cursor"]})
+    assert r.status_code == 409
+
+    # Store errors while checking a cursor use the router's 400 mapping, not a 500
+    def broken(*args, **kwargs):
+        raise RuntimeError("store unavailable")
+
+    monkeypatch.setattr(kb_api, "list_documents", broken)
+    r = client.get("/api/kb/items", params={"collection": "kb_export_test", "cursor": page["next_cursor"]})
+    assert r.status_code == 400 and "store unavailable" in r.text
@@ -0,0 +1,145 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.rag.snapshot import SnapshotError, export_snapshot, read_manifest, restore_snapshot
+from app.rag.store import iter_documents
+
+client = TestClient(app)
+
+
+def _ingest(collection, n=6):
+    docs = [
+        {"id": f"snap{i}", "text": f"Snapshot article {i}: refunds take {i + 3} days.", "metadata": {"title": f"T{i}"}}
+        for i in range(n)
+    ]
+    r = client.post("/api/kb/ingest", json={"collection": collection, "chunk": False, "documents": docs})
+    assert r.status_code == 201, r.text
+
+
+def _rows(collection):
+    return {id_: (text, meta, vec) for id_, text, meta, vec in iter_documents(collection, include_embeddings=True)}
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float16"])
+def test_snapshot_round_trip(vector_store, tmp_path, dtype):
+    _ingest("kb_snap_src")
+    path = tmp_path / f"kb.{dtype}.atsnap"
+    manifest = export_snapshot("kb_snap_src", path, dtype=dtype, batch_size=4)
+    assert manifest["count"] == 6
+    assert read_manifest(path)["sha256"] == manifest["sha256"]
+
+    result = restore_snapshot(path, collection=f"kb_snap_dst_{dtype}", batch_size=4)
+    assert result.restored == 6
+    src, dst = _rows("kb_snap_src"), _rows(f"kb_snap_dst_{dtype}")
+    assert src.keys() == dst.keys()
+    tolerance = 1e-6 if dtype == "float32" else 1e-3
+    for id_, (text, meta, vec) in src.items():
+        assert dst[id_][:2] == (text, meta)
+        assert max(abs(a - b) for a, b in zip(vec, dst[id_][2])) < tolerance
+
+    # Non-empty target needs replace; same rows come back.
+    with pytest.raises(SnapshotError):
+        restore_snapshot(path, collection=f"kb_snap_dst_{dtype}")
+    assert restore_snapshot(path, collection=f"kb_snap_dst_{dtype}", replace=True).restored == 6
+
+
+def test_corrupt_or_foreign_snapshot_is_rejected(vector_store, tmp_path):
+    _ingest("kb_snap_src")
+    path = tmp_path / "kb.atsnap"
+    export_snapshot("kb_snap_src", path)
+    data = bytearray(path.read_bytes())
+    data[20] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="checksum"):
+        restore_snapshot(path, collection="kb_snap_corrupt")
+
+    # A failed replace leaves the live collection as it was.
+    _ingest("kb_snap_live", n=2)
+    with pytest.raises(SnapshotError):
+        restore_snapshot(path, collection="kb_snap_live", replace=True)
+    assert set(_rows("kb_snap_live")) == {"snap0", "snap1"}
+
+    other = tmp_path / "other.atsnap"
+    other.write_bytes(b"not a snapshot at all")
+    with pytest.raises(SnapshotError):
+        read_manifest(other)
+
+
+def test_snapshot_endpoints(vector_store, tmp_path, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "kb_snapshot_dir", str(tmp_path / "snapshots"))
+    _ingest("kb_snap_api", n=3)
+    r = client.post("/api/kb/snapshots", json={"collection": "kb_snap_api", "dtype": "float16"})
+    assert r.status_code == 201, r.text
+    name = r.json()["name"]
+    assert [s["name"] for s in client.get("/api/kb/snapshots").json()] == [name]
+    assert client.get(f"/api/kb/snapshots/{name}").content == (tmp_path / "snapshots" / name).read_bytes()
+
+    r = client.post(f"/api/kb/snapshots/{name}/restore", json={"collection": "kb_snap_api_copy"})
+    assert r.status_code == 200, r.text
+    assert r.json()["restored"] == 3
+    assert client.post("/api/kb/snapshots/..%2Fsecret.atsnap/restore", json={}).status_code in (400, 404)
+
+
+def test_export_of_missing_collection_is_not_found(vector_store, tmp_path, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "kb_snapshot_dir", str(tmp_path / "snapshots"))
+    r = client.post("/api/kb/snapshots", json={"collection": "kb_snap_missing"})
+    assert r.status_code == 404, r.text
+    assert not vector_store.collection_exists("kb_snap_missing")
+    assert not list(tmp_path.glob("snapshots/*"))
+
+
+def test_failed_swap_keeps_staging_for_retry(vector_store, tmp_path, monkeypatch):
+    import app.rag.snapshot as snapshot
+
+    _ingest("kb_snap_src", n=3)
+    _ingest("kb_snap_live", n=2)
+    path = tmp_path / "kb.atsnap"
+    export_snapshot("kb_snap_src", path)
+
+    real_rename = snapshot.rename_collection
+
+    def broken_rename(old, new):
+        raise RuntimeError("rename failed")
+
+    monkeypatch.setattr(snapshot, "rename_collection", broken_rename)
+    with pytest.raises(SnapshotError, match="kb_snap_live__restore_") as exc:
+        restore_snapshot(path, collection="kb_snap_live", replace=True)
+    staging = next(
+        c.name for c in vector_store._get_client().list_collections() if c.name.startswith("kb_snap_live__restore_")
+    )
+    assert staging in str(exc.value)
+    assert vector_store.count_documents(staging) == 3
+
+    monkeypatch.setattr(snapshot, "rename_collection", real_rename)
+    snapshot.finish_restore(staging, "kb_snap_live")
+    assert set(_rows("kb_snap_live")) == {"snap0", "snap1", "snap2"}
+    assert not vector_store.collection_exists(staging)
+    with pytest.raises(SnapshotError):
+        snapshot.finish_restore(staging, "kb_snap_live")
+    assert set(_rows("kb_snap_live")) == {"snap0", "snap1", "snap2"}
+
+
+def test_inconsistent_layout_is_rejected_before_loading(vector_store, tmp_path, monkeypatch):
+    import app.rag.snapshot as snapshot
+
+    _ingest("kb_snap_src", n=3)
+    _ingest("kb_snap_live", n=2)
+    path = tmp_path / "kb.atsnap"
+    export_snapshot("kb_snap_src", path)
+    # A manifest whose dimension disagrees with the payload (checksum still valid)
+    real = snapshot._read_manifest
+
+    def lying_manifest(fh):
+        manifest, payload_len = real(fh)
+        return {**manifest, "dim": manifest["dim"] + 1}, payload_len
+
+    monkeypatch.setattr(snapshot, "_read_manifest", lying_manifest)
+    with pytest.raises(SnapshotError, match="count x dim"):
+        restore_snapshot(path, collection="kb_snap_live", replace=True)
+    assert set(_rows("kb_snap_live")) == {"snap0", "snap1"}
+    assert len(vector_store._get_client().list_collections()) == 2
@@ -0,0 +1,95 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app.ai.llm as llm
+from app.core.cache import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def _clear_llm_cache():
+    llm._results.clear()
+    yield
+    llm._results.clear()
+
+
+def test_concurrent_identical_calls_share_one_upstream_request(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def slow_llm(prompt, override=None, system_prompt=""):
+        calls.append(prompt)
+        release.wait(5)
+        return f"answer to {prompt}"
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", slow_llm)
+    before = {o: llm.LLM_CALLS.value(outcome=o) for o in ("upstream", "coalesced", "cached")}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(llm.complete, "same prompt") for _ in range(8)]
+        futures.append(pool.submit(llm.complete, "other prompt"))
+        deadline = time.time() + 5
+        while llm._inflight.in_flight() < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        answers = [f.result() for f in futures]
+
+    assert answers[:8] == ["answer to same prompt"] * 8
+    assert sorted(calls) == ["other prompt", "same prompt"]
+    assert llm.LLM_CALLS.value(outcome="upstream") - before["upstream"] == 2
+    assert llm.LLM_CALLS.value(outcome="coalesced") - before["coalesced"] == 7
+
+    # A repeat shortly afterwards is served from the result cache.
+    assert llm.complete("same prompt") == "answer to same prompt"
+    assert len(calls) == 2
+    assert llm.LLM_CALLS.value(outcome="cached") - before["cached"] == 1
+
+
+def test_failures_are_shared_but_not_cached(monkeypatch):
+    calls = []
+
+    def failing_llm(prompt, override=None, system_prompt=""):
+        calls.append(prompt)
+        raise RuntimeError("LLM request failed: 503")
+
+    monkeypatch.setattr(llm, "_call_openai_compatible_api", failing_llm)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            llm.complete("boom")
+    assert len(calls) == 2
+
+
+def test_cache_key_separates_models_and_api_keys():
+    base = llm._request_key("p", None, "sys")
+    other_model = llm._request_key("p", llm.LLMConfigOverride(model="other-model"), "sys")
+    other_key = llm._request_key("p", llm.LLMConfigOverride(api_key="sk-other"), "sys")
+    assert len({base, other_model, other_key}) == 3
+    assert "sk-other" not in repr(other_key)
+
+
+def test_single_flight_propagates_exceptions_to_waiters():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def leader():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("nope")
+
+    errors = []
+
+    def call(fn):
+        try:
+            flight.do("k", fn)
+        except ValueError as exc:
+            errors.append(exc)
+
+    t = threading.Thread(target=call, args=(leader,))
+    t.start()
+    started.wait()
+    call(lambda: "unused")
+    t.join()
+    assert len(errors) == 2
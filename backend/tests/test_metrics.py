@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.cache import TTLCache
+from app.core.metrics import MetricsRegistry, register_cache, timed
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def test_histogram_and_counter_exposition():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5.0, stage="a")
+    registry.counter("demo_total", "Demo.").inc(3)
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+    assert "demo_total 3" in text
+
+
+def test_timed_stage_counts_errors_and_in_flight():
+    from app.core.metrics import STAGE_ERRORS, STAGE_IN_FLIGHT, STAGE_SECONDS
+
+    before = STAGE_SECONDS.count(stage="test_stage")
+    with pytest.raises(RuntimeError):
+        with timed("test_stage"):
+            assert STAGE_IN_FLIGHT.value(stage="test_stage") == 1
+            raise RuntimeError("boom")
+    assert STAGE_IN_FLIGHT.value(stage="test_stage") == 0
+    assert STAGE_SECONDS.count(stage="test_stage") == before + 1
+    assert STAGE_ERRORS.value(stage="test_stage") >= 1
+
+
+def test_metrics_endpoint_reports_pipeline_db_and_caches():
+    cache = TTLCache()
+    register_cache("test_cache", cache)
+    cache.set("k", 1)
+    cache.get("k")
+    cache.get("missing")
+
+    client.post("/api/kb/search", json={"query": "reset password", "n_results": 1})
+    client.get("/api/tickets/")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+    assert 'astratickets_stage_duration_seconds_count{stage="embed_query"}' in body
+    assert 'astratickets_stage_duration_seconds_count{stage="vector_query"}' in body
+    assert 'astratickets_db_statement_duration_seconds_count{operation="SELECT"}' in body
+    assert 'astratickets_cache_hit_ratio{cache="test_cache"} 0.5' in body
+    assert "# TYPE astratickets_cache_hits_total counter" in body
+    assert 'astratickets_cache_hits_total{cache="test_cache"} 1' in body
+    assert 'astratickets_cache_misses_total{cache="test_cache"} 1' in body
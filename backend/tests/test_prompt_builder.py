@@ -0,0 +1,55 @@
+from app.ai.prompt import (
+    CHAT_SYSTEM_PROMPT,
+    PROMPT_ITEMS_DROPPED,
+    PROMPT_TOKENS,
+    PromptBuilder,
+    truncate_to_tokens,
+)
+from app.ai.tokens import EstimatingTokenizer, get_tokenizer, register_tokenizer
+
+
+class WordTokenizer:
+    def count(self, text: str) -> int:
+        return len(text.split())
+
+
+def test_truncate_prefers_sentence_boundaries():
+    tok = WordTokenizer()
+    text = "One two three. Four five six. Seven eight nine."
+    assert truncate_to_tokens(text, 7, tok) == "One two three. Four five six.…"
+    assert truncate_to_tokens(text, 100, tok) == text
+
+
+def test_chat_prompt_fills_budget_in_priority_order():
+    builder = PromptBuilder(budget=60, tokenizer=WordTokenizer())
+    snippets = ["alpha " * 20, "beta " * 20, "gamma " * 20]
+    history = [("user", "old question " * 5), ("assistant", "old answer " * 5)]
+    built = PROMPT_TOKENS.count(section="total")
+    dropped = PROMPT_ITEMS_DROPPED.value(kind="snippet")
+    prompt = builder.build_chat("How do I reset my password?", snippets, history)
+
+    assert prompt.system == CHAT_SYSTEM_PROMPT
+    assert "How do I reset my password?" in prompt.user
+    assert "Snippet 1: alpha" in prompt.user
+    assert "gamma" not in prompt.user
+    assert "CONVERSATION HISTORY" not in prompt.user  # snippets used up the budget
+    assert prompt.stats.user_tokens <= 60
+    assert prompt.stats.snippets_dropped >= 1
+    assert PROMPT_TOKENS.count(section="total") == built + 1
+    assert PROMPT_ITEMS_DROPPED.value(kind="snippet") == dropped + prompt.stats.snippets_dropped
+
+
+def test_chat_prompt_keeps_newest_history_first():
+    builder = PromptBuilder(budget=40, tokenizer=WordTokenizer())
+    history = [("user", "first " * 10), ("assistant", "second " * 10), ("user", "third")]
+    prompt = builder.build_chat("question", [], history, summary="User: earlier")
+    assert "- User: third" in prompt.user
+    assert "first" not in prompt.user
+    assert prompt.stats.history_turns_used == 2
+
+
+def test_pluggable_tokenizer_and_estimator_fallback():
+    assert EstimatingTokenizer().count("abcd" * 10) == 10
+    assert EstimatingTokenizer().count("你好") == 2
+    register_tokenizer("test-model", lambda model: WordTokenizer())
+    assert isinstance(get_tokenizer("test-model-1"), WordTokenizer)
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ai import provider_pool
+from app.ai.provider_pool import Endpoint, ProviderPool
+from app.core.config import get_settings
+from app.main import app
+
+
+def _completion(text: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+
+def _pool(handler, **kwargs) -> ProviderPool:
+    endpoints = [
+        Endpoint(name="a", base_url="http://a.test", api_key="ka"),
+        Endpoint(name="b", base_url="http://b.test", api_key="kb"),
+    ]
+    pool = ProviderPool(endpoints, transport=httpx.MockTransport(handler), **kwargs)
+    # Make "a" the preferred endpoint
+    pool._stats["a"].ewma_latency = 0.001
+    pool._stats["b"].ewma_latency = 0.01
+    return pool
+
+
+def test_hedged_request_wins_and_slow_primary_is_cancelled():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "a.test":
+            await asyncio.sleep(2)
+            return httpx.Response(200, json=_completion("slow"))
+        return httpx.Response(200, json=_completion("fast"))
+
+    pool = _pool(handler, hedge=True, hedge_delay=0.05)
+    assert pool.complete([{"role": "user", "content": "hi"}], "m") == "fast"
+    stats = {row["name"]: row for row in pool.snapshot()}
+    assert stats["b"]["hedges_won"] == 1
+    assert stats["a"]["in_flight"] == 0
+    assert stats["a"]["failures"] == 0  # cancelled, not failed
+
+
+def test_fails_over_on_429_and_cools_endpoint_down():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        if request.url.host == "a.test":
+            return httpx.Response(429, headers={"Retry-After": "5"})
+        assert request.headers["authorization"] == "Bearer kb"
+        return httpx.Response(200, json=_completion("from b"))
+
+    pool = _pool(handler, hedge=False)
+    assert pool.complete([{"role": "user", "content": "hi"}], "m") == "from b"
+    assert seen == ["a.test", "b.test"]
+    stats = {row["name"]: row for row in pool.snapshot()}
+    assert stats["a"]["healthy"] is False
+    assert stats["a"]["rate_limited"] == 1
+    # The cooling endpoint is now ranked last.
+    assert [e.name for e in pool.ranked()] == ["b", "a"]
+
+
+def test_client_errors_are_not_retried():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        return httpx.Response(400, json={"error": "bad request"})
+
+    pool = _pool(handler, hedge=False)
+    with pytest.raises(RuntimeError, match="HTTP 400"):
+        pool.complete([{"role": "user", "content": "hi"}], "m")
+    assert seen == ["a.test"]
+
+
+def test_pool_reuses_one_client_and_works_inside_a_running_loop():
+    hosts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        return httpx.Response(200, json=_completion("ok"))
+
+    pool = _pool(handler, hedge=False)
+    messages = [{"role": "user", "content": "hi"}]
+    assert pool.complete(messages, "m") == "ok"
+    client = pool._client()
+
+    async def from_async_code() -> str:
+        return pool.complete(messages, "m")
+
+    # asyncio.run(...) inside complete() used to raise here
+    assert asyncio.run(from_async_code()) == "ok"
+    assert pool._client() is client and not client.is_closed
+    pool.close()
+    assert client.is_closed
+
+
+def test_providers_endpoint_lists_configured_pool(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(
+        settings,
+        "llm_endpoints",
+        [{"name": "primary", "base_url": "http://p.test", "api_key": "k", "weight": 2}],
+    )
+    provider_pool.reset_provider_pool()
+    try:
+        r = TestClient(app).get("/api/ai/providers")
+        assert r.status_code == 200
+        (row,) = r.json()
+        assert row["name"] == "primary"
+        assert row["weight"] == 2
+        assert "api_key" not in row
+    finally:
+        provider_pool.reset_provider_pool()
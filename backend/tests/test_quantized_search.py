@@ -0,0 +1,93 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.main import app
+from app.rag import store
+from app.rag.quantized import QuantizedIndex
+
+client = TestClient(app)
+
+
+def _unit_vectors(n, dim, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("precision, ratio", [("float16", 0.55), ("int8", 0.3)])
+def test_quantized_candidates_match_exact_neighbours(precision, ratio):
+    vectors = _unit_vectors(2000, 64)
+    ids = [f"v{i}" for i in range(len(vectors))]
+    index = QuantizedIndex(ids, vectors, precision=precision)
+    assert index.nbytes < vectors.nbytes * ratio
+
+    hits = 0
+    for query in _unit_vectors(50, 64, seed=1):
+        exact = np.argsort(((vectors - query) ** 2).sum(axis=1))[:5]
+        candidates, dists = index.candidates(query, 20)
+        assert list(dists) == sorted(dists)
+        hits += len({ids[i] for i in exact} & set(candidates))
+    assert hits / (50 * 5) >= 0.98
+
+
+def test_similarity_search_with_quantized_index_matches_chroma(vector_store, monkeypatch):
+    docs = [
+        {"id": f"q{i}", "text": text}
+        for i, text in enumerate(
+            [
+                "Reset your password from the sign-in page.",
+                "Refunds are issued to the original payment method.",
+                "Two-factor codes fail when the device clock drifts.",
+                "Invoices can be downloaded from the billing page.",
+                "Locked accounts unlock automatically after 30 minutes.",
+            ]
+        )
+    ]
+    r = client.post("/api/kb/ingest", json={"collection": "kb_quant_test", "chunk": False, "documents": docs})
+    assert r.status_code == 201, r.text
+
+    query = "how do I download an invoice from billing"
+    ids, _, _, dists = store.similarity_search(query, n_results=3, collection="kb_quant_test")
+    monkeypatch.setattr(get_settings(), "vector_search_quantization", "int8")
+    q_ids, q_docs, _, q_dists = store.similarity_search(query, n_results=3, collection="kb_quant_test")
+    assert q_ids == ids
+    assert q_dists == pytest.approx(dists, abs=1e-4)
+    assert q_docs[0] == "Invoices can be downloaded from the billing page."
+
+    # Writes drop the cached index so new chunks are searchable immediately.
+    client.post(
+        "/api/kb/ingest",
+        json={"collection": "kb_quant_test", "chunk": False,
+              "documents": [{"id": "q9", "text": "Download invoice billing PDF invoice download"}]},
+    )
+    assert store.similarity_search(query, n_results=1, collection="kb_quant_test")[0] == ["q9"]
+
+
+def test_quantized_index_builds_once_and_notices_outside_writes(vector_store, monkeypatch):
+    docs = [{"id": f"w{i}", "text": f"warehouse shipping note {i}"} for i in range(4)]
+    r = client.post("/api/kb/ingest", json={"collection": "kb_quant_build", "chunk": False, "documents": docs})
+    assert r.status_code == 201, r.text
+
+    builds = []
+    real_build = store._build_quantized_index
+
+    def slow_build(collection, precision):
+        builds.append(collection)
+        time.sleep(0.2)
+        return real_build(collection, precision)
+
+    monkeypatch.setattr(store, "_build_quantized_index", slow_build)
+    with ThreadPoolExecutor(4) as pool:
+        indexes = list(pool.map(lambda _: store._get_quantized_index("kb_quant_build", "int8"), range(4)))
+    assert len(builds) == 1 and all(index is indexes[0] for index in indexes)
+    assert len(indexes[0]) == 4
+
+    # Another process adds a row: nothing is invalidated locally, but the size no longer matches
+    store.get_collection("kb_quant_build").add(ids=["w9"], embeddings=[[0.0] * indexes[0].dim], documents=["x"])
+    store._counts.pop("kb_quant_build")
+    assert len(store._get_quantized_index("kb_quant_build", "int8")) == 5
+    assert len(builds) == 2
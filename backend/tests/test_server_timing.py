@@ -0,0 +1,82 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.core import timing
+from app.core.config import get_settings
+from app.core.metrics import observe_stage
+from app.core.profiling import SamplingProfiler
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _timing(response) -> dict:
+    parts = [p.strip().split(";dur=") for p in response.headers["server-timing"].split(",")]
+    return {name: float(dur) for name, dur in parts}
+
+
+def test_server_timing_breaks_request_into_stages():
+    r = client.post("/api/kb/search", json={"query": "reset password", "n_results": 1})
+    assert r.status_code == 200
+    timing = _timing(r)
+    assert {"embed", "retrieve", "total"} <= set(timing)
+    assert timing["total"] >= timing["retrieve"]
+
+    r = client.get("/api/tickets/")
+    assert "db" in _timing(r)
+
+
+def test_profile_requires_token_and_is_fetchable_by_id(monkeypatch):
+    r = client.get("/health", headers={"X-Profile": "guess"})
+    assert "x-profile-id" not in r.headers
+
+    monkeypatch.setattr(get_settings(), "profiling_token", "s3cret")
+    r = client.post(
+        "/api/kb/search",
+        json={"query": "reset password", "n_results": 1},
+        headers={"X-Profile": "s3cret"},
+    )
+    profile_id = r.headers["x-profile-id"]
+
+    assert client.get(f"/debug/profiles/{profile_id}").status_code == 403
+    r = client.get(f"/debug/profiles/{profile_id}", headers={"X-Profile": "s3cret"})
+    assert r.status_code == 200
+    data = r.json()
+    assert data["path"] == "/api/kb/search"
+    assert "retrieve" in data["server_timing"]
+    assert isinstance(data["top"], list)
+
+
+def test_profiler_is_not_joined_on_the_event_loop(monkeypatch):
+    joined_on_loop = []
+    real_stop = SamplingProfiler.stop
+
+    def stop(self, wait=True):
+        if wait:
+            joined_on_loop.append(asyncio._get_running_loop() is not None)
+        real_stop(self, wait)
+
+    monkeypatch.setattr(SamplingProfiler, "stop", stop)
+    monkeypatch.setattr(get_settings(), "profiling_token", "s3cret")
+    r = client.get("/health", headers={"X-Profile": "s3cret"})
+    assert "x-profile-id" in r.headers
+    assert joined_on_loop == [False]
+
+
+def test_stage_totals_are_exact_across_threads():
+    token = timing._request_stages.set(timing._StageTotals())
+    try:
+        def work() -> None:
+            for _ in range(2000):
+                observe_stage("db", 0.001)
+
+        with ThreadPoolExecutor(8) as pool:
+            for future in [pool.submit(contextvars.copy_context().run, work) for _ in range(8)]:
+                future.result()
+        assert round(timing.current_stages()["db"], 6) == 16.0
+    finally:
+        timing._request_stages.reset(token)
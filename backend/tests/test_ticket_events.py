@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import get_settings
+from app.db.models import User
+from app.db.session import session_scope
+from app.events.hub import EventHub
+from app.events import outbox
+from app.events.outbox import event_committed, record_event
+from app.main import app
+
+client = TestClient(app)
+
+
+def _ticket() -> tuple[int, int]:
+    with session_scope() as session:
+        user = User(email=f"events_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        user_id = user.id
+    r = client.post("/api/tickets/", json={"title": "Live", "content": "Conversation", "requester_id": user_id})
+    assert r.status_code == 201, r.text
+    return r.json()["id"], user_id
+
+
+def _post(ticket_id: int, user_id: int, content: str) -> dict:
+    r = client.post(f"/api/tickets/{ticket_id}/messages", params={"sender_id": user_id}, json={"content": content})
+    assert r.status_code == 201, r.text
+    return r.json()
+
+
+@pytest.fixture
+def short_streams(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ticket_events_stream_max_seconds", 1.0)
+
+
+def test_incremental_fetch_and_etag():
+    ticket_id, user_id = _ticket()
+    ids = [_post(ticket_id, user_id, f"m{i}")["id"] for i in range(3)]
+    url = f"/api/tickets/{ticket_id}/messages"
+
+    r = client.get(url)
+    assert [m["id"] for m in r.json()] == ids
+    etag = r.headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    assert [m["content"] for m in client.get(url, params={"since_id": ids[0]}).json()] == ["m1", "m2"]
+    page = client.get(url, params={"limit": 2})
+    assert [m["id"] for m in page.json()] == ids[:2]
+    assert page.headers["x-next-since-id"] == str(ids[1])
+    assert "x-next-since-id" not in client.get(url, params={"since_id": ids[1], "limit": 2}).headers
+
+    _post(ticket_id, user_id, "m3")
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and len(r.json()) == 4
+
+
+def test_event_stream_replays_from_the_outbox(short_streams):
+    ticket_id, user_id = _ticket()
+    _post(ticket_id, user_id, "hello from the customer")
+    client.put(f"/api/tickets/{ticket_id}", json={"status": "in_progress"})
+
+    r = client.get(f"/api/tickets/{ticket_id}/events", params={"since_event_id": 0})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    assert "event: message.created" in r.text and "hello from the customer" in r.text
+    assert "event: ticket.updated" in r.text and '"status": "in_progress"' in r.text
+
+    last_id = max(int(line[4:]) for line in r.text.splitlines() if line.startswith("id: "))
+    again = client.get(f"/api/tickets/{ticket_id}/events", headers={"Last-Event-ID": str(last_id)})
+    assert "event:" not in again.text
+    assert client.get("/api/tickets/999999999/events").status_code == 404
+
+
+def test_new_messages_are_pushed_to_open_streams(short_streams):
+    ticket_id, user_id = _ticket()
+    body: list[str] = []
+    reader = threading.Thread(
+        target=lambda: body.append(client.get(f"/api/tickets/{ticket_id}/events").text)
+    )
+    reader.start()
+    time.sleep(0.3)
+    _post(ticket_id, user_id, "pushed while streaming")
+    reader.join(5)
+    assert "pushed while streaming" in body[0]
+
+
+def test_hub_delivers_events_committed_elsewhere():
+    ticket_id, _ = _ticket()
+
+    async def scenario():
+        hub = EventHub(poll_interval=60)
+        hub._last_id = 0
+        hub.poll()  # catch up on earlier tests' events
+        sub = hub.subscribe(ticket_id)
+        other = hub.subscribe(ticket_id + 1)
+        # Another worker process writes the outbox row; nothing wakes this hub.
+        with session_scope() as session:
+            record_event(session, ticket_id, "reply.created", {"content": "from worker 2"})
+            session.commit()
+        await asyncio.to_thread(hub.poll)
+        event = await sub.get(1)
+        assert event["type"] == "reply.created" and event["data"] == {"content": "from worker 2"}
+        assert other.queue.empty()
+        sub.close()
+        other.close()
+        hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_replay_and_hub_page_through_long_backlogs(monkeypatch, short_streams):
+    from app.api import messages
+
+    monkeypatch.setattr(outbox, "PAGE_SIZE", 2)
+    monkeypatch.setattr(messages, "PAGE_SIZE", 2)
+    ticket_id, user_id = _ticket()
+    with session_scope() as session:
+        start = outbox.latest_event_id(session)
+    for i in range(5):
+        _post(ticket_id, user_id, f"backlog {i}")
+
+    r = client.get(f"/api/tickets/{ticket_id}/events", params={"since_event_id": start})
+    assert all(f"backlog {i}" in r.text for i in range(5))
+
+    async def scenario():
+        hub = EventHub(poll_interval=60)
+        hub._last_id = start
+        sub = hub.subscribe(ticket_id)  # starts the hub thread, which polls at once
+        received = [(await sub.get(1))["data"]["content"] for _ in range(5)]
+        assert received == [f"backlog {i}" for i in range(5)]
+        sub.close()
+        hub.stop()
+
+    asyncio.run(scenario())
+
+
+def test_hub_position_is_seeded_when_the_first_stream_subscribes():
+    ticket_id, _ = _ticket()
+
+    async def scenario():
+        hub = EventHub(poll_interval=0.05)
+        with session_scope() as session:
+            latest = outbox.latest_event_id(session)
+        sub = hub.subscribe(ticket_id)
+        assert hub._last_id is not None and hub._last_id >= latest
+        # Committed right after subscribing, before the thread's first poll
+        with session_scope() as session:
+            record_event(session, ticket_id, "reply.created", {"content": "just after subscribe"})
+            session.commit()
+        event_committed()
+        assert (await sub.get(2))["data"] == {"content": "just after subscribe"}
+        sub.close()
+        hub.stop()
+
+    asyncio.run(scenario())
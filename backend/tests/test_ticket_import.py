@@ -0,0 +1,77 @@
+import io
+import json
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.db.bulk_import import import_records, iter_records
+from app.db.models import Ticket, User
+from app.db.session import get_session
+from app.main import app
+
+
+client = TestClient(app)
+
+
+def _make_user(session) -> User:
+    user = User(email=f"import_{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+    session.add(user)
+    session.commit()
+    return user
+
+
+def test_import_jsonl_validates_requesters_in_batches():
+    session = next(get_session())
+    user = _make_user(session)
+    lines = [
+        {"title": f"Legacy {i}", "content": "Migrated ticket", "requester_id": user.id}
+        for i in range(5)
+    ]
+    lines.append({"title": "Orphan", "content": "No requester", "requester_id": 10**9})
+    lines.append({"title": "Bad", "content": "Bad status", "requester_id": user.id, "status": "x"})
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+
+    r = client.post(
+        "/api/tickets/import",
+        params={"batch_size": 100},
+        files={"file": ("tickets.jsonl", body, "application/x-ndjson")},
+    )
+    assert r.status_code == 200, r.text
+    data = r.json()
+    assert data["inserted"] == 5
+    assert data["rejected"] == 3
+    reasons = {e["record"]: e["error"] for e in data["errors"]}
+    assert reasons[6] == "Requester not found"
+    assert reasons[7].startswith("Invalid status")
+    assert reasons[8].startswith("invalid JSON")
+    session.close()
+
+
+def test_import_csv_messages_and_resume_from_checkpoint(tmp_path):
+    session = next(get_session())
+    user = _make_user(session)
+    ticket = Ticket(title="t", content="c", requester_id=user.id)
+    session.add(ticket)
+    session.commit()
+
+    rows = ["ticket_id,sender_id,sender_type,content"]
+    rows += [f"{ticket.id},{user.id},user,message {i}" for i in range(10)]
+    data = ("\n".join(rows) + "\n").encode()
+    checkpoint = str(tmp_path / "ckpt.json")
+
+    first = import_records(
+        session, iter_records(io.BytesIO(data), "csv"), kind="messages",
+        batch_size=100, checkpoint_path=checkpoint,
+    )
+    assert first.inserted == 10
+
+    # Re-running against the same checkpoint skips everything already committed.
+    second = import_records(
+        session, iter_records(io.BytesIO(data), "csv"), kind="messages",
+        batch_size=100, checkpoint_path=checkpoint,
+    )
+    assert second.skipped == 10
+    assert second.inserted == 10
+    session.refresh(ticket)
+    assert len(ticket.messages) == 10
+    session.close()
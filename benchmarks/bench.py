@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Performance benchmarks for the RAG and ticket hot paths.
+
+Usage examples:
+  python benchmarks/bench.py --scale small --output bench-main.json
+  python benchmarks/bench.py --scale medium --only search,endpoints
+  python benchmarks/bench.py --baseline bench-main.json --threshold 0.15
+
+Everything runs in-process against a temporary SQLite database and Chroma
+directory filled with deterministic synthetic data (benchmarks/synthetic.py):
+
+- chunk:      chunk_text_strategy throughput (window and punctuation)
+- embed:      HashingEmbedding / SentenceTransformerEmbedding throughput
+- ingest:     add_documents rate into a fresh collection
+- search:     similarity_search latency p50/p99
+- classifier: TicketClassifier.predict latency p50/p99
+- endpoints:  ASGI latency for KB search, AI chat, ticket suggestion and
+              ticket listing, with the LLM call replaced by a stub and the
+              LLM result cache and request coalescing turned off
+
+Results are written as JSON (one flat ``name -> {value, unit, better}`` map
+plus run metadata). With ``--baseline`` each metric is compared to an earlier
+run and the exit code is 1 if any metric regressed by more than
+``--threshold`` (relative).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import synthetic  # noqa: E402  (benchmarks/ is the script directory)
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "small": {"docs": 200, "tickets": 1_000, "queries": 100, "requests": 50},
+    "medium": {"docs": 2_000, "tickets": 20_000, "queries": 300, "requests": 200},
+    "large": {"docs": 20_000, "tickets": 200_000, "queries": 500, "requests": 500},
+}
+SECTIONS = ["chunk", "embed", "ingest", "search", "classifier", "endpoints"]
+
+Results = Dict[str, Dict[str, object]]
+
+
+def _metric(results: Results, name: str, value: float, unit: str, better: str) -> None:
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _latency(results: Results, name: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+
+    def pct(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] * 1000
+
+    _metric(results, f"{name}.p50_ms", pct(0.50), "ms", "lower")
+    _metric(results, f"{name}.p99_ms", pct(0.99), "ms", "lower")
+    _metric(results, f"{name}.mean_ms", statistics.fmean(ordered) * 1000, "ms", "lower")
+
+
+def _time_each(fn: Callable[[object], object], items: List[object], warmup: int = 3) -> List[float]:
+    for item in items[:warmup]:
+        fn(item)
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _throughput(fn: Callable[[], object], units: float, repeat: int = 3) -> float:
+    """Best-of-``repeat`` units per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return units / max(best, 1e-9)
+
+
+def bench_chunk(results: Results, articles: List[Dict[str, str]]) -> None:
+    from app.rag.chunk import chunk_text_strategy
+
+    texts = [a["text"] for a in articles]
+    megabytes = sum(len(t) for t in texts) / 1e6
+    for strategy, delimiters in (("window", None), ("punctuation", ".!?")):
+        rate = _throughput(
+            lambda: [chunk_text_strategy(t, strategy=strategy, delimiters=delimiters) for t in texts],
+            megabytes,
+        )
+        _metric(results, f"chunk.{strategy}.mb_per_s", rate, "MB/s", "higher")
+
+
+def bench_embed(results: Results, chunks: List[str], meta: Dict[str, object]) -> None:
+    from app.rag.embeddings import HashingEmbedding, SentenceTransformerEmbedding, _try_import_sentence_transformers
+
+    hashing = HashingEmbedding()
+    rate = _throughput(lambda: hashing.embed_documents(chunks), len(chunks))
+    _metric(results, "embed.hashing.docs_per_s", rate, "docs/s", "higher")
+
+    if _try_import_sentence_transformers() is None:
+        meta.setdefault("skipped", []).append("embed.sentence_transformers (not installed)")
+        return
+    model = os.environ.get("SENTENCE_TRANSFORMERS_MODEL") or SentenceTransformerEmbedding.model_name
+    st = SentenceTransformerEmbedding(model_name=model)
+    st.embed_documents(chunks[:8])  # load the model outside the timed region
+    sample = chunks[: min(len(chunks), 512)]
+    rate = _throughput(lambda: st.embed_documents(sample), len(sample), repeat=1)
+    _metric(results, "embed.sentence_transformers.docs_per_s", rate, "docs/s", "higher")
+    meta["sentence_transformers_model"] = model
+
+
+def bench_ingest(results: Results, chunks: List[str], collection: str) -> None:
+    from app.rag.store import add_documents
+
+    started = time.perf_counter()
+    for i in range(0, len(chunks), 256):
+        batch = chunks[i : i + 256]
+        add_documents(batch, ids=[f"bench_{i + j}" for j in range(len(batch))], collection=collection)
+    elapsed = time.perf_counter() - started
+    _metric(results, "ingest.docs_per_s", len(chunks) / elapsed, "docs/s", "higher")
+
+
+def bench_search(results: Results, queries: List[str], collection: str) -> None:
+    from app.rag.store import similarity_search
+
+    samples = _time_each(lambda q: similarity_search(q, n_results=4, collection=collection), queries)
+    _latency(results, "search", samples)
+
+
+def bench_classifier(results: Results, queries: List[str]) -> None:
+    from app.ai.classifier import get_ticket_classifier
+
+    classifier = get_ticket_classifier()
+    samples = _time_each(classifier.predict, queries)
+    _latency(results, "classifier.predict", samples)
+
+
+def _seed_tickets(count: int) -> List[int]:
+    from sqlalchemy import select
+
+    from app.db.bulk_import import import_records
+    from app.db.models import Ticket, User
+    from app.db.session import session_scope
+
+    with session_scope() as session:
+        users = [User(email=f"bench{i}@example.com", hashed_password="x") for i in range(20)]
+        session.add_all(users)
+        session.commit()
+        import_records(session, synthetic.ticket_records(count, [u.id for u in users]), kind="tickets")
+        return list(session.scalars(select(Ticket.id).order_by(Ticket.id).limit(1000)))
+
+
+async def _bench_endpoints(results: Results, queries: List[str], ticket_ids: List[int], requests: int, collection: str, llm_latency: float) -> None:
+    import httpx
+
+    import app.ai.llm as llm
+    from app.main import app
+
+    def _stub_llm(prompt: str, override=None, system_prompt: str = "") -> str:
+        if llm_latency:
+            time.sleep(llm_latency)
+        return f"Stub answer ({len(prompt)} prompt chars)."
+
+    llm._call_openai_compatible_api = _stub_llm  # the benchmark measures our code, not a provider
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        cases = {
+            "kb_search": lambda i: client.post(
+                "/api/kb/search", json={"query": queries[i % len(queries)], "n_results": 4, "collection": collection}
+            ),
+            "ai_chat": lambda i: client.post(
+                "/api/ai/chat", json={"query": queries[i % len(queries)], "collection": collection}
+            ),
+            "ticket_suggest": lambda i: client.post(
+                f"/api/ai/tickets/{ticket_ids[i % len(ticket_ids)]}/suggest", json={"collection": collection}
+            ),
+            "tickets_list": lambda i: client.get("/api/tickets/", params={"page": i % 10 + 1, "page_size": 50}),
+        }
+        for name, call in cases.items():
+            for i in range(3):
+                r = await call(i)
+                if r.status_code != 200:
+                    raise RuntimeError(f"{name} returned {r.status_code}: {r.text[:200]}")
+            samples = []
+            for i in range(requests):
+                started = time.perf_counter()
+                await call(i)
+                samples.append(time.perf_counter() - started)
+            _latency(results, f"endpoint.{name}", samples)
+
+
+def compare(current: Results, baseline: Results, threshold: float) -> List[str]:
+    """Return human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for name, entry in sorted(current.items()):
+        base = baseline.get(name)
+        if not base or not base.get("value"):
+            continue
+        old, new = float(base["value"]), float(entry["value"])
+        change = (new - old) / old
+        worse = change > threshold if entry["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(f"{name}: {old:g} -> {new:g} {entry['unit']} ({change:+.1%})")
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--docs", type=int, help="KB articles (overrides --scale)")
+    parser.add_argument("--tickets", type=int, help="Tickets (overrides --scale)")
+    parser.add_argument("--queries", type=int, help="Search/classifier queries (overrides --scale)")
+    parser.add_argument("--requests", type=int, help="Requests per endpoint (overrides --scale)")
+    parser.add_argument("--only", help=f"Comma-separated sections: {','.join(SECTIONS)}")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Sleep in the stubbed LLM call")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    for key in scale:
+        if getattr(args, key) is not None:
+            scale[key] = getattr(args, key)
+    sections = args.only.split(",") if args.only else SECTIONS
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"unknown sections: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="astratickets-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/bench.db"
+    os.environ["VECTOR_STORE_PATH"] = f"{workdir}/vector_store"
+    # The endpoint cases repeat prompts; the LLM result cache and request
+    # coalescing would answer them without running the chat/suggest path.
+    os.environ["LLM_CACHE_TTL_SECONDS"] = "0"
+    os.environ["LLM_COALESCE_REQUESTS"] = "false"
+
+    from app.db.session import init_models
+    from app.rag.chunk import chunk_text_strategy
+
+    init_models()
+    collection = "bench_kb"
+    articles = synthetic.kb_articles(scale["docs"], seed=args.seed)
+    queries = synthetic.queries(scale["queries"], seed=args.seed + 1)
+    chunks = [c for a in articles for c in chunk_text_strategy(a["text"])]
+
+    results: Results = {}
+    meta: Dict[str, object] = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": scale,
+        "seed": args.seed,
+        "chunks": len(chunks),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+    started = time.perf_counter()
+    if "chunk" in sections:
+        bench_chunk(results, articles)
+    if "embed" in sections:
+        bench_embed(results, chunks, meta)
+    if {"ingest", "search", "endpoints"} & set(sections):
+        # Search and endpoint benchmarks need a populated collection.
+        bench_ingest(results, chunks, collection)
+        if "ingest" not in sections:
+            results.pop("ingest.docs_per_s")
+    if "search" in sections:
+        bench_search(results, queries, collection)
+    if "classifier" in sections:
+        bench_classifier(results, queries)
+    if "endpoints" in sections:
+        ticket_ids = _seed_tickets(scale["tickets"])
+        asyncio.run(
+            _bench_endpoints(results, queries, ticket_ids, scale["requests"], collection, args.llm_latency_ms / 1000)
+        )
+    meta["duration_s"] = round(time.perf_counter() - started, 2)
+
+    width = max(len(name) for name in results) if results else 10
+    for name, entry in results.items():
+        print(f"{name:<{width}}  {entry['value']:>12,.3f} {entry['unit']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nno regressions beyond {args.threshold:.0%} vs {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Throughput and query latency of each embedding inference backend.
+
+Usage examples:
+  python benchmarks/embedding_backends.py
+  python benchmarks/embedding_backends.py --docs 500 --batch-size 64 --threads 4 --json embed.json
+  SENTENCE_TRANSFORMERS_MODEL=BAAI/bge-small-en-v1.5 python benchmarks/embedding_backends.py --backends torch,onnx
+
+Embeds the sample KB (samples/kb) plus ``--docs`` synthetic articles,
+chunked the way ingest chunks them, with the hashing embedder and with each
+SentenceTransformers backend (torch, torch-int8, onnx), and reports:
+
+- docs/s of embed_documents over all chunks
+- p50/p99 latency of single-text embed_query calls
+- mean cosine similarity to the torch vectors (how much quantization or
+  ONNX conversion moves the embeddings)
+
+Backends whose dependencies are missing are reported as skipped.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import synthetic  # noqa: E402  (benchmarks/ is the script directory)
+
+from app.rag.chunk import chunk_text_strategy  # noqa: E402
+from app.rag.embeddings import (  # noqa: E402
+    ST_BACKENDS,
+    EmbeddingProvider,
+    HashingEmbedding,
+    SentenceTransformerEmbedding,
+    _try_import_sentence_transformers,
+)
+
+
+def _corpus(docs: int) -> List[str]:
+    texts = [p.read_text(encoding="utf-8") for p in sorted((REPO_ROOT / "samples" / "kb").glob("*.md"))]
+    texts += [a["text"] for a in synthetic.kb_articles(docs)]
+    chunks: List[str] = []
+    for text in texts:
+        chunks.extend(chunk_text_strategy(text, strategy="window", max_chars=600, overlap=80))
+    return chunks
+
+
+def _measure(provider: EmbeddingProvider, chunks: List[str], queries: List[str]) -> Dict[str, object]:
+    provider.embed_documents(chunks[:8])  # load the model outside the timed region
+    started = time.perf_counter()
+    vectors = np.asarray(provider.embed_documents(chunks), dtype=np.float32)
+    elapsed = time.perf_counter() - started
+    latencies: List[float] = []
+    for q in queries:
+        started = time.perf_counter()
+        provider.embed_query(q)
+        latencies.append(1000 * (time.perf_counter() - started))
+    return {
+        "vectors": vectors,
+        "docs_per_s": round(len(chunks) / elapsed, 1),
+        "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "query_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    chunks = _corpus(args.docs)
+    queries = synthetic.queries(args.queries)
+    model = os.environ.get("SENTENCE_TRANSFORMERS_MODEL") or SentenceTransformerEmbedding.model_name
+    report: Dict[str, object] = {
+        "chunks": len(chunks),
+        "queries": len(queries),
+        "batch_size": args.batch_size,
+        "threads": args.threads,
+        "sentence_transformers_model": model,
+        "backends": {},
+        "skipped": [],
+    }
+    results: Dict[str, Dict[str, object]] = report["backends"]  # type: ignore[assignment]
+
+    results["hashing"] = _measure(HashingEmbedding(), chunks, queries)
+    if _try_import_sentence_transformers() is None:
+        report["skipped"].append("sentence_transformers backends (not installed)")  # type: ignore[union-attr]
+    else:
+        for backend in args.backends:
+            provider = SentenceTransformerEmbedding(
+                model_name=model, backend=backend, batch_size=args.batch_size, threads=args.threads
+            )
+            try:
+                results[backend] = _measure(provider, chunks, queries)
+            except Exception as exc:  # missing optional runtime, unsupported model, ...
+                report["skipped"].append(f"{backend} ({exc})")  # type: ignore[union-attr]
+
+    reference: Optional[np.ndarray] = results.get("torch", {}).get("vectors")  # type: ignore[assignment]
+    for name, row in results.items():
+        vectors = row.pop("vectors")
+        if reference is not None and name != "hashing":
+            row["cosine_to_torch"] = round(float(np.mean(np.sum(vectors * reference, axis=1))), 4)
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic articles added to samples/kb")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", type=lambda s: s.split(","), default=list(ST_BACKENDS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads (default: library default)")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+    unknown = set(args.backends) - set(ST_BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+
+    report = run(args)
+    print(
+        f"{report['chunks']} chunks, {report['queries']} queries, batch_size={args.batch_size}, "
+        f"threads={args.threads or 'default'}, model={report['sentence_transformers_model']}"
+    )
+    print(f"{'backend':<12} {'docs/s':>10} {'query p50':>10} {'query p99':>10} {'cos':>7}")
+    for name, row in report["backends"].items():  # type: ignore[union-attr]
+        print(
+            f"{name:<12} {row['docs_per_s']:>10} {row['query_p50_ms']:>8}ms {row['query_p99_ms']:>8}ms "
+            f"{row.get('cosine_to_torch', '-'):>7}"
+        )
+    for skipped in report["skipped"]:  # type: ignore[union-attr]
+        print(f"skipped: {skipped}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Open-loop load generator for the chat, suggestion and KB endpoints.
+
+Usage examples:
+  # 1. stub LLM, 2. backend pointed at it, 3. load
+  python benchmarks/stub_llm.py --port 9000 --ttft-ms 300 --tokens-per-sec 40
+  LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:9000 OPENAI_API_KEY=stub make run-backend
+  python benchmarks/loadgen.py --rps 20 --duration 30 --seed-kb 200 --seed-tickets 50
+
+  python benchmarks/loadgen.py --rps 50 --mix chat=1,suggest=0,kb=3 --json load.json
+
+Requests are started on a fixed schedule (``--rps``) whether or not earlier
+ones have finished, and latency is measured from the scheduled start, so a
+saturated server shows up as growing latency instead of a silently lower
+request rate. Reports per-endpoint p50/p90/p99, achieved throughput and
+status code counts.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+import synthetic  # noqa: E402  (benchmarks/ is the script directory)
+
+ENDPOINTS = ("chat", "suggest", "kb")
+
+
+def _parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return mix
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def _seed(client: httpx.AsyncClient, kb_docs: int, tickets: int, collection: str) -> List[int]:
+    if kb_docs:
+        articles = synthetic.kb_articles(kb_docs)
+        for i in range(0, len(articles), 100):
+            batch = articles[i : i + 100]
+            r = await client.post(
+                "/api/kb/ingest",
+                json={
+                    "collection": collection,
+                    "documents": [{"text": a["text"], "metadata": {"title": a["title"]}} for a in batch],
+                },
+            )
+            r.raise_for_status()
+    ticket_ids: List[int] = []
+    if tickets:
+        email = f"loadgen_{int(time.time())}@example.com"
+        r = await client.post("/api/auth/register", json={"email": email, "password": "loadgen"})
+        r.raise_for_status()
+        requester_id = r.json()["id"]
+        for record in synthetic.ticket_records(tickets, [requester_id]):
+            r = await client.post(
+                "/api/tickets/",
+                json={k: record[k] for k in ("title", "content", "priority", "requester_id")},
+            )
+            r.raise_for_status()
+            ticket_ids.append(r.json()["id"])
+    return ticket_ids
+
+
+async def _existing_ticket_ids(client: httpx.AsyncClient) -> List[int]:
+    r = await client.get("/api/tickets/", params={"page_size": 100})
+    r.raise_for_status()
+    return [t["id"] for t in r.json()]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, object]:
+    rng = random.Random(args.seed)
+    queries = synthetic.queries(500, seed=args.seed)
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        ticket_ids = await _seed(client, args.seed_kb, args.seed_tickets, args.collection)
+        if args.mix.get("suggest") and not ticket_ids:
+            ticket_ids = await _existing_ticket_ids(client)
+            if not ticket_ids:
+                raise SystemExit("no tickets to suggest on; use --seed-tickets")
+
+        names = [n for n in ENDPOINTS if args.mix.get(n)]
+        weights = [args.mix[n] for n in names]
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        statuses: Dict[str, Counter] = defaultdict(Counter)
+
+        async def one(name: str, scheduled: float) -> None:
+            query = rng.choice(queries)
+            try:
+                if name == "chat":
+                    r = await client.post("/api/ai/chat", json={"query": query, "collection": args.collection})
+                elif name == "suggest":
+                    r = await client.post(
+                        f"/api/ai/tickets/{rng.choice(ticket_ids)}/suggest", json={"collection": args.collection}
+                    )
+                else:
+                    r = await client.post(
+                        "/api/kb/search", json={"query": query, "n_results": 4, "collection": args.collection}
+                    )
+                statuses[name][str(r.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[name][type(exc).__name__] += 1
+            latencies[name].append(time.perf_counter() - scheduled)
+
+        total = int(args.rps * args.duration)
+        interval = 1.0 / args.rps
+        tasks = []
+        started = time.perf_counter()
+        for i in range(total):
+            scheduled = started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = rng.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(one(name, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    report: Dict[str, object] = {
+        "target_rps": args.rps,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "achieved_rps": round(total / elapsed, 2),
+        "endpoints": {},
+    }
+    for name in names:
+        ordered = sorted(latencies[name])
+        if not ordered:
+            continue
+        ok = sum(c for s, c in statuses[name].items() if s.startswith("2"))
+        report["endpoints"][name] = {  # type: ignore[index]
+            "requests": len(ordered),
+            "ok": ok,
+            "throughput_rps": round(ok / elapsed, 2),
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 1),
+            "p90_ms": round(_percentile(ordered, 0.90) * 1000, 1),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 1),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 1),
+            "statuses": dict(statuses[name]),
+        }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("chat=1,suggest=1,kb=1"),
+                        help="Endpoint weights, e.g. chat=2,suggest=1,kb=3")
+    parser.add_argument("--collection", default="kb_main")
+    parser.add_argument("--seed-kb", type=int, default=0, help="Ingest this many synthetic KB articles first")
+    parser.add_argument("--seed-tickets", type=int, default=0, help="Create this many synthetic tickets first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(
+        f"target {report['target_rps']} rps for {report['duration_s']}s: "
+        f"{report['requests']} requests, achieved {report['achieved_rps']} rps"
+    )
+    print(f"{'endpoint':<8} {'reqs':>6} {'ok rps':>7} {'p50':>8} {'p90':>8} {'p99':>8}  statuses")
+    for name, row in report["endpoints"].items():  # type: ignore[union-attr]
+        print(
+            f"{name:<8} {row['requests']:>6} {row['throughput_rps']:>7} {row['p50_ms']:>7}ms "
+            f"{row['p90_ms']:>7}ms {row['p99_ms']:>7}ms  {row['statuses']}"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
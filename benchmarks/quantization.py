@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Memory vs recall@k of the quantized in-process vector index.
+
+Usage examples:
+  python benchmarks/quantization.py
+  python benchmarks/quantization.py --docs 5000 --k 5 --rescore-factor 4 --json quant.json
+  SENTENCE_TRANSFORMERS_MODEL=sentence-transformers/all-MiniLM-L6-v2 python benchmarks/quantization.py
+
+Embeds the sample KB (samples/kb) plus ``--docs`` synthetic articles with
+the configured embedding provider, chunked the way ingest chunks them, then
+compares float16 and int8 indexes (app.rag.quantized) against exact float32
+search:
+
+- bytes held by the index and the saving against a float32 matrix
+- recall@k of the raw quantized ranking
+- recall@k after exact float32 rescoring of k * rescore_factor candidates
+  (what similarity_search returns with VECTOR_SEARCH_QUANTIZATION set)
+- mean query latency of the candidate pass
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import synthetic  # noqa: E402  (benchmarks/ is the script directory)
+
+from app.rag.chunk import chunk_text_strategy  # noqa: E402
+from app.rag.quantized import PRECISIONS, QuantizedIndex  # noqa: E402
+from app.rag.store import _get_provider  # noqa: E402
+
+
+def _corpus(docs: int) -> List[str]:
+    texts = [p.read_text(encoding="utf-8") for p in sorted((REPO_ROOT / "samples" / "kb").glob("*.md"))]
+    texts += [a["text"] for a in synthetic.kb_articles(docs)]
+    chunks: List[str] = []
+    for text in texts:
+        chunks.extend(chunk_text_strategy(text, strategy="window", max_chars=600, overlap=80))
+    return chunks
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    provider = _get_provider()
+    chunks = _corpus(args.docs)
+    vectors = np.asarray(provider.embed_documents(chunks), dtype=np.float32)
+    queries = np.asarray([provider.embed_query(q) for q in synthetic.queries(args.queries)], dtype=np.float32)
+    ids = [str(i) for i in range(len(chunks))]
+
+    sq_norms = (vectors**2).sum(axis=1)
+    truth = [set(np.argsort(sq_norms - 2 * vectors @ q)[: args.k].tolist()) for q in queries]
+
+    report: Dict[str, object] = {
+        "embedding_model": provider.model_id,
+        "chunks": len(chunks),
+        "dim": int(vectors.shape[1]),
+        "k": args.k,
+        "rescore_factor": args.rescore_factor,
+        "float32_bytes": int(vectors.nbytes),
+        "precisions": {},
+    }
+    for precision in PRECISIONS:
+        index = QuantizedIndex(ids, vectors, precision=precision)
+        raw_hits = rescored_hits = 0
+        elapsed = 0.0
+        for q, expected in zip(queries, truth):
+            started = time.perf_counter()
+            candidates, _ = index.candidates(q, args.k * args.rescore_factor)
+            elapsed += time.perf_counter() - started
+            rows = np.asarray([int(c) for c in candidates])
+            raw_hits += len(expected & set(rows[: args.k].tolist()))
+            exact = ((vectors[rows] - q) ** 2).sum(axis=1)
+            rescored_hits += len(expected & set(rows[np.argsort(exact)[: args.k]].tolist()))
+        total = len(queries) * args.k
+        report["precisions"][precision] = {  # type: ignore[index]
+            "bytes": index.nbytes,
+            "saved_pct": round(100 * (1 - index.nbytes / vectors.nbytes), 1),
+            "recall_at_k": round(raw_hits / total, 4),
+            "recall_at_k_rescored": round(rescored_hits / total, 4),
+            "query_ms": round(1000 * elapsed / len(queries), 3),
+        }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000, help="Synthetic articles added to samples/kb")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(
+        f"{report['chunks']} chunks x {report['dim']}d ({report['embedding_model']}), "
+        f"float32 {report['float32_bytes'] / 1e6:.2f} MB, recall@{args.k}"
+    )
+    print(f"{'precision':<10} {'MB':>7} {'saved':>7} {'recall':>8} {'rescored':>9} {'query':>9}")
+    for name, row in report["precisions"].items():  # type: ignore[union-attr]
+        print(
+            f"{name:<10} {row['bytes'] / 1e6:>7.2f} {row['saved_pct']:>6}% {row['recall_at_k']:>8} "
+            f"{row['recall_at_k_rescored']:>9} {row['query_ms']:>7}ms"
+        )
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
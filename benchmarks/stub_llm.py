@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Local OpenAI-compatible stub LLM server for load and latency testing.
+
+Usage examples:
+  python benchmarks/stub_llm.py --port 9000
+  python benchmarks/stub_llm.py --port 9000 --ttft-ms 300 --tokens-per-sec 40 --error-rate 0.01 --rate-limit-rate 0.05
+
+Point the backend at it:
+  LLM_PROVIDER=openai LLM_BASE_URL=http://127.0.0.1:9000 OPENAI_API_KEY=stub make run-backend
+
+Speaks ``POST /v1/chat/completions`` (plain JSON and ``"stream": true``
+server-sent events) and ``GET /v1/models``. Answers are canned and chosen
+by hashing the messages, so the same prompt always gets the same answer.
+Latency is modelled as time-to-first-token plus ``tokens / tokens_per_sec``;
+``--error-rate`` returns 500s and ``--rate-limit-rate`` returns 429s with
+``Retry-After``. ``GET /stats`` reports what the server has seen.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CANNED_ANSWERS = [
+    "Thanks for reaching out. Please use the 'Forgot password' link on the sign-in page; "
+    "the reset email arrives within a few minutes and the link stays valid for 24 hours.",
+    "I'm sorry for the trouble signing in. Please clear your browser cookies, make sure "
+    "caps lock is off, and try again. If two-factor codes fail, check your device clock.",
+    "For your security the account was locked after several failed attempts. It unlocks "
+    "automatically after 30 minutes, or we can unlock it once you verify your identity.",
+    "Thanks for flagging the billing issue. I've reviewed the invoice and opened a refund "
+    "request for the duplicate charge; it should appear on your statement in 5-7 days.",
+    "You can change this under Settings > Profile. Changes are saved immediately and "
+    "apply to all devices the next time you sign in.",
+]
+
+
+@dataclass
+class StubConfig:
+    ttft_ms: float = 200.0
+    tokens_per_sec: float = 50.0
+    jitter: float = 0.1
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_s: int = 1
+    max_tokens: int = 120
+    seed: int = 0
+
+
+@dataclass
+class StubStats:
+    requests: int = 0
+    streamed: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    completion_tokens: int = 0
+    started_at: float = field(default_factory=time.time)
+
+
+def _answer(messages: List[Dict[str, Any]], max_tokens: int) -> List[str]:
+    """Deterministic answer split into word tokens."""
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).digest()
+    words = CANNED_ANSWERS[digest[0] % len(CANNED_ANSWERS)].split(" ")
+    return [w if i == 0 else " " + w for i, w in enumerate(words[:max_tokens])]
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(config.seed)
+    stats = StubStats()
+
+    def _delay(seconds: float) -> float:
+        return max(0.0, seconds * (1 + rng.uniform(-config.jitter, config.jitter)))
+
+    @app.get("/v1/models")
+    async def models() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stats")
+    async def read_stats() -> Dict[str, Any]:
+        return {**asdict(stats), "config": asdict(config)}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats.requests += 1
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit exceeded (stub)", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": str(config.retry_after_s)},
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats.errors += 1
+            return JSONResponse(
+                {"error": {"message": "Internal error (stub)", "type": "server_error"}}, status_code=500
+            )
+
+        model = body.get("model") or "stub-model"
+        max_tokens = int(body.get("max_tokens") or config.max_tokens)
+        tokens = _answer(body.get("messages") or [], max_tokens)
+        stats.completion_tokens += len(tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        per_token = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0.0
+        prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages") or [])
+
+        if body.get("stream"):
+            stats.streamed += 1
+
+            async def events():
+                await asyncio.sleep(_delay(config.ttft_ms / 1000))
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(_delay(per_token))
+                    delta = {"content": token} if i else {"role": "assistant", "content": token}
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep(_delay(config.ttft_ms / 1000 + per_token * max(0, len(tokens) - 1)))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        }
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--ttft-ms", type=float, default=StubConfig.ttft_ms, help="Time to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=StubConfig.tokens_per_sec)
+    parser.add_argument("--jitter", type=float, default=StubConfig.jitter, help="Relative +/- latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--max-tokens", type=int, default=StubConfig.max_tokens)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = StubConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_s=args.retry_after,
+        max_tokens=args.max_tokens,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Deterministic synthetic data for benchmarks.
+
+KB articles and tickets are generated from a fixed support vocabulary with a
+seeded RNG, so the same ``seed`` and scale always produce the same corpus and
+runs on different commits measure the same work.
+"""
+from __future__ import annotations
+
+import random
+from typing import Dict, Iterator, List
+
+TOPICS: Dict[str, List[str]] = {
+    "password_reset": ["password", "reset", "link", "email", "expired", "forgot", "new", "token"],
+    "login_issue": ["login", "sign", "credentials", "invalid", "session", "browser", "two-factor", "code"],
+    "account_security": ["account", "locked", "suspicious", "alert", "security", "device", "verify", "attempts"],
+    "billing": ["invoice", "charged", "refund", "payment", "card", "subscription", "billing", "receipt"],
+    "general": ["profile", "settings", "notification", "dashboard", "export", "language", "theme", "help"],
+}
+FILLER = [
+    "the", "a", "my", "please", "after", "when", "again", "still", "cannot", "how", "do", "i",
+    "to", "is", "not", "working", "yesterday", "today", "customer", "support", "team", "update",
+]
+
+
+def _sentence(rng: random.Random, topic: str, words: int) -> str:
+    vocab = TOPICS[topic]
+    out = [rng.choice(vocab) if rng.random() < 0.45 else rng.choice(FILLER) for _ in range(words)]
+    return " ".join(out).capitalize() + "."
+
+
+def kb_articles(count: int, seed: int = 0, sentences: int = 12) -> List[Dict[str, str]]:
+    """``count`` KB articles of roughly ``sentences`` sentences each."""
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    articles = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        body = " ".join(_sentence(rng, topic, rng.randint(8, 20)) for _ in range(sentences))
+        articles.append({"title": f"{topic.replace('_', ' ').title()} guide #{i}", "topic": topic, "text": body})
+    return articles
+
+
+def queries(count: int, seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    return [_sentence(rng, rng.choice(topics), rng.randint(5, 12)) for _ in range(count)]
+
+
+def ticket_records(count: int, requester_ids: List[int], seed: int = 2) -> Iterator[Dict[str, object]]:
+    """Ticket dicts in the shape accepted by ``app.db.bulk_import.import_records``."""
+    rng = random.Random(seed)
+    topics = list(TOPICS)
+    statuses = ["open", "open", "in_progress", "resolved", "closed"]
+    priorities = ["low", "medium", "medium", "high", "urgent"]
+    for i in range(count):
+        topic = rng.choice(topics)
+        yield {
+            "title": _sentence(rng, topic, 6)[:120],
+            "content": " ".join(_sentence(rng, topic, rng.randint(10, 25)) for _ in range(3)),
+            "status": rng.choice(statuses),
+            "priority": rng.choice(priorities),
+            "requester_id": requester_ids[i % len(requester_ids)],
+        }
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Pre-draft AI suggestions for a ticket backlog.
+
+Usage examples:
+  python scripts/batch_suggest.py --status open
+  python scripts/batch_suggest.py --status open --priority urgent --concurrency 8 --rpm 120
+
+Results are stored in the ticket_suggestions table. Ctrl+C cancels: tickets
+already in flight finish, no new ones start. Ensure dependencies are
+installed and run from repo root.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Ensure backend/app is importable and paths align with the backend defaults
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{(BACKEND_DIR / 'astratickets.db').resolve()}")
+os.environ.setdefault("VECTOR_STORE_PATH", str((BACKEND_DIR / "vector_store").resolve()))
+
+from app.ai.batch import BatchFilters, BatchOptions, BatchSuggestionRunner, create_batch
+from app.ai.llm import LLMConfigOverride
+from app.db.models import SuggestionBatch
+from app.db.session import session_scope
+
+
+async def _report(runner: BatchSuggestionRunner, total: int, task: asyncio.Task) -> None:
+    started = time.perf_counter()
+    while not task.done():
+        await asyncio.sleep(2.0)
+        with session_scope() as session:
+            batch = session.get(SuggestionBatch, runner.batch_id)
+            done = (batch.completed + batch.failed) if batch else 0
+        rate = done / max(time.perf_counter() - started, 1e-6)
+        print(f"  {done}/{total} tickets ({rate:.2f}/s)", flush=True)
+
+
+async def _run(runner: BatchSuggestionRunner, total: int) -> None:
+    task = asyncio.create_task(runner.run())
+    reporter = asyncio.create_task(_report(runner, total, task))
+    try:
+        await task
+    finally:
+        reporter.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Batch AI suggestions for tickets")
+    parser.add_argument("--status", type=str, default="open", help="Ticket status filter ('' for any)")
+    parser.add_argument("--priority", type=str, default=None, help="Ticket priority filter")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of tickets")
+    parser.add_argument("--only-missing", action="store_true", help="Skip tickets with a stored suggestion")
+    parser.add_argument("--collection", type=str, default="kb_main", help="KB collection name")
+    parser.add_argument("--n-results", type=int, default=3, help="KB snippets per ticket")
+    parser.add_argument("--concurrency", type=int, default=None, help="Tickets processed concurrently")
+    parser.add_argument("--rpm", type=int, default=None, help="LLM requests per minute")
+    parser.add_argument("--provider", type=str, default=None, help="LLM provider override")
+    parser.add_argument("--model", type=str, default=None, help="LLM model override")
+    args = parser.parse_args()
+
+    filters = BatchFilters(
+        status=args.status or None,
+        priority=args.priority,
+        limit=args.limit,
+        only_missing=args.only_missing,
+    )
+    options = BatchOptions(
+        collection=args.collection,
+        n_results=args.n_results,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+    )
+    with session_scope() as session:
+        batch_id, ticket_ids = create_batch(session, filters, options)
+    override = LLMConfigOverride(provider=args.provider, model=args.model)
+    runner = BatchSuggestionRunner(batch_id, ticket_ids, options, override)
+    print(
+        f"Batch {batch_id}: {len(ticket_ids)} tickets, concurrency={runner.concurrency}, "
+        f"rpm={runner.requests_per_minute}"
+    )
+    try:
+        asyncio.run(_run(runner, len(ticket_ids)))
+    except KeyboardInterrupt:
+        runner.cancel()
+        runner.set_status("cancelled")
+        print("Cancelled.")
+
+    with session_scope() as session:
+        batch = session.get(SuggestionBatch, batch_id)
+        assert batch is not None
+        print(f"Batch {batch_id} {batch.status}: {batch.completed} ok, {batch.failed} failed")
+        done = max(1, batch.completed + batch.failed)
+        for stage, seconds in sorted((batch.stage_seconds or {}).items()):
+            print(f"  {stage:<10} avg {seconds / done * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Sweep HNSW search_ef on a KB collection and report recall@k and latency.
+
+Usage examples:
+  python scripts/hnsw_sweep.py --collection kb_main
+  python scripts/hnsw_sweep.py --collection kb_main --ef 10,20,40,80,160 --k 5 --queries 300
+  python scripts/hnsw_sweep.py --collection kb_main --queries-file queries.txt --apply 40
+
+Ground truth is an exact brute-force search over the collection's stored
+embeddings, in the collection's own distance space. Queries come from
+``--queries-file`` (one per line) or, by default, from the first words of
+sampled stored chunks, embedded with the configured provider. Every ef in
+``--ef`` is applied in turn with ``collection.modify``; the original value is
+put back afterwards unless ``--apply`` names the ef to keep.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("VECTOR_STORE_PATH", str((BACKEND_DIR / "vector_store").resolve()))
+
+from app.rag.store import (  # noqa: E402
+    _get_provider,
+    collection_space,
+    exact_distances,
+    get_collection,
+    iter_documents,
+    set_search_ef,
+)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    ids: List[str] = []
+    docs: List[str] = []
+    rows: List[np.ndarray] = []
+    for id_, doc, _meta, vector in iter_documents(args.collection, include_embeddings=True):
+        ids.append(id_)
+        docs.append(doc or "")
+        rows.append(vector)
+    if not ids:
+        raise SystemExit(f"collection {args.collection!r} is empty")
+    matrix = np.vstack(rows).astype(np.float32)
+    space = collection_space(args.collection)
+
+    if args.queries_file:
+        texts = [line.strip() for line in Path(args.queries_file).read_text(encoding="utf-8").splitlines()]
+        texts = [t for t in texts if t][: args.queries]
+    else:
+        rng = random.Random(args.seed)
+        picks = rng.sample(range(len(docs)), min(args.queries, len(docs)))
+        texts = [" ".join(docs[i].split()[: args.query_words]) or docs[i][:80] for i in picks]
+    provider = _get_provider()
+    queries = [np.asarray(provider.embed_query(t), dtype=np.float32) for t in texts]
+    k = min(args.k, len(ids))
+    truth = [set(ids[i] for i in np.argsort(exact_distances(matrix, q, space), kind="stable")[:k]) for q in queries]
+
+    original_ef = (get_collection(args.collection).configuration or {}).get("hnsw", {}).get("ef_search")
+    report: Dict[str, object] = {
+        "collection": args.collection,
+        "rows": len(ids),
+        "space": space,
+        "k": k,
+        "queries": len(queries),
+        "original_search_ef": original_ef,
+        "results": [],
+    }
+    try:
+        for ef in args.ef:
+            set_search_ef(args.collection, ef)
+            col = get_collection(args.collection)
+            col.query(query_embeddings=[queries[0].tolist()], n_results=k)  # warm the reloaded index
+            hits = 0
+            latencies: List[float] = []
+            for q, expected in zip(queries, truth):
+                started = time.perf_counter()
+                res = col.query(query_embeddings=[q.tolist()], n_results=k, include=[])
+                latencies.append(1000 * (time.perf_counter() - started))
+                hits += len(expected & set(res["ids"][0]))
+            report["results"].append(  # type: ignore[union-attr]
+                {
+                    "search_ef": ef,
+                    f"recall_at_{k}": round(hits / (len(queries) * k), 4),
+                    "p50_ms": round(_percentile(latencies, 50), 3),
+                    "p99_ms": round(_percentile(latencies, 99), 3),
+                }
+            )
+    finally:
+        keep = args.apply if args.apply is not None else original_ef
+        if keep is not None:
+            set_search_ef(args.collection, keep)
+    report["search_ef"] = keep
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", default="kb_main")
+    parser.add_argument("--ef", type=lambda s: [int(x) for x in s.split(",")], default=[10, 20, 40, 80, 160, 320])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--queries-file", help="One query per line (default: sampled from stored chunks)")
+    parser.add_argument("--query-words", type=int, default=12, help="Words taken from each sampled chunk")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--apply", type=int, default=None, help="Leave the collection at this search_ef")
+    parser.add_argument("--json", dest="json_path", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args)
+    k = report["k"]
+    print(
+        f"{report['collection']}: {report['rows']} rows, space={report['space']}, "
+        f"{report['queries']} queries, original search_ef={report['original_search_ef']}"
+    )
+    print(f"{'search_ef':>9} {f'recall@{k}':>10} {'p50':>9} {'p99':>9}")
+    for row in report["results"]:  # type: ignore[union-attr]
+        print(f"{row['search_ef']:>9} {row[f'recall_at_{k}']:>10} {row['p50_ms']:>7}ms {row['p99_ms']:>7}ms")
+    print(f"search_ef is now {report['search_ef']}")
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Bulk import tickets or ticket messages from JSONL/CSV into the database.
+
+Usage examples:
+  python scripts/import_tickets.py --file legacy_tickets.jsonl
+  python scripts/import_tickets.py --file legacy_messages.csv --kind messages \
+      --checkpoint legacy_messages.ckpt
+
+Re-running with the same --checkpoint resumes after the last committed batch.
+This script imports the backend app's DB helpers directly to avoid HTTP.
+Ensure dependencies are installed and run from repo root.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Ensure backend/app is importable
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Point DATABASE_URL to backend/astratickets.db if not explicitly set
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{(BACKEND_DIR / 'astratickets.db').resolve()}")
+
+from app.db.bulk_import import ImportResult, import_records, iter_records
+from app.db.session import get_session
+
+
+def _print_progress(result: ImportResult) -> None:
+    print(
+        f"  read={result.records_read} inserted={result.inserted} "
+        f"rejected={result.rejected} ({result.rows_per_second:,.0f} rows/s)",
+        flush=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import tickets/messages from JSONL or CSV")
+    parser.add_argument("--file", type=str, required=True, help="Path to a .jsonl or .csv file")
+    parser.add_argument("--kind", choices=["tickets", "messages"], default="tickets")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default=None, help="Defaults to file suffix")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per executemany batch")
+    parser.add_argument("--commit-every", type=int, default=4, help="Batches per transaction")
+    parser.add_argument("--checkpoint", type=str, default=None, help="Checkpoint file for resuming")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "jsonl")
+    session = next(get_session())
+    try:
+        with open(args.file, "rb") as fh:
+            result = import_records(
+                session,
+                iter_records(fh, fmt),
+                kind=args.kind,
+                batch_size=args.batch_size,
+                commit_every=args.commit_every,
+                checkpoint_path=args.checkpoint,
+                on_progress=_print_progress,
+            )
+    finally:
+        session.close()
+
+    print(
+        f"Imported {result.inserted} {args.kind} in {result.elapsed_seconds:.1f}s "
+        f"({result.rows_per_second:,.0f} rows/s); rejected {result.rejected}, skipped {result.skipped}."
+    )
+    for err in result.errors[:20]:
+        print(f"  record {err['record']}: {err['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Export or restore a binary snapshot of a KB vector collection.
+
+Usage examples:
+  python scripts/kb_snapshot.py export --collection kb_main --out backups/kb_main.atsnap
+  python scripts/kb_snapshot.py export --collection kb_main --out kb_main.f16.atsnap --dtype float16
+  python scripts/kb_snapshot.py info backups/kb_main.atsnap
+  python scripts/kb_snapshot.py restore backups/kb_main.atsnap --replace
+  python scripts/kb_snapshot.py finish kb_main__restore_1a2b3c4d kb_main
+
+Snapshots carry ids, documents, metadata and embeddings, so restoring a
+replica or recovering a lost vector store needs no embedding compute. The
+payload checksum and the embedding-model stamp are verified before loading.
+If a restore fails while swapping the loaded staging collection in, `finish`
+completes the swap.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BACKEND_DIR = REPO_ROOT / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("VECTOR_STORE_PATH", str((BACKEND_DIR / "vector_store").resolve()))
+
+from app.rag.snapshot import (
+    SnapshotError,
+    export_snapshot,
+    finish_restore,
+    read_manifest,
+    restore_snapshot,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write a collection to a snapshot file")
+    export.add_argument("--collection", default="kb_main")
+    export.add_argument("--out", required=True, help="Snapshot file to write")
+    export.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    export.add_argument("--batch-size", type=int, default=1000)
+
+    info = sub.add_parser("info", help="Print a snapshot's manifest")
+    info.add_argument("path")
+
+    restore = sub.add_parser("restore", help="Load a snapshot into a collection")
+    restore.add_argument("path")
+    restore.add_argument("--collection", default=None, help="Target (default: the snapshot's collection)")
+    restore.add_argument("--replace", action="store_true", help="Drop the target collection first")
+    restore.add_argument("--allow-model-mismatch", action="store_true")
+    restore.add_argument("--batch-size", type=int, default=None, help="Rows per add (default: Chroma's max)")
+
+    finish = sub.add_parser("finish", help="Swap a kept staging collection in after a failed restore")
+    finish.add_argument("staging")
+    finish.add_argument("collection")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            started = time.perf_counter()
+            manifest = export_snapshot(
+                args.collection,
+                args.out,
+                dtype=args.dtype,
+                batch_size=args.batch_size,
+                on_progress=lambda n: print(f"  {n} rows", file=sys.stderr),
+            )
+            size = Path(args.out).stat().st_size
+            print(
+                f"Wrote {manifest['count']} rows ({manifest['dim']}d {manifest['dtype']}, "
+                f"{size / 1e6:.1f} MB) to {args.out} in {time.perf_counter() - started:.1f}s"
+            )
+        elif args.command == "info":
+            print(json.dumps(read_manifest(args.path), indent=2))
+        elif args.command == "finish":
+            finish_restore(args.staging, args.collection)
+            print(f"Swapped '{args.staging}' in as '{args.collection}'")
+        else:
+            result = restore_snapshot(
+                args.path,
+                collection=args.collection,
+                replace=args.replace,
+                allow_model_mismatch=args.allow_model_mismatch,
+                batch_size=args.batch_size,
+                on_progress=lambda done, total: print(f"  {done}/{total} rows", file=sys.stderr),
+            )
+            print(f"Restored {result.restored} rows into '{result.collection}' in {result.seconds:.1f}s")
+    except SnapshotError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())